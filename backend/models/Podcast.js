@@ -17,11 +17,23 @@ const podcastSchema = new mongoose.Schema(
     },
     processedAt: {
       type: Date
+    },
+    // Last pipeline stage reported by the Python worker
+    stage: {
+      type: String
+    },
+    // Set by importSegments
+    segmentCount: {
+      type: Number,
+      default: 0
     }
   },
   { timestamps: true }
 );
 
+// Dashboard list is newest first
+podcastSchema.index({ createdAt: -1 });
+
 const Podcast = mongoose.model("Podcast", podcastSchema);
 
 export default Podcast;
@@ -16,6 +16,11 @@ const segmentSchema = new mongoose.Schema(
   { timestamps: true }
 );
 
+// One row per segment of a podcast; imports upsert on this key
+segmentSchema.index({ podcastId: 1, segmentId: 1 }, { unique: true });
+// Time-ordered pages and from/to windows within a podcast
+segmentSchema.index({ podcastId: 1, startTime: 1, segmentId: 1 });
+
 const Segment = mongoose.model("Segment", segmentSchema);
 
 export default Segment;
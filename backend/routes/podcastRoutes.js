@@ -1,35 +1,29 @@
 import express from "express";
 import Podcast from "../models/Podcast.js";
-import Segment from "../models/Segment.js";
 
 const router = express.Router();
 
+// Fields the dashboard list needs
+const PODCAST_LIST_FIELDS = {
+  title: 1,
+  fileName: 1,
+  audioUrl: 1,
+  duration: 1,
+  tags: 1,
+  status: 1,
+  stage: 1,
+  segmentCount: 1,
+  processedAt: 1,
+  createdAt: 1
+};
+
 // GET ALL PODCASTS
+// segmentCount is stored on the podcast by importSegments
 router.get("/", async (req, res) => {
   try {
-    const podcasts = await Podcast.aggregate([
-      {
-        $lookup: {
-          from: "segments",
-          localField: "_id",
-          foreignField: "podcastId",
-          as: "segments"
-        }
-      },
-      {
-        $addFields: {
-          segmentCount: { $size: "$segments" }
-        }
-      },
-      {
-        $project: {
-          segments: 0
-        }
-      },
-      {
-        $sort: { createdAt: -1 }
-      }
-    ]);
+    const podcasts = await Podcast.find({}, PODCAST_LIST_FIELDS)
+      .sort({ createdAt: -1 })
+      .lean();
 
     res.json(podcasts);
   } catch (err) {
@@ -1,79 +1,330 @@
 import express from "express";
 import mongoose from "mongoose";
+import Podcast from "../models/Podcast.js";
 import Segment from "../models/Segment.js";
 import logger from "../utils/logger.js";
+import { querySearchService } from "../utils/searchService.js";
 
 const router = express.Router();
 
+// Upper bound on segments a ?keyword= filter returns (the search service caps k)
+const KEYWORD_FILTER_LIMIT = 1000;
+
+// Regex filter over text, summary and keywords (fallback when the search
+// service is unavailable)
+function regexFilter(term) {
+  return [
+    { text: { $regex: term, $options: "i" } },
+    { summary: { $regex: term, $options: "i" } },
+    { keywords: { $regex: term, $options: "i" } }
+  ];
+}
+
+/**
+ * Lexical (BM25) search through the Python search service.
+ * Resolves with the matching Segment documents in rank order, each with
+ * the hit's score and matchTime (when the matched word is spoken).
+ * Resolves with null when podcast is given but its episode is not in the
+ * lexical index yet.
+ */
+async function lexicalSearch({ q, k, phrase, podcast }) {
+  const body = await querySearchService("/search/lexical", {
+    q,
+    k,
+    phrase: phrase ? "1" : undefined,
+    file: podcast ? `${podcast.fileName}.json` : undefined
+  });
+  if (body.indexed === false) return null;
+  const hits = body.results;
+  if (!hits.length) return [];
+
+  const fileNames = [...new Set(hits.map((h) => h.file.replace(/\.json$/, "")))];
+  const podcasts = podcast
+    ? [podcast]
+    : await Podcast.find({ fileName: { $in: fileNames } }, { fileName: 1 });
+  const byFile = new Map(podcasts.map((p) => [p.fileName, p._id]));
+
+  const groups = new Map();
+  for (const hit of hits) {
+    const podcastId = byFile.get(hit.file.replace(/\.json$/, ""));
+    if (!podcastId) continue;
+    if (!groups.has(String(podcastId))) groups.set(String(podcastId), { podcastId, segmentIds: [] });
+    groups.get(String(podcastId)).segmentIds.push(hit.segment_id);
+  }
+  if (!groups.size) return [];
+
+  const segments = await Segment.find({
+    $or: [...groups.values()].map((g) => ({ podcastId: g.podcastId, segmentId: { $in: g.segmentIds } }))
+  });
+  const byKey = new Map(segments.map((s) => [`${s.podcastId}:${s.segmentId}`, s]));
+
+  return hits
+    .map((hit) => {
+      const segment = byKey.get(`${byFile.get(hit.file.replace(/\.json$/, ""))}:${hit.segment_id}`);
+      return segment && { ...segment.toObject(), score: hit.score, matchTime: hit.match_time };
+    })
+    .filter(Boolean);
+}
+
+// Cursor pages: default and maximum page size
+const DEFAULT_PAGE_SIZE = 50;
+const MAX_PAGE_SIZE = 500;
+
+// ?fields=list drops the transcript text for list/timeline views
+const FIELD_PRESETS = {
+  list: ["segmentId", "startTime", "endTime", "summary", "keywords", "sentiment"]
+};
+const SELECTABLE_FIELDS = new Set([
+  "segmentId", "text", "summary", "keywords", "startTime", "endTime", "sentiment"
+]);
+
+function parseProjection(fields) {
+  if (!fields) return null;
+  const names = FIELD_PRESETS[fields] ?? fields.split(",").map((f) => f.trim());
+  // The sort key is always returned so a cursor can be built from the last row
+  const projection = { podcastId: 1, segmentId: 1, startTime: 1 };
+  for (const name of names) {
+    if (!SELECTABLE_FIELDS.has(name)) throw badRequest(`Unknown field: ${name}`);
+    projection[name] = 1;
+  }
+  return projection;
+}
+
+// Opaque cursor: the (startTime, segmentId) sort key of the last row served
+function encodeCursor(segment) {
+  return Buffer.from(JSON.stringify([segment.startTime, segment.segmentId])).toString("base64url");
+}
+
+function decodeCursor(cursor) {
+  try {
+    const [startTime, segmentId] = JSON.parse(Buffer.from(cursor, "base64url").toString("utf-8"));
+    if (typeof startTime !== "number" || typeof segmentId !== "number") throw new Error();
+    return { startTime, segmentId };
+  } catch {
+    throw badRequest("Invalid cursor");
+  }
+}
+
+function parseTime(value, name) {
+  if (value === undefined) return undefined;
+  const seconds = Number(value);
+  if (!Number.isFinite(seconds)) throw badRequest(`${name} must be a number of seconds`);
+  return seconds;
+}
+
+function badRequest(message) {
+  const err = new Error(message);
+  err.status = 400;
+  return err;
+}
+
+/**
+ * segmentIds of a podcast's segments matching keyword, via the lexical
+ * search service. A keyword of several words (the keyword cloud sends
+ * KeyBERT bigrams) must match as a phrase, like the regex filter. Resolves
+ * with null when the episode is not in the lexical index yet.
+ */
+async function lexicalSegmentIds(podcast, keyword) {
+  const terms = keyword.toLowerCase().match(/[a-z0-9]+(?:'[a-z]+)?/g) || [];
+  const body = await querySearchService("/search/lexical", {
+    q: keyword,
+    k: KEYWORD_FILTER_LIMIT,
+    phrase: terms.length > 1 ? "1" : undefined,
+    file: `${podcast.fileName}.json`
+  });
+  if (body.indexed === false) return null;
+  return body.results.map((hit) => hit.segment_id);
+}
+
 /**
- * GET segments for a podcast with optional keyword filtering
+ * GET segments for a podcast
  * Example:
  *   /api/podcasts/:id/segments
  *   /api/podcasts/:id/segments?keyword=trauma
+ *   /api/podcasts/:id/segments?from=600&to=1200          (overlapping 10:00-20:00)
+ *   /api/podcasts/:id/segments?limit=50&fields=list      ({ segments, nextCursor })
+ *   /api/podcasts/:id/segments?limit=50&cursor=<nextCursor>
+ *
+ * Without limit/cursor the full (filtered) list is returned as an array,
+ * in segmentId order as before; pages are in (startTime, segmentId) order.
  */
 router.get("/podcasts/:id/segments", async (req, res) => {
   try {
     const { id } = req.params;
-    const { keyword } = req.query;
+    const { keyword, cursor, fields } = req.query;
 
     const podcastId = new mongoose.Types.ObjectId(id);
+    const from = parseTime(req.query.from, "from");
+    const to = parseTime(req.query.to, "to");
+    const projection = parseProjection(fields);
+    const paginate = req.query.limit !== undefined || cursor !== undefined;
+    const limit = Math.min(Math.max(parseInt(req.query.limit, 10) || DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE);
 
-    let query = { podcastId };
+    const query = { podcastId };
+    const and = [];
+
+    // Segments overlapping [from, to]
+    if (from !== undefined) query.endTime = { $gte: from };
+    if (to !== undefined) query.startTime = { $lte: to };
 
     if (keyword) {
-      query.$or = [
-        { text: { $regex: keyword, $options: "i" } },
-        { summary: { $regex: keyword, $options: "i" } },
-        { keywords: { $regex: keyword, $options: "i" } }
-      ];
+      try {
+        const podcast = await Podcast.findById(podcastId, { fileName: 1 });
+        if (!podcast) return res.status(404).json({ error: "Not found" });
+
+        const segmentIds = await lexicalSegmentIds(podcast, keyword);
+        if (segmentIds === null) {
+          and.push({ $or: regexFilter(keyword) });
+        } else {
+          // Phrase positions only cover the text: keep segments tagged with the keyword itself
+          and.push({
+            $or: [{ segmentId: { $in: segmentIds } }, { keywords: { $regex: keyword, $options: "i" } }]
+          });
+        }
+      } catch (err) {
+        logger.warn("Search service unavailable, filtering with regex", { error: err.message });
+        and.push({ $or: regexFilter(keyword) });
+      }
+    }
+
+    if (cursor) {
+      const after = decodeCursor(cursor);
+      and.push({
+        $or: [
+          { startTime: { $gt: after.startTime } },
+          { startTime: after.startTime, segmentId: { $gt: after.segmentId } }
+        ]
+      });
     }
+    if (and.length) query.$and = and;
 
-    const segments = await Segment.find(query).sort({ segmentId: 1 });
+    let find = Segment.find(query, projection)
+      .sort(paginate ? { startTime: 1, segmentId: 1 } : { segmentId: 1 })
+      .lean();
+    // One extra row tells whether another page follows
+    if (paginate) find = find.limit(limit + 1);
+
+    let segments = await find;
 
     logger.info("Segments fetched", {
       podcastId: id,
       segmentCount: segments.length
     });
 
-    res.json(segments);
+    if (!paginate) return res.json(segments);
+
+    const hasMore = segments.length > limit;
+    segments = segments.slice(0, limit);
+
+    res.json({
+      segments,
+      nextCursor: hasMore ? encodeCursor(segments[segments.length - 1]) : null
+    });
   } catch (err) {
     console.error(err);
-    res.status(500).json({
+    res.status(err.status || 500).json({
       error: "Failed to fetch segments",
       details: err.message
     });
   }
 });
 
+/**
+ * Turn semantic search hits (keyed by database/<fileName>.json) into
+ * segment-shaped results with the podcast id, for deep links.
+ */
+async function toSegmentHits(results) {
+  const fileNames = [...new Set(results.map((r) => r.file.replace(/\.json$/, "")))];
+  const podcasts = await Podcast.find({ fileName: { $in: fileNames } }, { fileName: 1 });
+  const byFile = new Map(podcasts.map((p) => [p.fileName, p._id]));
+
+  return results.map((r) => ({
+    podcastId: byFile.get(r.file.replace(/\.json$/, "")) ?? null,
+    segmentId: r.segment_id,
+    text: r.text,
+    summary: r.summary,
+    startTime: r.start_time,
+    endTime: r.end_time,
+    score: r.score
+  }));
+}
+
+/**
+ * Search across every episode (Python search service)
+ * Example:
+ *   /api/search?q=rewilding%20scotland&k=10
+ *   /api/search?q=climate%20change&mode=lexical&phrase=1
+ */
+router.get("/search", async (req, res) => {
+  try {
+    const { q, k, mode, phrase } = req.query;
+
+    if (!q) {
+      return res.status(400).json({ error: "Missing search query ?q=" });
+    }
+
+    if (mode === "lexical") {
+      return res.json(await lexicalSearch({ q, k, phrase }));
+    }
+
+    const body = await querySearchService("/search/semantic", { q, k });
+    res.json(await toSegmentHits(body.results));
+  } catch (err) {
+    console.error(err);
+    res.status(err.status || 502).json({
+      error: "Search failed",
+      details: err.message
+    });
+  }
+});
+
 /**
  * Full text search endpoint
  * Example:
- *   /api/podcasts/:id/search?q=brain
+ *   /api/podcasts/:id/search?q=brain                (BM25, ranked)
+ *   /api/podcasts/:id/search?q=brain%20injury&phrase=1
+ *   /api/podcasts/:id/search?q=brain&mode=semantic
  */
 router.get("/podcasts/:id/search", async (req, res) => {
   try {
     const { id } = req.params;
-    const { q } = req.query;
+    const { q, mode = "lexical", k, phrase } = req.query;
 
     if (!q) {
       return res.status(400).json({ error: "Missing search query ?q=" });
     }
 
-    const podcastId = new mongoose.Types.ObjectId(id);
+    const podcast = await Podcast.findById(id);
+    if (!podcast) return res.status(404).json({ error: "Not found" });
+
+    if (mode === "lexical") {
+      try {
+        const hits = await lexicalSearch({ q, k, phrase, podcast });
+        if (hits) return res.json(hits);
+        logger.info("Episode not in the lexical index yet, searching with regex", { podcastId: id });
+      } catch (err) {
+        logger.warn("Search service unavailable, searching with regex", { error: err.message });
+      }
+    }
+
+    if (mode === "semantic") {
+      const body = await querySearchService("/search/semantic", {
+        q,
+        k,
+        file: `${podcast.fileName}.json`
+      });
+      return res.json(await toSegmentHits(body.results));
+    }
 
     const results = await Segment.find({
-      podcastId,
-      $or: [
-        { text: { $regex: q, $options: "i" } },
-        { summary: { $regex: q, $options: "i" } },
-        { keywords: { $regex: q, $options: "i" } }
-      ]
+      podcastId: podcast._id,
+      $or: regexFilter(q)
     }).sort({ segmentId: 1 });
 
     res.json(results);
   } catch (err) {
     console.error(err);
-    res.status(500).json({
+    res.status(err.status || 500).json({
       error: "Search failed",
       details: err.message
     });
@@ -0,0 +1,39 @@
+import express from "express";
+import logger from "../utils/logger.js";
+import { proxyTranscriptionStream } from "../utils/streamService.js";
+
+const router = express.Router();
+
+/* ===============================
+   STREAMING TRANSCRIPTION
+   =============================== */
+/**
+ * POST /api/transcribe/stream?format=pcm|audio&partials=1
+ *
+ * Send audio as it is recorded or read (chunked request body): raw 16 kHz
+ * 16-bit mono PCM by default, or any ffmpeg-readable file with
+ * format=audio. The response is NDJSON, one line per partial or final
+ * result, each with the chunk count and server-side latency_ms.
+ */
+router.post("/transcribe/stream", async (req, res) => {
+  try {
+    await proxyTranscriptionStream(req, res, {
+      format: req.query.format,
+      partials: req.query.partials
+    });
+  } catch (err) {
+    if (err.name === "AbortError") return;
+
+    logger.error("Streaming transcription failed", { error: err.message });
+    if (!res.headersSent) {
+      res.status(503).json({
+        error: "Streaming transcription unavailable",
+        details: err.message
+      });
+    } else {
+      res.end();
+    }
+  }
+});
+
+export default router;
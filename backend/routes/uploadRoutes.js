@@ -1,10 +1,18 @@
 import express from "express";
 import multer from "multer";
+import fs from "fs";
 import path from "path";
 import { exec } from "child_process";
 import Podcast from "../models/Podcast.js";
 import { fileURLToPath } from "url";
 import logger from "../utils/logger.js";
+import {
+  PROJECT_ROOT,
+  submitJob,
+  getJob,
+  onJobEvent,
+  getWorkerStatus
+} from "../utils/pythonWorker.js";
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
@@ -24,6 +32,64 @@ const storage = multer.diskStorage({
 
 const upload = multer({ storage });
 
+/* ===============================
+   PIPELINE JOB EVENTS
+   =============================== */
+// Every job's id is its podcast id. Events also arrive for jobs the worker
+// recovered after a crash, so nothing here depends on the request that
+// submitted the job.
+async function handleJobEvent(event) {
+  const podcastId = event.id;
+
+  try {
+    if (event.type === "progress") {
+      logger.info(`Pipeline ${event.stage} ${event.state}`, {
+        podcastId,
+        seconds: event.seconds
+      });
+      if (event.state === "started") {
+        await Podcast.findByIdAndUpdate(podcastId, { stage: event.stage });
+      }
+    } else if (event.type === "retry") {
+      logger.error(`Pipeline ${event.stage} failed, retrying in ${event.retry_in}s`, {
+        podcastId,
+        attempt: event.attempt,
+        error: event.error
+      });
+    } else if (event.type === "result" && !event.ok) {
+      logger.error("Pipeline failed", { podcastId, stage: event.stage, error: event.error });
+      await Podcast.findByIdAndUpdate(podcastId, {
+        status: "failed",
+        stage: event.stage
+      });
+    } else if (event.type === "result") {
+      /* ===============================
+         STEP 4: IMPORT TO MONGODB
+         =============================== */
+      exec(
+        `node backend/scripts/importSegments.js "${event.file}"`,
+        { cwd: PROJECT_ROOT },
+        async (impErr) => {
+          if (impErr) {
+            console.error("Import error:", impErr);
+            await Podcast.findByIdAndUpdate(podcastId, {
+              status: "failed",
+              stage: "import"
+            });
+          } else {
+            // importSegments sets status, stage and segmentCount itself
+            console.log("Pipeline completed successfully");
+          }
+        }
+      );
+    }
+  } catch (err) {
+    logger.error("Could not record pipeline event", { podcastId, error: err.message });
+  }
+}
+
+onJobEvent(handleJobEvent);
+
 /* ===============================
    UPLOAD ROUTE
    =============================== */
@@ -32,8 +98,6 @@ router.post("/upload", upload.single("audio"), async (req, res) => {
     const file = req.file;
     const baseName = path.parse(file.filename).name;
 
-    const PROJECT_ROOT = path.join(__dirname, "..", "..");
-
     const audioPath = path.join(
       PROJECT_ROOT,
       "backend",
@@ -58,87 +122,31 @@ router.post("/upload", upload.single("audio"), async (req, res) => {
     });
 
     /* ===============================
-       STEP 1: TRANSCRIPTION
-       =============================== */
-    // Determine correct Python executable (use virtual environment if available)
-    const isWin = process.platform === "win32";
-    // The .venv is located locally at e:/Podcast-Analyser/.venv which is ONE LEVEL UP from the project root
-    // But for portability, let's assume it might be in the project root OR one level up.
-    // Given the user context: e:/Podcast-Analyser/.venv
-    // path.join(PROJECT_ROOT, "..", ".venv")
-
-    const venvPython = isWin
-      ? path.join(PROJECT_ROOT, "..", ".venv", "Scripts", "python.exe")
-      : path.join(PROJECT_ROOT, "..", ".venv", "bin", "python");
-
-    // We'll use the venv python by default. If it doesn't exist, one might fallback to "python",
-    // but here we really want the venv one.
-    const PYTHON_CMD = venvPython;
-
-    console.log("Using Python:", PYTHON_CMD);
-
-    /* ===============================
-       STEP 1: TRANSCRIPTION
+       STEPS 1-3: TRANSCRIPTION, SEGMENTATION, KEYWORDS + SUMMARY
        =============================== */
-    exec(
-      `"${PYTHON_CMD}" -m src.transcription.batch_transcriber "${audioPath}"`,
-      { cwd: PROJECT_ROOT, maxBuffer: 1024 * 1024 * 10 },
-      (err) => {
-        if (err) return console.error("Transcription error:", err);
-
-        const transcriptPath = path.join(
-          PROJECT_ROOT,
-          "data",
-          "transcripts",
-          `${baseName}.json`
-        );
-
-        /* ===============================
-           STEP 2: SEGMENTATION
-           =============================== */
-        exec(
-          `"${PYTHON_CMD}" -m src.segmentation.batch_segmenter "${transcriptPath}"`,
-          { cwd: PROJECT_ROOT },
-          (segErr) => {
-            if (segErr) return console.error("Segmentation error:", segErr);
-
-            /* ===============================
-               STEP 3: KEYWORDS + SUMMARY
-               =============================== */
-            exec(
-              `"${PYTHON_CMD}" -m src.segmentation.batch_keyword_summarizer "${baseName}.json"`,
-              { cwd: PROJECT_ROOT },
-              (sumErr) => {
-                if (sumErr) return console.error("Summarization error:", sumErr);
-
-                /* ===============================
-                   STEP 4: IMPORT TO MONGODB
-                   =============================== */
-                exec(
-                  `node backend/scripts/importSegments.js "${baseName}.json"`,
-                  { cwd: PROJECT_ROOT },
-                  async (impErr) => {
-                    if (impErr) {
-                      console.error("Import error:", impErr);
-                    } else {
-                      await Podcast.findByIdAndUpdate(podcast._id, {
-                        status: "completed",
-                        processedAt: new Date()
-                      });
-                      console.log("Pipeline completed successfully");
-                    }
-                  }
-                );
-              }
-            );
-          }
-        );
+    // Queued in the Python worker's persistent job queue under the podcast
+    // id; handleJobEvent follows it from there.
+    let job;
+    try {
+      job = await submitJob(podcast._id, audioPath);
+    } catch (err) {
+      if (err.status !== 503) {
+        await Podcast.findByIdAndUpdate(podcast._id, { status: "failed", stage: "queue" });
+        throw err;
       }
-    );
+
+      // Queue full: turn the upload away instead of piling up work
+      await Podcast.deleteOne({ _id: podcast._id });
+      fs.unlink(file.path, () => {});
+      logger.info("Upload rejected, processing queue is full", { fileName: baseName });
+      res.set("Retry-After", "60");
+      return res.status(503).json({ error: "Processing queue is full, try again later" });
+    }
 
     res.json({
-      message: "Upload successful. Processing started.",
-      podcastId: podcast._id
+      message: "Upload successful. Processing queued.",
+      podcastId: podcast._id,
+      queue: job.queue
     });
 
   } catch (err) {
@@ -147,4 +155,80 @@ router.post("/upload", upload.single("audio"), async (req, res) => {
   }
 });
 
+/* ===============================
+   JOB PROGRESS (POLLING)
+   =============================== */
+// :id is the podcast id returned by /upload
+router.get("/jobs/:id", async (req, res) => {
+  try {
+    const job = await getJob(req.params.id);
+    if (!job) return res.status(404).json({ error: "Job not found" });
+    res.json(job);
+  } catch (err) {
+    res.status(503).json({ error: "Worker unavailable", details: err.message });
+  }
+});
+
+/* ===============================
+   PYTHON WORKER HEALTH
+   =============================== */
+router.get("/worker/status", async (req, res) => {
+  try {
+    res.json(await getWorkerStatus());
+  } catch (err) {
+    res.status(503).json({ error: "Worker unavailable", details: err.message });
+  }
+});
+
+/* ===============================
+   PIPELINE METRICS (Prometheus)
+   =============================== */
+// Every Python process writes its own <process>.prom file; serve them together
+const METRICS_DIR = path.resolve(
+  PROJECT_ROOT,
+  process.env.PIPELINE_METRICS_DIR || path.join("data", "metrics")
+);
+
+// The exposition format allows one HELP/TYPE per metric and wants its
+// samples together, so the files are merged metric by metric
+function mergePrometheusText(texts) {
+  const families = new Map();
+  const family = (name) => {
+    if (!families.has(name)) families.set(name, { meta: [], samples: [] });
+    return families.get(name);
+  };
+
+  for (const text of texts) {
+    for (const line of text.split("\n")) {
+      const meta = line.match(/^# (HELP|TYPE) (\S+)/);
+      if (meta) {
+        const f = family(meta[2]);
+        if (!f.meta.some((m) => m.startsWith(`# ${meta[1]} `))) f.meta.push(line);
+      } else if (line.trim() && !line.startsWith("#")) {
+        const name = line.match(/^[A-Za-z_:][A-Za-z0-9_:]*/)[0];
+        family(name.replace(/_(bucket|sum|count)$/, "")).samples.push(line);
+      }
+    }
+  }
+
+  let out = "";
+  for (const f of families.values()) {
+    out += [...f.meta, ...f.samples].join("\n") + "\n";
+  }
+  return out;
+}
+
+router.get("/metrics", async (req, res) => {
+  try {
+    const names = (await fs.promises.readdir(METRICS_DIR)).filter((n) => n.endsWith(".prom")).sort();
+    const files = await Promise.all(
+      names.map((n) => fs.promises.readFile(path.join(METRICS_DIR, n), "utf-8"))
+    );
+    res.type("text/plain; version=0.0.4").send(mergePrometheusText(files));
+  } catch (err) {
+    if (err.code === "ENOENT") return res.type("text/plain; version=0.0.4").send("");
+    res.status(500).json({ error: "Metrics unavailable", details: err.message });
+  }
+});
+
 export default router;
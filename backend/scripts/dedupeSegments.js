@@ -0,0 +1,65 @@
+import path from "path";
+import dotenv from "dotenv";
+import mongoose from "mongoose";
+import Podcast from "../models/Podcast.js";
+import Segment from "../models/Segment.js";
+import logger from "../utils/logger.js";
+import { fileURLToPath } from "url";
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+dotenv.config({ path: path.join(__dirname, "..", ".env") });
+
+/**
+ * One-off migration for databases filled by the old per-row import:
+ * keep the newest row of every (podcastId, segmentId) pair, build the
+ * unique index the bulk import relies on, and backfill segmentCount.
+ */
+async function dedupeSegments() {
+  try {
+    await mongoose.connect(process.env.MONGO_URI);
+
+    const duplicates = await Segment.aggregate([
+      { $sort: { createdAt: -1 } },
+      {
+        $group: {
+          _id: { podcastId: "$podcastId", segmentId: "$segmentId" },
+          ids: { $push: "$_id" },
+          count: { $sum: 1 }
+        }
+      },
+      { $match: { count: { $gt: 1 } } }
+    ]).allowDiskUse(true);
+
+    const extra = duplicates.flatMap((d) => d.ids.slice(1));
+    const removed = extra.length
+      ? (await Segment.deleteMany({ _id: { $in: extra } })).deletedCount
+      : 0;
+
+    await Segment.syncIndexes();
+
+    const counts = await Segment.aggregate([
+      { $group: { _id: "$podcastId", count: { $sum: 1 } } }
+    ]);
+    if (counts.length) {
+      await Podcast.bulkWrite(
+        counts.map((c) => ({
+          updateOne: { filter: { _id: c._id }, update: { $set: { segmentCount: c.count } } }
+        })),
+        { ordered: false }
+      );
+    }
+
+    logger.info("Segment dedupe completed", {
+      duplicateRowsRemoved: removed,
+      podcastsCounted: counts.length
+    });
+    process.exit(0);
+  } catch (err) {
+    logger.error("Segment dedupe failed", { error: err.message });
+    process.exit(1);
+  }
+}
+
+dedupeSegments();
@@ -5,6 +5,7 @@ import mongoose from "mongoose";
 import Podcast from "../models/Podcast.js";
 import Segment from "../models/Segment.js";
 import logger from "../utils/logger.js";
+import { streamJsonArray } from "../utils/jsonArrayStream.js";
 import { fileURLToPath } from "url";
 
 const __filename = fileURLToPath(import.meta.url);
@@ -14,6 +15,44 @@ dotenv.config({ path: path.join(__dirname, "..", ".env") });
 
 const DATABASE_DIR = path.join(__dirname, "..", "..", "database");
 
+// Upserts sent per bulkWrite round trip
+const BATCH_SIZE = 500;
+
+function toSegment(seg, index, podcastId) {
+  const start =
+    seg.start_time ??
+    seg.startTime ??
+    index * 10;
+
+  const end =
+    seg.end_time ??
+    seg.endTime ??
+    start + 10;
+
+  return {
+    podcastId,
+    segmentId: seg.segment_id ?? index,
+    text: seg.text || "",
+    summary: seg.summary || "",
+    keywords: seg.keywords || [],
+    startTime: start,
+    endTime: end,
+    sentiment: {
+      score: seg.sentiment?.score ?? 0
+    }
+  };
+}
+
+/**
+ * Upsert every segment of an enriched file, keyed on (podcastId, segmentId).
+ * The file is streamed and written in unordered batches of BATCH_SIZE, so
+ * re-running after a partial failure updates rows instead of duplicating
+ * them. Segments left over from an earlier import of the same podcast are
+ * removed, and the podcast's segmentCount and status are set at the end.
+ *
+ * bulkWrite upserts bypass Mongoose validation, so each segment is checked
+ * against the schema first; invalid ones are logged and skipped.
+ */
 async function importSegments(fileName) {
   try {
     await mongoose.connect(process.env.MONGO_URI);
@@ -23,8 +62,6 @@ async function importSegments(fileName) {
       throw new Error(`File not found: ${filePath}`);
     }
 
-    const raw = JSON.parse(fs.readFileSync(filePath, "utf-8"));
-
     const baseName = fileName.replace(".json", "");
 
     const podcast = await Podcast.findOne({ fileName: baseName });
@@ -38,38 +75,74 @@ async function importSegments(fileName) {
       fileName: baseName
     });
 
+    const started = Date.now();
+    const segmentIds = [];
+    let invalid = 0;
+    let batch = [];
+    let roundTrips = 0;
+
+    const flush = async () => {
+      if (!batch.length) return;
+      await Segment.bulkWrite(batch, { ordered: false });
+      roundTrips++;
+      batch = [];
+    };
+
     let index = 0;
 
-    for (const seg of raw) {
-      const start =
-        seg.start_time ??
-        seg.startTime ??
-        index * 10;
-
-      const end =
-        seg.end_time ??
-        seg.endTime ??
-        start + 10;
-
-      await Segment.create({
-        podcastId: podcast._id,
-        segmentId: seg.segment_id ?? index,
-        text: seg.text || "",
-        summary: seg.summary || "",
-        keywords: seg.keywords || [],
-        startTime: start,
-        endTime: end,
-        sentiment: {
-          score: seg.sentiment?.score ?? 0
+    for await (const seg of streamJsonArray(filePath)) {
+      const doc = toSegment(seg, index, podcast._id);
+      index++;
+
+      const error = new Segment(doc).validateSync();
+      if (error) {
+        logger.warn("Skipping invalid segment", {
+          podcastId: podcast._id,
+          segmentId: doc.segmentId,
+          error: error.message
+        });
+        invalid++;
+        continue;
+      }
+      segmentIds.push(doc.segmentId);
+
+      batch.push({
+        updateOne: {
+          filter: { podcastId: podcast._id, segmentId: doc.segmentId },
+          update: { $set: doc },
+          upsert: true
         }
       });
 
-      index++;
+      if (batch.length >= BATCH_SIZE) await flush();
     }
+    await flush();
+
+    // Rows from an earlier import that this file no longer has
+    const stale = await Segment.deleteMany({
+      podcastId: podcast._id,
+      segmentId: { $nin: segmentIds }
+    });
+
+    await Podcast.updateOne(
+      { _id: podcast._id },
+      {
+        $set: {
+          segmentCount: segmentIds.length,
+          status: "completed",
+          stage: "completed",
+          processedAt: new Date()
+        }
+      }
+    );
 
     logger.info("Import completed", {
       podcastId: podcast._id,
-      segmentCount: raw.length
+      segmentCount: segmentIds.length,
+      invalidSkipped: invalid,
+      staleRemoved: stale.deletedCount,
+      bulkWrites: roundTrips,
+      ms: Date.now() - started
     });
 
     process.exit(0);
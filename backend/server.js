@@ -8,7 +8,11 @@ import connectDB from "./config/db.js";
 import podcastRoutes from "./routes/podcastRoutes.js";
 import segmentRoutes from "./routes/segmentRoutes.js";
 import uploadRoutes from "./routes/uploadRoutes.js";
+import transcribeRoutes from "./routes/transcribeRoutes.js";
 import logger from "./utils/logger.js"; // ✅ ADDED (Winston logger)
+import { startWorker } from "./utils/pythonWorker.js";
+import { startSearchService } from "./utils/searchService.js";
+import { startStreamService } from "./utils/streamService.js";
 
 dotenv.config();
 
@@ -59,6 +63,7 @@ app.post("/api/logs", (req, res) => {
 app.use("/api/podcasts", podcastRoutes);
 app.use("/api", segmentRoutes);
 app.use("/api", uploadRoutes);
+app.use("/api", transcribeRoutes);
 
 /* ===============================
    HEALTH CHECK
@@ -73,4 +78,9 @@ app.get("/", (req, res) => {
 const PORT = process.env.PORT || 5000;
 app.listen(PORT, () => {
   console.log(`Server running on port ${PORT}`);
+
+  // Load the Python models now so the first upload does not wait for them
+  startWorker();
+  startSearchService();
+  startStreamService();
 });
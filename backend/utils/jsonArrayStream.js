@@ -0,0 +1,73 @@
+import fs from "fs";
+
+/**
+ * Stream the elements of a top-level JSON array file one at a time, so a
+ * long episode is never held in memory as a whole.
+ *
+ *   for await (const item of streamJsonArray(filePath)) { ... }
+ *
+ * Elements are sliced out by tracking nesting depth and string state, then
+ * parsed with JSON.parse.
+ */
+export async function* streamJsonArray(filePath, { highWaterMark = 64 * 1024 } = {}) {
+  const stream = fs.createReadStream(filePath, { encoding: "utf-8", highWaterMark });
+
+  let depth = 0;
+  let inString = false;
+  let escaped = false;
+  let started = false;
+  let buffer = "";
+  let start = -1;
+
+  for await (const chunk of stream) {
+    const offset = buffer.length;
+    buffer += chunk;
+
+    for (let i = offset; i < buffer.length; i++) {
+      const ch = buffer[i];
+
+      if (inString) {
+        if (escaped) escaped = false;
+        else if (ch === "\\") escaped = true;
+        else if (ch === '"') inString = false;
+        continue;
+      }
+
+      if (ch === '"') {
+        inString = true;
+        if (depth === 1 && start < 0) start = i;
+      } else if (ch === "[" || ch === "{") {
+        if (!started) {
+          if (ch !== "[") throw new Error(`${filePath} is not a JSON array`);
+          started = true;
+        } else if (depth === 1 && start < 0) {
+          start = i;
+        }
+        depth++;
+      } else if (ch === "]" || ch === "}") {
+        depth--;
+        if (depth === 0 && start >= 0) {
+          // Last element was a scalar, closed by the array's "]"
+          yield JSON.parse(buffer.slice(start, i));
+          start = -1;
+        } else if (depth === 1 && start >= 0) {
+          yield JSON.parse(buffer.slice(start, i + 1));
+          start = -1;
+        }
+      } else if (depth === 1 && start < 0 && !/[\s,]/.test(ch)) {
+        // Scalar element (number, true, false, null)
+        start = i;
+      } else if (depth === 1 && start >= 0 && /[\s,]/.test(ch)) {
+        yield JSON.parse(buffer.slice(start, i));
+        start = -1;
+      }
+    }
+
+    // Drop everything before the element in progress
+    const keep = start >= 0 ? start : buffer.length;
+    buffer = buffer.slice(keep);
+    if (start >= 0) start = 0;
+  }
+
+  if (depth !== 0) throw new Error(`${filePath}: unexpected end of JSON`);
+}
@@ -0,0 +1,36 @@
+import { spawn } from "child_process";
+import readline from "readline";
+import logger from "./logger.js";
+import { PROJECT_ROOT, PYTHON_CMD } from "./pythonWorker.js";
+
+/* ===============================
+   LOCAL PYTHON HTTP SERVICES
+   =============================== */
+// Long-running `python -m <module> --port <port>` processes that Express
+// proxies to over localhost. Each name is started at most once.
+const services = new Map();
+
+export function startPythonService(name, moduleName, port) {
+  if (services.has(name)) return services.get(name);
+
+  logger.info(`Starting Python ${name} service on port ${port}`);
+
+  const service = spawn(PYTHON_CMD, ["-m", moduleName, "--port", String(port)], {
+    cwd: PROJECT_ROOT,
+    stdio: ["ignore", "pipe", "pipe"]
+  });
+
+  for (const stream of [service.stdout, service.stderr]) {
+    readline.createInterface({ input: stream }).on("line", (line) => {
+      console.log(`[${name}] ${line}`);
+    });
+  }
+
+  service.on("exit", (code) => {
+    logger.error(`Python ${name} service exited with code ${code}`);
+    services.delete(name);
+  });
+
+  services.set(name, service);
+  return service;
+}
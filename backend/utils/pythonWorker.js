@@ -0,0 +1,152 @@
+import path from "path";
+import readline from "readline";
+import { spawn } from "child_process";
+import { EventEmitter } from "events";
+import { fileURLToPath } from "url";
+import logger from "./logger.js";
+
+// Resolve __dirname for ES modules
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+export const PROJECT_ROOT = path.join(__dirname, "..", "..");
+
+// The .venv lives one level above the project root (see uploadRoutes history)
+const isWin = process.platform === "win32";
+export const PYTHON_CMD = isWin
+  ? path.join(PROJECT_ROOT, "..", ".venv", "Scripts", "python.exe")
+  : path.join(PROJECT_ROOT, "..", ".venv", "bin", "python");
+
+/* ===============================
+   RESIDENT PYTHON WORKER
+   =============================== */
+// One long-lived `python -m src.pipeline.worker` process keeps the models
+// loaded. Requests and events are JSON lines tagged with a request id.
+const events = new EventEmitter();
+events.setMaxListeners(0);
+
+let worker = null;
+let nextId = 1;
+
+function startWorker() {
+  if (worker) return worker;
+
+  logger.info(`Starting Python worker: ${PYTHON_CMD}`);
+
+  worker = spawn(PYTHON_CMD, ["-m", "src.pipeline.worker"], {
+    cwd: PROJECT_ROOT,
+    stdio: ["pipe", "pipe", "pipe"]
+  });
+
+  readline.createInterface({ input: worker.stdout }).on("line", (line) => {
+    let event;
+    try {
+      event = JSON.parse(line);
+    } catch {
+      return;
+    }
+
+    if (event.type === "ready") {
+      logger.info(`Python worker ready (models loaded in ${event.load_seconds}s)`);
+    }
+
+    events.emit("event", event);
+    if (event.id !== undefined) events.emit(`event:${event.id}`, event);
+  });
+
+  readline.createInterface({ input: worker.stderr }).on("line", (line) => {
+    console.log(`[python] ${line}`);
+  });
+
+  worker.on("exit", (code) => {
+    logger.error(`Python worker exited with code ${code}`);
+    worker = null;
+    events.emit("exit", code);
+  });
+
+  return worker;
+}
+
+function send(request) {
+  const proc = startWorker();
+  proc.stdin.write(JSON.stringify(request) + "\n");
+}
+
+/**
+ * Send one request and resolve with the first reply of one of the given
+ * types. Rejects if no reply arrives within timeoutMs (e.g. the worker is
+ * still loading models).
+ */
+function request(id, fields, types, timeoutMs) {
+  return new Promise((resolve, reject) => {
+    const timer = setTimeout(() => {
+      cleanup();
+      reject(new Error(`Python worker did not answer ${fields.cmd} request`));
+    }, timeoutMs);
+
+    const onEvent = (event) => {
+      if (!types.includes(event.type)) return;
+      cleanup();
+      resolve(event);
+    };
+
+    const cleanup = () => {
+      clearTimeout(timer);
+      events.off(`event:${id}`, onEvent);
+    };
+
+    events.on(`event:${id}`, onEvent);
+    send({ id, ...fields });
+  });
+}
+
+/**
+ * Queue one audio file in the worker's persistent job queue under jobId.
+ * Resolves once the job is accepted; progress and the result arrive later
+ * as job events (see onJobEvent) or through getJob polling. Rejects with
+ * err.status 503 when the queue is full.
+ */
+export async function submitJob(jobId, audioPath, timeoutMs = 30000) {
+  const event = await request(
+    String(jobId),
+    { cmd: "process", audio_path: audioPath },
+    ["accepted", "rejected", "result"],
+    timeoutMs
+  );
+
+  if (event.type === "accepted") return event;
+
+  const err = new Error(event.error);
+  err.status = event.type === "rejected" ? 503 : 400;
+  throw err;
+}
+
+/**
+ * Listen to progress, retry and result events of every job, including
+ * jobs the worker recovered after a restart.
+ */
+export function onJobEvent(listener) {
+  events.on("event", (event) => {
+    if (event.id !== undefined && ["progress", "retry", "result"].includes(event.type)) {
+      listener(event);
+    }
+  });
+}
+
+/**
+ * State of one job from the queue (status, attempts, per-stage progress),
+ * or null if the worker does not know it.
+ */
+export async function getJob(jobId, timeoutMs = 5000) {
+  const event = await request(String(nextId++), { cmd: "job", job_id: String(jobId) }, ["job"], timeoutMs);
+  return event.job;
+}
+
+/**
+ * Ask the worker for its health/status snapshot, including queue depth.
+ */
+export function getWorkerStatus(timeoutMs = 5000) {
+  return request(String(nextId++), { cmd: "status" }, ["status"], timeoutMs);
+}
+
+export { startWorker };
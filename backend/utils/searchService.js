@@ -0,0 +1,39 @@
+import { startPythonService } from "./pythonService.js";
+
+/* ===============================
+   PYTHON SEARCH SERVICE
+   =============================== */
+// `python -m src.search.server` answers search queries over HTTP on
+// localhost; Express routes proxy to it.
+const SEARCH_PORT = process.env.SEARCH_PORT || 5001;
+export const SEARCH_URL =
+  process.env.SEARCH_URL || `http://127.0.0.1:${SEARCH_PORT}`;
+
+export function startSearchService() {
+  // An externally managed service was configured
+  if (process.env.SEARCH_URL) return null;
+  return startPythonService("search", "src.search.server", SEARCH_PORT);
+}
+
+/**
+ * GET a search endpoint of the Python service with query params.
+ * Resolves with the parsed JSON body, rejects with the service's error.
+ */
+export async function querySearchService(pathName, params, timeoutMs = 10000) {
+  const url = new URL(pathName, SEARCH_URL);
+  for (const [key, value] of Object.entries(params)) {
+    if (value !== undefined && value !== null && value !== "") {
+      url.searchParams.set(key, value);
+    }
+  }
+
+  const response = await fetch(url, { signal: AbortSignal.timeout(timeoutMs) });
+  const body = await response.json();
+
+  if (!response.ok) {
+    const err = new Error(body.error || `Search service returned ${response.status}`);
+    err.status = response.status;
+    throw err;
+  }
+  return body;
+}
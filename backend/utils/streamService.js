@@ -0,0 +1,49 @@
+import { Readable } from "stream";
+import { startPythonService } from "./pythonService.js";
+
+/* ===============================
+   PYTHON STREAMING TRANSCRIPTION
+   =============================== */
+// `python -m src.transcription.stream_server` recognizes audio as it is
+// received and answers with NDJSON partial/final results.
+const STREAM_PORT = process.env.STREAM_PORT || 5002;
+export const STREAM_URL =
+  process.env.STREAM_URL || `http://127.0.0.1:${STREAM_PORT}`;
+
+export function startStreamService() {
+  // An externally managed service was configured
+  if (process.env.STREAM_URL) return null;
+  return startPythonService("stream", "src.transcription.stream_server", STREAM_PORT);
+}
+
+/**
+ * Forward an incoming audio stream to the Python service and pipe its NDJSON
+ * events back as they are produced. Neither side is buffered, so partial
+ * results reach the client while it is still sending audio.
+ */
+export async function proxyTranscriptionStream(req, res, params) {
+  const url = new URL("/transcribe/stream", STREAM_URL);
+  for (const [key, value] of Object.entries(params)) {
+    if (value !== undefined && value !== null && value !== "") {
+      url.searchParams.set(key, value);
+    }
+  }
+
+  const controller = new AbortController();
+  res.on("close", () => controller.abort());
+
+  const response = await fetch(url, {
+    method: "POST",
+    body: req,
+    duplex: "half",
+    headers: { "Content-Type": "application/octet-stream" },
+    signal: controller.signal
+  });
+
+  res.status(response.status);
+  res.setHeader("Content-Type", response.headers.get("content-type") || "application/json");
+  res.setHeader("Cache-Control", "no-cache");
+  res.flushHeaders();
+
+  Readable.fromWeb(response.body).pipe(res);
+}
@@ -0,0 +1,356 @@
+"""
+Real-time factor, throughput, peak memory and model-load time of every
+pipeline stage, on synthetic episodes of controlled length.
+
+For every --durations length a deterministic episode (benchmarks.synthetic:
+speech-like WAV plus its script) is generated in a scratch directory and
+taken through preprocessing, transcription, segmentation and enrichment.
+Each stage runs in a fresh interpreter, so its peak RSS is its own, and
+loads its models before the timed part:
+
+    seconds       the stage's work, models already loaded, caches off
+    rtf           seconds / audio seconds (below 1 is faster than real time)
+    throughput    audio seconds processed per wall second
+    model_load    seconds spent loading models, per model
+
+--stub swaps every model for an offline stand-in (benchmarks.stub_models),
+which leaves the orchestration overhead: decoding, I/O, batching, alignment
+and JSON. When transcription fails (no ffmpeg or Vosk model), the later
+stages run on the synthetic transcript instead.
+
+Reports carry the commit, seed and parameters and are written to
+data/benchmarks/pipeline_<commit>_<mode>.json, so runs on two commits can
+be compared:
+
+    python -m benchmarks.bench_pipeline --stub --durations 60 600 3600
+    python -m benchmarks.bench_pipeline --stub --compare data/benchmarks/pipeline_<old>_stub.json
+    python -m benchmarks.bench_pipeline --compare old.json new.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+STAGES = ["preprocessing", "transcription", "segmentation", "enrichment"]
+DURATIONS = [60, 600]
+RESULTS_DIR = "data/benchmarks"
+
+# Tail of a failed stage's stderr kept in the report
+ERROR_LINES = 5
+
+
+def raw_path(name):
+    return os.path.join("data", "raw", f"{name}.wav")
+
+
+def processed_path(name):
+    return os.path.join("data", "processed", f"{name}_cleaned.wav")
+
+
+def transcript_path(name):
+    return os.path.join("data", "transcripts", f"{name}.json")
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+# Stage runners: executed inside the stage's own interpreter, with the
+# episode directory as working directory. Each returns the timed seconds
+# and the model load times.
+
+def run_preprocessing(name, model_path):
+    from src.preprocessing.audio_preprocessor import preprocess_audio
+
+    return {"seconds": _timed(preprocess_audio, raw_path(name), processed_path(name)), "models": {}}
+
+
+def run_transcription(name, model_path):
+    from src.transcription import vosk_transcriber
+
+    model_path = model_path or str(REPO_ROOT / vosk_transcriber.MODEL_PATH)
+    load = _timed(vosk_transcriber.get_model, model_path)
+
+    audio = processed_path(name) if os.path.isfile(processed_path(name)) else raw_path(name)
+    seconds = _timed(vosk_transcriber.transcribe_audio, audio, transcript_path(name),
+                     model_path=model_path, use_cache=False)
+    return {"seconds": seconds, "models": {"vosk": round(load, 3)}, "input": audio}
+
+
+def run_segmentation(name, model_path):
+    from src.segmentation import batch_segmenter
+    from src.utils import model_registry
+
+    model_registry.preload(["minilm"])
+    seconds = _timed(batch_segmenter.segment_single_file, transcript_path(name), use_cache=False)
+    return {"seconds": seconds, "models": model_registry.stats()["loaded"]}
+
+
+def run_enrichment(name, model_path):
+    from src.segmentation import batch_keyword_summarizer, summarizer
+    from src.utils import model_registry
+
+    model_registry.preload([name for name in ("minilm", "keybert", summarizer.backend_model()) if name])
+    seconds = _timed(batch_keyword_summarizer.process_single_file, f"{name}.json", use_cache=False)
+    return {"seconds": seconds, "models": model_registry.stats()["loaded"]}
+
+
+RUNNERS = {
+    "preprocessing": run_preprocessing,
+    "transcription": run_transcription,
+    "segmentation": run_segmentation,
+    "enrichment": run_enrichment,
+}
+
+
+def child_main(args):
+    if args.stub:
+        from benchmarks import stub_models
+        stub_models.install(args.seed)
+
+    result = RUNNERS[args.child](args.name, args.model_path)
+    with open(f"{args.child}.result.json", "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+def run_stage(stage, name, workdir, args):
+    """Runs one stage in a fresh interpreter and returns its measurements."""
+    command = [sys.executable, "-m", "benchmarks.bench_pipeline", "--child", stage,
+               "--name", name, "--seed", str(args.seed)]
+    if args.stub:
+        # The stub Vosk model only needs a path that exists
+        command += ["--stub", "--model-path", "."]
+    elif args.model_path:
+        command += ["--model-path", os.path.abspath(args.model_path)]
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+
+    result_path = os.path.join(workdir, f"{stage}.result.json")
+    if os.path.isfile(result_path):
+        os.remove(result_path)
+
+    stderr_path = os.path.join(workdir, f"{stage}.stderr")
+    start = time.perf_counter()
+    # stderr goes to a file: a chatty stage could fill a pipe nobody reads until it exits
+    with open(stderr_path, "wb") as stderr:
+        proc = subprocess.Popen(command, cwd=workdir, env=env, stderr=stderr,
+                                stdout=None if args.verbose else subprocess.DEVNULL)
+        _, status, usage = os.wait4(proc.pid, 0)
+    process_seconds = time.perf_counter() - start
+
+    if os.waitstatus_to_exitcode(status) != 0 or not os.path.isfile(result_path):
+        with open(stderr_path, "r", encoding="utf-8", errors="replace") as f:
+            tail = f.read().strip().splitlines()[-ERROR_LINES:]
+        return {"error": "\n".join(tail) or f"exit status {os.waitstatus_to_exitcode(status)}"}
+
+    with open(result_path, "r", encoding="utf-8") as f:
+        result = json.load(f)
+    result["process_seconds"] = process_seconds
+    # ru_maxrss is in kilobytes on Linux
+    result["peak_rss_mb"] = usage.ru_maxrss / 1024
+    return result
+
+
+def summarize_runs(stage, runs, audio_seconds):
+    failed = [r for r in runs if "error" in r]
+    if failed:
+        return {"stage": stage, "error": failed[0]["error"]}
+
+    seconds = statistics.median(r["seconds"] for r in runs)
+    models = runs[-1]["models"]
+    summary = {
+        "stage": stage,
+        "seconds": round(seconds, 3),
+        "rtf": round(seconds / audio_seconds, 6),
+        "throughput": round(audio_seconds / seconds, 1) if seconds > 0 else None,
+        "model_load_seconds": round(statistics.median(sum(r["models"].values()) for r in runs), 3),
+        "models": models,
+        "process_seconds": round(statistics.median(r["process_seconds"] for r in runs), 3),
+        "peak_rss_mb": round(max(r["peak_rss_mb"] for r in runs), 1),
+    }
+    if "input" in runs[-1]:
+        summary["input"] = runs[-1]["input"]
+    return summary
+
+
+def bench_episode(duration, args, root):
+    from benchmarks import synthetic
+
+    name = f"synthetic_{duration:g}s_seed{args.seed}"
+    workdir = os.path.join(root, name)
+    for sub in ("raw", "processed", "transcripts", "segments"):
+        Path(workdir, "data", sub).mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    synthetic.write_audio(os.path.join(workdir, raw_path(name)), duration, args.seed)
+    script_path = os.path.join(workdir, "script.json")
+    synthetic.write_transcript(script_path, duration, args.seed, audio_file=raw_path(name))
+    print(f"\nGenerated {duration:g}s episode in {time.perf_counter() - start:.1f}s: {workdir}")
+
+    episode = {"name": name, **synthetic.describe(duration, args.seed), "transcript": "recognized", "stages": []}
+    for stage in args.stages:
+        if stage in ("segmentation", "enrichment") and not os.path.isfile(os.path.join(workdir, transcript_path(name))):
+            from src.transcription import transcript_store
+
+            target = os.path.join(workdir, transcript_path(name))
+            shutil.copyfile(script_path, target)
+            shutil.copyfile(transcript_store.columnar_path(script_path), transcript_store.columnar_path(target))
+            episode["transcript"] = "synthetic"
+
+        print(f"  {stage}...")
+        runs = [run_stage(stage, name, workdir, args) for _ in range(args.repeat)]
+        summary = summarize_runs(stage, runs, duration)
+        if "error" in summary:
+            print(f"  {stage} failed:\n    " + summary["error"].replace("\n", "\n    "), file=sys.stderr)
+        episode["stages"].append(summary)
+
+    ok = [s for s in episode["stages"] if "error" not in s]
+    seconds = sum(s["seconds"] for s in ok)
+    episode["total"] = {
+        "stages": len(ok),
+        "seconds": round(seconds, 3),
+        "rtf": round(seconds / duration, 6),
+        "throughput": round(duration / seconds, 1) if seconds > 0 else None,
+        "model_load_seconds": round(sum(s["model_load_seconds"] for s in ok), 3),
+        "peak_rss_mb": max((s["peak_rss_mb"] for s in ok), default=None),
+    }
+    return episode
+
+
+def git_state():
+    def git(*command):
+        try:
+            return subprocess.run(["git", *command], cwd=REPO_ROOT, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return git("rev-parse", "HEAD"), (bool(status) if status is not None else None)
+
+
+def default_output(report):
+    commit = (report["commit"] or "unknown")[:10] + ("-dirty" if report["dirty"] else "")
+    return os.path.join(RESULTS_DIR, f"pipeline_{commit}_{'stub' if report['stub'] else 'models'}.json")
+
+
+def print_report(report):
+    print(f"\n{'episode':>9} {'stage':14} {'seconds':>9} {'rtf':>9} {'x realtime':>10} "
+          f"{'load s':>7} {'rss MB':>7}")
+    for episode in report["episodes"]:
+        rows = episode["stages"] + [{"stage": "total", **episode["total"]}]
+        for s in rows:
+            label = f"{episode['audio_seconds']:g}s"
+            if "error" in s:
+                print(f"{label:>9} {s['stage']:14} {'failed':>9}")
+                continue
+            print(f"{label:>9} {s['stage']:14} {s['seconds']:>9.3f} {s['rtf']:>9.5f} {str(s['throughput']):>10} "
+                  f"{s['model_load_seconds']:>7.2f} {str(s['peak_rss_mb']):>7}")
+
+
+def compare(base, new):
+    """Prints how every stage's rtf and peak RSS changed from base to new."""
+    for key in ("stub", "seed", "python", "cpu_count"):
+        if base.get(key) != new.get(key):
+            print(f"Warning: {key} differs ({base.get(key)} vs {new.get(key)}), results may not be comparable")
+
+    def rows(report):
+        return {
+            (e["audio_seconds"], s["stage"]): s
+            for e in report["episodes"]
+            for s in e["stages"] + [{"stage": "total", **e["total"]}]
+            if "error" not in s
+        }
+
+    old, current = rows(base), rows(new)
+    print(f"\n{str(base['commit'])[:10]} -> {str(new['commit'])[:10]}")
+    print(f"{'episode':>9} {'stage':14} {'rtf before':>11} {'rtf after':>10} {'change':>8} "
+          f"{'rss before':>11} {'rss after':>10}")
+    for key in sorted(set(old) & set(current), key=lambda k: (k[0], STAGES.index(k[1]) if k[1] in STAGES else 99)):
+        a, b = old[key], current[key]
+        change = f"{(b['rtf'] - a['rtf']) / a['rtf'] * 100:+.1f}%" if a["rtf"] else "n/a"
+        print(f"{key[0]:>8g}s {key[1]:14} {a['rtf']:>11.5f} {b['rtf']:>10.5f} {change:>8} "
+              f"{str(a['peak_rss_mb']):>11} {str(b['peak_rss_mb']):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=DURATIONS,
+                        help="episode lengths in seconds (e.g. 60 600 3600 7200)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--stub", action="store_true", help="replace every model with an offline stand-in")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per stage (median seconds, max RSS)")
+    parser.add_argument("--model-path", help="Vosk model directory (default: the transcriber's MODEL_PATH)")
+    parser.add_argument("--workdir", help="keep the episodes here instead of a temporary directory")
+    parser.add_argument("--verbose", action="store_true", help="show the stages' own output")
+    parser.add_argument("--compare", nargs="+", metavar="REPORT",
+                        help="compare this run with REPORT, or two saved reports without running")
+    parser.add_argument("--output", help="report path (default data/benchmarks/pipeline_<commit>_<mode>.json)")
+    parser.add_argument("--child", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--name", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(args)
+        return
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes one or two reports")
+    if args.compare and len(args.compare) == 2:
+        reports = []
+        for path in args.compare:
+            with open(path, "r", encoding="utf-8") as f:
+                reports.append(json.load(f))
+        compare(*reports)
+        return
+
+    commit, dirty = git_state()
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "stub": args.stub,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "stages": args.stages,
+        "episodes": [],
+    }
+
+    root = args.workdir or tempfile.mkdtemp(prefix="bench_pipeline_")
+    try:
+        for duration in args.durations:
+            report["episodes"].append(bench_episode(duration, args, root))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    print_report(report)
+
+    output = args.output or default_output(report)
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"\nReport saved to {output}")
+
+    if args.compare:
+        with open(args.compare[0], "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Query latency of the lexical (BM25) index over a synthetic corpus of
+--episodes episodes with --segments segments each, written to a temporary
+database/ directory and indexed one episode at a time.
+
+    python -m benchmarks.bench_search --episodes 2000 --segments 100
+"""
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+
+from src.search import lexical_index
+
+QUERIES = ["climate", "mental health", "stock market crash", "football", "the", "quantum biology"]
+
+
+def synthetic_vocabulary(size, seed=0):
+    rng = random.Random(seed)
+    words = {"".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9)))
+             for _ in range(size)}
+    return sorted(words) + ["climate", "mental", "health", "stock", "market", "crash", "football", "the"]
+
+
+def write_corpus(database_dir, episodes, segments, words_per_segment, seed=0):
+    rng = random.Random(seed)
+    vocab = synthetic_vocabulary(20000, seed)
+    # Zipf-like: a few words are very common, most are rare
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    rng.shuffle(weights)
+    cum_weights = []
+    total = 0.0
+    for w in weights:
+        total += w
+        cum_weights.append(total)
+
+    for e in range(episodes):
+        records = []
+        for s in range(segments):
+            words = rng.choices(vocab, cum_weights=cum_weights, k=words_per_segment)
+            records.append({
+                "file": f"ep{e}.json",
+                "segment_id": s + 1,
+                "text": " ".join(words),
+                "summary": " ".join(words[:15]),
+                "keywords": words[:5],
+                "start_time": s * 30.0,
+                "end_time": s * 30.0 + 30.0,
+            })
+        with open(os.path.join(database_dir, f"ep{e}.json"), "w", encoding="utf-8") as f:
+            json.dump(records, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--episodes", type=int, default=2000)
+    parser.add_argument("--segments", type=int, default=100)
+    parser.add_argument("--words", type=int, default=80, help="words per segment")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    lexical_index.DATABASE_DIR = os.path.join(root, "database")
+    lexical_index.INDEX_DIR = os.path.join(root, "index")
+    lexical_index.SEGMENT_DIR = os.path.join(root, "segments")
+    os.makedirs(lexical_index.DATABASE_DIR)
+
+    try:
+        write_corpus(lexical_index.DATABASE_DIR, args.episodes, args.segments, args.words)
+
+        start = time.perf_counter()
+        lexical_index.update_index()
+        build_seconds = time.perf_counter() - start
+
+        index_bytes = sum(
+            os.path.getsize(os.path.join(lexical_index.INDEX_DIR, name))
+            for name in os.listdir(lexical_index.INDEX_DIR)
+        )
+
+        start = time.perf_counter()
+        index = lexical_index.load_index()
+        load_seconds = time.perf_counter() - start
+
+        results = []
+        for query in QUERIES:
+            for phrase in (False, True):
+                timings = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    hits = lexical_index.search(index, query, phrase=phrase)
+                    timings.append(time.perf_counter() - start)
+                results.append({
+                    "query": query,
+                    "phrase": phrase,
+                    "hits": len(hits),
+                    "median_ms": round(statistics.median(timings) * 1000, 2)
+                })
+    finally:
+        shutil.rmtree(root)
+
+    print(f"\n{args.episodes} episodes x {args.segments} segments: built in {build_seconds:.1f}s, "
+          f"loaded in {load_seconds:.2f}s, {index_bytes / 1e6:.1f} MB on disk")
+    print(f"\n{'query':22} {'phrase':>6} {'hits':>5} {'ms':>8}")
+    for r in results:
+        print(f"{r['query']:22} {str(r['phrase']):>6} {r['hits']:>5} {r['median_ms']:>8}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "episodes": args.episodes,
+                "segments": args.segments,
+                "build_seconds": round(build_seconds, 2),
+                "load_seconds": round(load_seconds, 2),
+                "index_bytes": index_bytes,
+                "queries": results
+            }, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Boundary detection speed on long transcripts: the original per-pair cosine
+loop against the vectorized threshold and depth methods in bert_segmentation.
+
+Embeddings are synthetic (topics of random length around random centres),
+so no model is needed unless --encode is given, which also times
+model.encode at several batch sizes on generated sentences.
+
+    python -m benchmarks.bench_segmentation --sentences 10000 20000
+    python -m benchmarks.bench_segmentation --encode 2000 --batch-sizes 16 64 256
+"""
+import json
+import time
+import argparse
+
+import numpy as np
+
+DIM = 384  # all-MiniLM-L6-v2
+
+
+def synthetic_embeddings(n, dim=DIM, noise=0.6, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    while len(rows) < n:
+        centre = rng.normal(size=dim)
+        for _ in range(int(rng.integers(5, 40))):
+            rows.append(centre + noise * rng.normal(size=dim))
+    return np.array(rows[:n], dtype=np.float32)
+
+
+def legacy_boundaries(embeddings, threshold):
+    """The loop bert_topic_segments used before: one sklearn call per pair."""
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    boundaries = []
+    for i in range(1, len(embeddings)):
+        sim = cosine_similarity([embeddings[i]], [embeddings[i - 1]])[0][0]
+        if sim < threshold:
+            boundaries.append(i)
+    return boundaries
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def bench_boundaries(n, threshold, window):
+    from src.segmentation.bert_segmentation import segment_boundaries
+
+    embeddings = synthetic_embeddings(n)
+
+    legacy, legacy_seconds = timed(legacy_boundaries, embeddings, threshold)
+    vectorized, vectorized_seconds = timed(segment_boundaries, embeddings, threshold=threshold)
+    depth, depth_seconds = timed(
+        segment_boundaries, embeddings, method="depth", window=window, min_sentences=3
+    )
+
+    return {
+        "sentences": n,
+        "legacy_seconds": round(legacy_seconds, 4),
+        "threshold_seconds": round(vectorized_seconds, 4),
+        "depth_seconds": round(depth_seconds, 4),
+        "speedup": round(legacy_seconds / vectorized_seconds, 1),
+        "same_boundaries": legacy == vectorized,
+        "threshold_boundaries": len(vectorized),
+        "depth_boundaries": len(depth)
+    }
+
+
+def bench_encode(n, batch_sizes):
+    from src.segmentation.bert_segmentation import get_model
+
+    model = get_model()
+
+    rng = np.random.default_rng(0)
+    vocab = ["podcast", "guest", "episode", "market", "health", "music", "story",
+             "science", "money", "travel", "history", "game", "food", "season"]
+    sentences = [
+        " ".join(rng.choice(vocab, size=int(rng.integers(8, 25)))) + "."
+        for _ in range(n)
+    ]
+
+    model.encode(sentences[:32])  # warm-up
+
+    results = []
+    for batch_size in batch_sizes:
+        _, seconds = timed(model.encode, sentences, batch_size=batch_size)
+        results.append({
+            "batch_size": batch_size,
+            "seconds": round(seconds, 3),
+            "sentences_per_second": round(n / seconds, 1)
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, nargs="+", default=[10000, 20000])
+    parser.add_argument("--threshold", type=float, default=0.55)
+    parser.add_argument("--window", type=int, default=3)
+    parser.add_argument("--encode", type=int, default=0, help="also time encoding this many sentences")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    results = {"boundaries": [bench_boundaries(n, args.threshold, args.window) for n in args.sentences]}
+
+    print(f"\n{'sentences':>9} {'legacy s':>9} {'vector s':>9} {'depth s':>9} {'speedup':>8} {'same':>5}")
+    for r in results["boundaries"]:
+        print(
+            f"{r['sentences']:>9} {r['legacy_seconds']:>9} {r['threshold_seconds']:>9} "
+            f"{r['depth_seconds']:>9} {r['speedup']:>7}x {str(r['same_boundaries']):>5}"
+        )
+
+    if args.encode:
+        results["encode"] = bench_encode(args.encode, args.batch_sizes)
+        print(f"\n{'batch':>5} {'seconds':>9} {'sent/s':>9}")
+        for r in results["encode"]:
+            print(f"{r['batch_size']:>5} {r['seconds']:>9} {r['sentences_per_second']:>9}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Cold-start time and peak memory of each pipeline stage module.
+
+Every measurement runs in a fresh interpreter, the way `python -m <stage>`
+starts: "import" only imports the module, "load" also loads every model it
+registered (first-use cost). Reported numbers are the median wall time and
+the largest peak RSS over --repeat runs.
+
+    python -m benchmarks.bench_startup --repeat 3 --output startup.json
+    python -m benchmarks.bench_startup --stages src.segmentation.batch_segmenter --load
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+STAGES = [
+    "src.preprocessing.batch_processor",
+    "src.transcription.batch_transcriber",
+    "src.segmentation.batch_segmenter",
+    "src.segmentation.batch_keyword_summarizer",
+    "src.pipeline.worker",
+]
+
+LOAD_SNIPPET = "from src.utils import model_registry; model_registry.preload()"
+
+
+def run_once(module, load):
+    code = f"import {module}"
+    if load:
+        code += f"; {LOAD_SNIPPET}"
+
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", code],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE
+    )
+    _, status, usage = os.wait4(proc.pid, 0)
+    seconds = time.perf_counter() - start
+    stderr = proc.stderr.read().decode("utf-8", errors="replace")
+    proc.stderr.close()
+
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"{module} failed to start:\n{stderr.strip()}")
+
+    # ru_maxrss is in kilobytes on Linux
+    return seconds, usage.ru_maxrss / 1024
+
+
+def bench_stage(module, load, repeat):
+    runs = [run_once(module, load) for _ in range(repeat)]
+    return {
+        "stage": module,
+        "mode": "load" if load else "import",
+        "seconds": round(statistics.median(r[0] for r in runs), 3),
+        "peak_rss_mb": round(max(r[1] for r in runs), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", default=STAGES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--load", action="store_true", help="also measure loading the registered models")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    modes = [False, True] if args.load else [False]
+
+    results = []
+    for module in args.stages:
+        for load in modes:
+            try:
+                results.append(bench_stage(module, load, args.repeat))
+            except RuntimeError as e:
+                print(e, file=sys.stderr)
+                results.append({"stage": module, "mode": "load" if load else "import", "error": str(e)})
+
+    print(f"\n{'stage':45} {'mode':6} {'seconds':>8} {'rss MB':>8}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['stage']:45} {r['mode']:6} {'failed':>8}")
+        else:
+            print(f"{r['stage']:45} {r['mode']:6} {r['seconds']:>8} {r['peak_rss_mb']:>8}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+End-to-end latency of the streaming transcription service, per chunk.
+
+Streams a 16 kHz mono 16-bit WAV (or raw s16le .pcm) file to
+/transcribe/stream in READ_SIZE chunks, optionally paced like a live feed,
+and reads the NDJSON events while still sending. Every event names the
+chunk that produced it, so its end-to-end latency is the time from sending
+that chunk to receiving the event. Start the service first:
+
+    python -m src.transcription.stream_server --preload
+    python -m benchmarks.bench_streaming --audio talk.wav --realtime
+"""
+import json
+import time
+import wave
+import socket
+import argparse
+import threading
+import statistics
+from urllib.parse import urlparse
+
+SAMPLE_RATE = 16000
+READ_SIZE = 8000
+
+
+def read_pcm(path):
+    if path.endswith(".wav"):
+        with wave.open(path, "rb") as w:
+            if (w.getframerate(), w.getnchannels(), w.getsampwidth()) != (SAMPLE_RATE, 1, 2):
+                raise ValueError(f"{path} must be 16 kHz mono 16-bit PCM")
+            return w.readframes(w.getnframes())
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def send_chunks(sock, chunks, sent_at, realtime):
+    start = time.perf_counter()
+    audio_seconds = 0.0
+    for i, data in enumerate(chunks, start=1):
+        if realtime:
+            # Chunk i is only "recorded" once its audio has played
+            audio_seconds += len(data) / (2 * SAMPLE_RATE)
+            delay = start + audio_seconds - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        sent_at[i] = time.perf_counter()
+        sock.sendall(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+    sock.sendall(b"0\r\n\r\n")
+
+
+def read_events(rfile):
+    """Yields (received_at, event) from a chunked NDJSON response."""
+    status = rfile.readline().decode("latin-1").strip()
+    if status.split()[1:2] != ["200"]:
+        raise RuntimeError(f"Service answered {status}")
+    while rfile.readline() not in (b"\r\n", b""):
+        pass
+
+    pending = b""
+    while True:
+        size = int(rfile.readline().split(b";")[0], 16)
+        if size == 0:
+            break
+        pending += rfile.read(size)
+        rfile.readline()
+        *lines, pending = pending.split(b"\n")
+        received_at = time.perf_counter()
+        for line in lines:
+            if line.strip():
+                yield received_at, json.loads(line)
+
+
+def summarize(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "p50_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "max_ms": round(ordered[-1], 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", required=True, help="16 kHz mono WAV or raw s16le PCM")
+    parser.add_argument("--url", default="http://127.0.0.1:5002/transcribe/stream")
+    parser.add_argument("--realtime", action="store_true", help="send audio no faster than it plays")
+    parser.add_argument("--no-partials", action="store_true")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    pcm = read_pcm(args.audio)
+    chunks = [pcm[i:i + READ_SIZE] for i in range(0, len(pcm), READ_SIZE)]
+
+    url = urlparse(args.url)
+    path = url.path + ("?partials=0" if args.no_partials else "")
+    sock = socket.create_connection((url.hostname, url.port or 80))
+    sock.sendall(
+        f"POST {path} HTTP/1.1\r\nHost: {url.netloc}\r\n"
+        "Content-Type: application/octet-stream\r\nTransfer-Encoding: chunked\r\n\r\n".encode("ascii")
+    )
+
+    sent_at = {}
+    sender = threading.Thread(target=send_chunks, args=(sock, chunks, sent_at, args.realtime))
+    start = time.perf_counter()
+    sender.start()
+
+    end_to_end = {"partial": [], "final": []}
+    server = {"partial": [], "final": []}
+    first_result = None
+    words = 0
+
+    with sock.makefile("rb") as rfile:
+        for received_at, event in read_events(rfile):
+            if event["type"] == "error":
+                raise RuntimeError(event["error"])
+            if first_result is None and event["text"]:
+                first_result = received_at - start
+            end_to_end[event["type"]].append((received_at - sent_at[event["chunk"]]) * 1000)
+            server[event["type"]].append(event["latency_ms"])
+            words += len(event.get("words", []))
+
+    sender.join()
+    sock.close()
+    total = time.perf_counter() - start
+    audio_seconds = len(pcm) / (2 * SAMPLE_RATE)
+
+    report = {
+        "audio_seconds": round(audio_seconds, 2),
+        "chunks": len(chunks),
+        "realtime": args.realtime,
+        "wall_seconds": round(total, 3),
+        "first_result_seconds": round(first_result, 3) if first_result is not None else None,
+        "words": words,
+        "end_to_end": {kind: summarize(v) for kind, v in end_to_end.items()},
+        "server": {kind: summarize(v) for kind, v in server.items()}
+    }
+
+    print(f"\n{audio_seconds:.1f}s of audio in {len(chunks)} chunks, {total:.2f}s wall, {words} words")
+    print(f"\n{'event':8} {'where':11} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for kind in ("partial", "final"):
+        for where in ("end_to_end", "server"):
+            s = report[where][kind]
+            if s:
+                print(f"{kind:8} {where:11} {s['count']:>6} {s['p50_ms']:>8} {s['p95_ms']:>8} {s['max_ms']:>8}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Segments/second of per-call summarize_segment against batched
+summarize_segments, over the stored segments in database/.
+
+    python -m benchmarks.bench_summarization --limit 64 --batch-sizes 4 8 16
+"""
+import os
+import json
+import time
+import argparse
+
+DATABASE_DIR = "database"
+
+
+def load_texts(limit):
+    texts = []
+    for name in sorted(os.listdir(DATABASE_DIR)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(DATABASE_DIR, name), "r", encoding="utf-8") as f:
+            texts.extend(record["text"] for record in json.load(f))
+        if len(texts) >= limit:
+            break
+    return texts[:limit]
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=64, help="segments to summarize")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    texts = load_texts(args.limit)
+    print(f"Loading summarizer and benchmarking {len(texts)} segments...")
+
+    from src.segmentation.summarizer import summarize_segment, summarize_segments
+
+    # Warm-up so the first timed call does not include lazy initialisation
+    summarize_segment(texts[0])
+
+    per_call, seconds = timed(lambda: [summarize_segment(t) for t in texts])
+    results = [{
+        "mode": "per-call",
+        "batch_size": 1,
+        "seconds": round(seconds, 3),
+        "segments_per_second": round(len(texts) / seconds, 2)
+    }]
+
+    for batch_size in args.batch_sizes:
+        batched, seconds = timed(summarize_segments, texts, batch_size=batch_size)
+        matches = sum(a == b for a, b in zip(per_call, batched))
+        results.append({
+            "mode": "batched",
+            "batch_size": batch_size,
+            "seconds": round(seconds, 3),
+            "segments_per_second": round(len(texts) / seconds, 2),
+            "same_as_per_call": matches
+        })
+
+    baseline = results[0]["segments_per_second"]
+    print(f"\n{'mode':10} {'batch':>5} {'seconds':>9} {'seg/s':>8} {'speedup':>8}")
+    for r in results:
+        print(
+            f"{r['mode']:10} {r['batch_size']:>5} {r['seconds']:>9} "
+            f"{r['segments_per_second']:>8} {r['segments_per_second'] / baseline:>7.2f}x"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"segments": len(texts), "results": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Latency and quality of the summarization backends (bart, bart-int8,
+extractive) over the stored segments in database/.
+
+Quality is measured two ways:
+
+    rouge1/2/L  F1 against the summary stored with the segment, which the
+                full-precision BART pipeline wrote: how close a backend
+                stays to what is deployed today (bart itself scores ~1.0
+                unless the model or its settings changed)
+    semantic    mean MiniLM cosine between each summary and its segment,
+                which needs no reference and does not favour BART's wording
+
+compression is summary words / segment words. The extractive backend reads
+the segmentation sidecars in data/segments/ when they are there
+(--no-sidecars encodes instead, as a cold episode would).
+
+    python -m benchmarks.bench_summarization_backends --limit 200
+    python -m benchmarks.bench_summarization_backends --backends bart-int8 extractive --output results.json
+"""
+import os
+import re
+import json
+import time
+import argparse
+from collections import Counter
+
+DATABASE_DIR = "database"
+SEGMENT_DIR = "data/segments"
+
+
+def load_records(limit):
+    """Stored segments as (segment file name, index in file, record)."""
+    records = []
+    for name in sorted(os.listdir(DATABASE_DIR)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(DATABASE_DIR, name), "r", encoding="utf-8") as f:
+            records.extend((name, i, record) for i, record in enumerate(json.load(f)))
+        if len(records) >= limit:
+            break
+    return records[:limit]
+
+
+def sidecar_vectors(records):
+    """Each record's sentence embeddings from segmentation, or None."""
+    from src.segmentation import embedding_store
+
+    stores = {}
+    vectors = []
+    for name, i, _ in records:
+        file_id = os.path.splitext(name)[0]
+        if file_id not in stores:
+            stores[file_id] = (embedding_store.load_embeddings(SEGMENT_DIR, file_id)
+                               if embedding_store.has_embeddings(SEGMENT_DIR, file_id) else None)
+        store = stores[file_id]
+        if store is not None and i < len(store["offsets"]) - 1:
+            vectors.append(embedding_store.segment_sentence_vectors(store, i))
+        else:
+            vectors.append(None)
+    return vectors
+
+
+def tokens(text):
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+def _f1(overlap, candidate, reference):
+    if not overlap:
+        return 0.0
+    precision = overlap / candidate
+    recall = overlap / reference
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(candidate, reference, n):
+    cand = Counter(tuple(candidate[i:i + n]) for i in range(len(candidate) - n + 1))
+    ref = Counter(tuple(reference[i:i + n]) for i in range(len(reference) - n + 1))
+    return _f1(sum((cand & ref).values()), sum(cand.values()), sum(ref.values()))
+
+
+def rouge_l(candidate, reference):
+    # Longest common subsequence, one row at a time
+    previous = [0] * (len(reference) + 1)
+    for word in candidate:
+        current = [0]
+        for j, ref_word in enumerate(reference):
+            current.append(previous[j] + 1 if word == ref_word else max(previous[j + 1], current[j]))
+        previous = current
+    return _f1(previous[-1], len(candidate), len(reference))
+
+
+def quality(summaries, texts, references):
+    scores = {"rouge1": [], "rouge2": [], "rougeL": [], "compression": []}
+    for summary, text, reference in zip(summaries, texts, references):
+        cand, ref = tokens(summary), tokens(reference)
+        scores["rouge1"].append(rouge_n(cand, ref, 1))
+        scores["rouge2"].append(rouge_n(cand, ref, 2))
+        scores["rougeL"].append(rouge_l(cand, ref))
+        scores["compression"].append(len(summary.split()) / max(len(text.split()), 1))
+    return {name: round(sum(values) / len(values), 4) for name, values in scores.items()}
+
+
+def semantic_similarity(summaries, text_embeddings):
+    from src.segmentation.bert_segmentation import get_model, normalize_rows
+
+    summary_embeddings = normalize_rows(get_model().encode(summaries))
+    return round(float((summary_embeddings * text_embeddings).sum(axis=1).mean()), 4)
+
+
+def run_backend(backend, texts, vectors, batch_size):
+    from src.segmentation import summarizer
+    from src.utils import model_registry
+
+    name = summarizer.backend_model(backend) or "minilm"
+    start = time.perf_counter()
+    model_registry.get(name)
+    load_seconds = time.perf_counter() - start
+
+    # Warm-up so the timed run does not include lazy initialisation
+    summarizer.summarize_segments(texts[:1], batch_size=batch_size, backend=backend, sentence_vectors=vectors[:1])
+
+    start = time.perf_counter()
+    summaries = summarizer.summarize_segments(texts, batch_size=batch_size, backend=backend, sentence_vectors=vectors)
+    seconds = time.perf_counter() - start
+
+    if name != "minilm":
+        # One BART at a time
+        model_registry.unload(name)
+
+    return summaries, {
+        "backend": backend,
+        "model": summarizer.model_id(backend),
+        "model_load_seconds": round(load_seconds, 3),
+        "seconds": round(seconds, 3),
+        "segments_per_second": round(len(texts) / seconds, 2),
+        "ms_per_segment": round(1000 * seconds / len(texts), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["bart", "bart-int8", "extractive"])
+    parser.add_argument("--limit", type=int, default=200, help="segments to summarize")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--no-sidecars", action="store_true", help="extractive encodes every segment itself")
+    parser.add_argument("--output", help="write the results (and every summary) as JSON to this path")
+    args = parser.parse_args()
+
+    records = load_records(args.limit)
+    if not records:
+        parser.error(f"No stored segments in {DATABASE_DIR}/")
+    texts = [record["text"] for _, _, record in records]
+    references = [record.get("summary") or record["text"] for _, _, record in records]
+    vectors = [None] * len(records) if args.no_sidecars else sidecar_vectors(records)
+    print(f"Benchmarking {len(args.backends)} backends on {len(texts)} segments "
+          f"({sum(v is not None for v in vectors)} with sidecar embeddings)...")
+
+    from src.segmentation.bert_segmentation import get_model, normalize_rows
+
+    text_embeddings = normalize_rows(get_model().encode(texts))
+
+    results = []
+    outputs = {}
+    for backend in args.backends:
+        print(f"Running {backend}...")
+        summaries, result = run_backend(backend, texts, vectors, args.batch_size)
+        result.update(quality(summaries, texts, references))
+        result["semantic"] = semantic_similarity(summaries, text_embeddings)
+        results.append(result)
+        outputs[backend] = summaries
+
+    baseline = results[0]["segments_per_second"]
+    print(f"\n{'backend':11} {'load s':>7} {'ms/seg':>8} {'speedup':>8} {'rouge1':>7} {'rouge2':>7} "
+          f"{'rougeL':>7} {'semantic':>9} {'compr':>6}")
+    for r in results:
+        print(
+            f"{r['backend']:11} {r['model_load_seconds']:>7} {r['ms_per_segment']:>8} "
+            f"{r['segments_per_second'] / baseline:>7.2f}x {r['rouge1']:>7} {r['rouge2']:>7} "
+            f"{r['rougeL']:>7} {r['semantic']:>9} {r['compression']:>6}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "segments": len(texts),
+                "results": results,
+                "summaries": [
+                    {"file": name, "segment": i, **{backend: outputs[backend][n] for backend in outputs}}
+                    for n, (name, i, _) in enumerate(records)
+                ],
+            }, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
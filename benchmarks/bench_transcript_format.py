@@ -0,0 +1,130 @@
+"""
+Size and read speed of the columnar word transcript against JSON, for a
+synthetic episode of --words Vosk words (about 120 words per minute).
+
+    json (segments)   the current transcript: grouped segments, indent=4
+    json (words)      the same transcript with the per-word list kept
+    columnar          transcript_store's <id>.words
+
+Reads are timed for a full load and for --lookups random 30 s windows.
+
+    python -m benchmarks.bench_transcript_format --words 500000
+"""
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+
+from src.transcription import transcript_store
+from src.transcription.vosk_transcriber import group_words_into_segments
+
+
+def synthetic_words(n, seed=0):
+    rng = random.Random(seed)
+    vocab = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9)))
+             for _ in range(8000)]
+    words = []
+    t = 0.0
+    for _ in range(n):
+        # Occasional pauses start a new transcript segment
+        t += rng.choice([0.05] * 20 + [1.2])
+        length = rng.uniform(0.15, 0.6)
+        words.append({
+            "conf": round(rng.uniform(0.4, 1.0), 6),
+            "end": round(t + length, 6),
+            "start": round(t, 6),
+            "word": rng.choice(vocab)
+        })
+        t += length
+    return words
+
+
+def time_it(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    words = synthetic_words(args.words)
+    segments = group_words_into_segments(words)
+    offsets = [0]
+    for seg in segments:
+        offsets.append(offsets[-1] + len(seg["text"].split()))
+    duration = words[-1]["end"]
+    windows = [(t, t + 30.0) for t in (random.Random(1).uniform(0, duration) for _ in range(args.lookups))]
+
+    root = tempfile.mkdtemp()
+    try:
+        paths = {
+            "json (segments)": os.path.join(root, "segments.json"),
+            "json (words)": os.path.join(root, "words.json"),
+            "columnar": os.path.join(root, "ep.words"),
+        }
+        text = " ".join(w["word"] for w in words)
+        with open(paths["json (segments)"], "w", encoding="utf-8") as f:
+            json.dump({"segments": segments, "text": text}, f, indent=4)
+        with open(paths["json (words)"], "w", encoding="utf-8") as f:
+            json.dump({"segments": segments, "words": words, "text": text}, f, indent=4)
+        transcript_store.write_columnar(paths["columnar"], words, offsets)
+
+        def load_json(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        def json_lookups():
+            data = load_json(paths["json (words)"])
+            for t0, t1 in windows:
+                [w for w in data["words"] if w["end"] > t0 and w["start"] < t1]
+
+        def columnar_lookups():
+            store = transcript_store.load_columnar(paths["columnar"])
+            for t0, t1 in windows:
+                transcript_store.words_between(store, t0, t1)
+
+        results = {
+            "words": args.words,
+            "audio_hours": round(duration / 3600, 2),
+            "bytes": {name: os.path.getsize(path) for name, path in paths.items()},
+            "load_ms": {
+                "json (segments)": time_it(lambda: load_json(paths["json (segments)"]), args.repeat),
+                "json (words)": time_it(lambda: load_json(paths["json (words)"]), args.repeat),
+                "columnar": time_it(lambda: transcript_store.load_columnar(paths["columnar"]), args.repeat),
+            },
+            "lookups": args.lookups,
+            "lookup_total_ms": {
+                "json (words)": time_it(json_lookups, args.repeat),
+                "columnar": time_it(columnar_lookups, args.repeat),
+            },
+        }
+    finally:
+        shutil.rmtree(root)
+
+    print(f"\n{args.words} words ({results['audio_hours']} h of audio)")
+    print(f"\n{'format':18} {'MB':>8} {'load ms':>9}")
+    for name in paths:
+        print(f"{name:18} {results['bytes'][name] / 1e6:>8.2f} {results['load_ms'][name]:>9}")
+    print(f"\nload + {args.lookups} 30s lookups: json (words) {results['lookup_total_ms']['json (words)']} ms, "
+          f"columnar {results['lookup_total_ms']['columnar']} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
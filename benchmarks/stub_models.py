@@ -0,0 +1,165 @@
+"""
+Offline stand-ins for the pipeline's models, for `bench_pipeline --stub`.
+
+They keep the real call signatures and output shapes but do almost no
+work, so a stub run measures everything around the models: decoding,
+file I/O, batching, caching, alignment and JSON. Recognition replays the
+synthetic script for the seed, so the stub transcript is the script.
+
+install() must run before any stage module is imported: it registers the
+stub loaders first (model_registry.register keeps the first loader for a
+name) and puts stub `vosk` and `nltk` modules in sys.modules.
+"""
+import re
+import sys
+import json
+import types
+import zlib
+
+import numpy as np
+
+from benchmarks import synthetic
+from src.utils import model_registry
+
+EMBEDDING_DIM = 384
+# Vosk sends a final result once this much silence follows a word
+ENDPOINT_SECONDS = 0.5
+
+
+class StubVoskModel:
+    def __init__(self, model_path=None):
+        self.model_path = model_path
+
+
+class StubRecognizer:
+    """KaldiRecognizer that hears the synthetic script of SEED."""
+    seed = 0
+
+    def __init__(self, model, sample_rate):
+        self.sample_rate = sample_rate
+        self.received = 0
+        self.script = synthetic.iter_script(self.seed)
+        self.upcoming = next(self.script)
+        self.utterance = []
+
+    def SetWords(self, enabled):
+        pass
+
+    def _heard(self, until):
+        while self.upcoming["end"] <= until:
+            self.utterance.append(self.upcoming)
+            self.upcoming = next(self.script)
+
+    def _result(self):
+        words, self.utterance = self.utterance, []
+        return json.dumps({"result": words, "text": " ".join(w["word"] for w in words)})
+
+    def AcceptWaveform(self, data):
+        self.received += len(data)
+        now = self.received / (2 * self.sample_rate)
+        self._heard(now)
+        if not self.utterance:
+            return False
+        # Endpoint: the utterance is followed by enough silence
+        last = self.utterance[-1]["end"]
+        return self.upcoming["start"] - last > ENDPOINT_SECONDS and now - last > ENDPOINT_SECONDS
+
+    def Result(self):
+        return self._result()
+
+    def PartialResult(self):
+        return json.dumps({"partial": " ".join(w["word"] for w in self.utterance)})
+
+    def FinalResult(self):
+        self._heard(self.received / (2 * self.sample_rate))
+        return self._result()
+
+
+def stub_sent_tokenize(text):
+    """Punkt's contract for the cases the pipeline sees: split after . ! ?"""
+    return [s for s in re.split(r"(?<=[.!?])\s+", text.strip()) if s]
+
+
+class StubEncoder:
+    """
+    Sentence encoder with MiniLM's output shape: a hashed bag of words, so
+    sentences about the same topic are still similar.
+    """
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        if isinstance(sentences, str):
+            return self.encode([sentences])[0]
+        out = np.zeros((len(sentences), EMBEDDING_DIM), dtype=np.float32)
+        for i, sentence in enumerate(sentences):
+            for word in sentence.lower().split():
+                out[i, zlib.crc32(word.encode("utf-8")) % EMBEDDING_DIM] += 1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+
+class StubKeyBERT:
+    """KeyBERT's extract_keywords: candidates ranked by similarity to the document."""
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+
+    def extract_keywords(self, docs, keyphrase_ngram_range=(1, 1), stop_words="english", top_n=5,
+                         vectorizer=None, doc_embeddings=None, word_embeddings=None, **kwargs):
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        single = isinstance(docs, str)
+        docs = [docs] if single else list(docs)
+        if vectorizer is None:
+            vectorizer = CountVectorizer(ngram_range=keyphrase_ngram_range, stop_words=stop_words).fit(docs)
+        candidates = vectorizer.get_feature_names_out()
+        if word_embeddings is None:
+            word_embeddings = self.encoder.encode(list(candidates))
+        if doc_embeddings is None:
+            doc_embeddings = self.encoder.encode(docs)
+
+        counts = vectorizer.transform(docs)
+        keywords = []
+        for i in range(len(docs)):
+            present = counts[i].nonzero()[1]
+            scores = np.asarray(word_embeddings)[present] @ np.asarray(doc_embeddings)[i]
+            best = np.argsort(-scores, kind="stable")[:top_n]
+            keywords.append([(str(candidates[present[j]]), round(float(scores[j]), 4)) for j in best])
+
+        # KeyBERT unwraps the list for a single document
+        return keywords[0] if len(docs) == 1 else keywords
+
+
+class StubSummarizer:
+    """Summarization pipeline that returns the first max_length words."""
+
+    def tokenizer(self, texts):
+        return {"input_ids": [text.split() for text in texts]}
+
+    def __call__(self, texts, max_length=90, min_length=5, do_sample=False, batch_size=None, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        return [{"summary_text": " ".join(text.split()[:max_length])} for text in texts]
+
+
+def install(seed=0):
+    StubRecognizer.seed = seed
+    vosk = types.ModuleType("vosk")
+    vosk.Model = StubVoskModel
+    vosk.KaldiRecognizer = StubRecognizer
+    sys.modules["vosk"] = vosk
+
+    # Punkt is a downloaded model too
+    nltk = types.ModuleType("nltk")
+    nltk.data = types.SimpleNamespace(find=lambda resource: resource)
+    nltk.download = lambda package, quiet=False: True
+    nltk.tokenize = types.ModuleType("nltk.tokenize")
+    nltk.tokenize.sent_tokenize = stub_sent_tokenize
+    sys.modules["nltk"] = nltk
+    sys.modules["nltk.tokenize"] = nltk.tokenize
+
+    encoder = StubEncoder()
+    model_registry.register("minilm", lambda: encoder)
+    model_registry.register("keybert", lambda: StubKeyBERT(encoder))
+    model_registry.register("bart", StubSummarizer)
+    model_registry.register("bart-int8", StubSummarizer)
@@ -0,0 +1,192 @@
+"""
+Deterministic synthetic episodes for the pipeline benchmark.
+
+A script is a seeded stream of Vosk-style words (word/start/end/conf):
+sentences of 6-18 words separated by pauses longer than the transcriber's
+0.8 s segment break, drawn from one topic vocabulary at a time so topic
+segmentation has real boundaries to find. The stream only depends on the
+seed, so a 10-minute script is the first 10 minutes of the 1-hour one.
+
+The audio is rendered from the same script: every word is a voiced tone
+(pitch from the word, four harmonics, ~4 Hz syllable envelope) over a
+low noise floor, written as 16 kHz mono 16-bit WAV in blocks, so hours of
+audio never sit in memory at once.
+"""
+import json
+import wave
+import zlib
+import random
+import argparse
+from itertools import takewhile
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+BLOCK_SECONDS = 30
+
+# Seconds spent on one topic before the speaker moves on
+TOPIC_SECONDS = (90, 240)
+SENTENCE_WORDS = (6, 18)
+# Share of words taken from the topic vocabulary, the rest are fillers
+TOPIC_WORD_SHARE = 0.45
+
+TOPICS = {
+    "health": "sleep exercise doctor diet stress anxiety therapy hospital medicine habits "
+              "running nutrition vitamins recovery patients heart brain mental health routine",
+    "money": "budget savings investing stocks market inflation salary mortgage interest bank "
+             "retirement taxes spending debt credit income portfolio crypto housing rent",
+    "tech": "software startup computer phone internet privacy data algorithm cloud robots "
+            "programming engineers product launch users security network chips screen apps",
+    "sports": "football coach season players league training match goal stadium fans "
+              "championship injury team score defense transfer referee playoffs tennis olympics",
+    "food": "recipe kitchen restaurant chef cooking pasta coffee bread spices dinner "
+            "vegetables market flavor garlic baking wine breakfast dessert noodles cheese",
+    "travel": "flight airport hotel passport beach mountains train museum tourists luggage "
+              "island culture language map road trip city hiking border camping",
+}
+FILLERS = ("the and we you that it is so like really just think know about when "
+           "what there this with people was they have but not all one very").split()
+
+HARMONICS = (1.0, 0.5, 0.3, 0.2)
+NOISE_LEVEL = 0.005
+
+
+def iter_script(seed):
+    """Endless stream of words for seed, in time order."""
+    rng = random.Random(seed)
+    topics = sorted(TOPICS)
+    t = 0.5
+    topic = rng.choice(topics)
+    topic_end = t + rng.uniform(*TOPIC_SECONDS)
+
+    while True:
+        vocab = TOPICS[topic].split()
+        for _ in range(rng.randint(*SENTENCE_WORDS)):
+            word = rng.choice(vocab) if rng.random() < TOPIC_WORD_SHARE else rng.choice(FILLERS)
+            length = (0.12 + 0.05 * len(word)) * rng.uniform(0.8, 1.2)
+            yield {"word": word, "start": round(t, 3), "end": round(t + length, 3),
+                   "conf": round(rng.uniform(0.7, 1.0), 3)}
+            t += length + rng.uniform(0.04, 0.12)
+
+        t += rng.uniform(0.9, 1.5)
+        if t > topic_end:
+            topic = rng.choice([name for name in topics if name != topic])
+            topic_end = t + rng.uniform(*TOPIC_SECONDS)
+
+
+def script(duration, seed):
+    """The words that end within the first `duration` seconds."""
+    return list(takewhile(lambda w: w["end"] <= duration, iter_script(seed)))
+
+
+def sentences(words):
+    """Splits a script at its sentence pauses."""
+    groups = []
+    for i, w in enumerate(words):
+        if i == 0 or w["start"] - words[i - 1]["end"] > 0.8:
+            groups.append([])
+        groups[-1].append(w)
+    return groups
+
+
+def _pitch(word):
+    return 100.0 + zlib.crc32(word.encode("utf-8")) % 120
+
+
+def render_block(words, start, n_samples, seed, block_index):
+    """n_samples of audio from `start` seconds, as float samples in [-1, 1]."""
+    t = start + np.arange(n_samples) / SAMPLE_RATE
+    rng = np.random.default_rng([seed, block_index])
+    signal = rng.normal(0.0, NOISE_LEVEL, n_samples)
+    if not words:
+        return signal
+
+    starts = np.array([w["start"] for w in words])
+    ends = np.array([w["end"] for w in words])
+    pitch = np.array([_pitch(w["word"]) for w in words])
+
+    idx = np.clip(np.searchsorted(starts, t, side="right") - 1, 0, len(words) - 1)
+    local = t - starts[idx]
+    inside = (local >= 0) & (t < ends[idx])
+    span = ends[idx] - starts[idx]
+
+    envelope = np.sin(np.pi * np.clip(local / span, 0.0, 1.0))
+    envelope *= 0.55 + 0.45 * np.abs(np.sin(2 * np.pi * 4.0 * local))
+    phase = 2 * np.pi * pitch[idx] * local
+    voice = sum(a * np.sin(k * phase) for k, a in enumerate(HARMONICS, start=1))
+
+    return signal + np.where(inside, 0.25 * envelope * voice, 0.0)
+
+
+def write_audio(path, duration, seed):
+    words = script(duration, seed)
+    starts = [w["start"] for w in words]
+    total = int(round(duration * SAMPLE_RATE))
+    block = BLOCK_SECONDS * SAMPLE_RATE
+
+    with wave.open(path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(SAMPLE_RATE)
+        for b, offset in enumerate(range(0, total, block)):
+            n = min(block, total - offset)
+            t0, t1 = offset / SAMPLE_RATE, (offset + n) / SAMPLE_RATE
+            # Words overlapping this block (scripts are in time order)
+            lo = max(np.searchsorted(starts, t0, side="right") - 1, 0)
+            hi = np.searchsorted(starts, t1, side="left")
+            samples = render_block(words[lo:hi], t0, n, seed, b)
+            out.writeframes((np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+    return path
+
+
+def write_transcript(path, duration, seed, audio_file=None):
+    """
+    The script as a transcript JSON (one segment per sentence, Vosk's
+    lowercase unpunctuated text) with its columnar word file next to it.
+    """
+    from src.transcription import transcript_store
+
+    words = script(duration, seed)
+    segments = [
+        {"start": s[0]["start"], "end": s[-1]["end"], "text": " ".join(w["word"] for w in s)}
+        for s in sentences(words)
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "audio_file": audio_file,
+            "model": "synthetic",
+            "segments": segments,
+            "text": " ".join(seg["text"] for seg in segments)
+        }, f, indent=4)
+
+    offsets = [0]
+    for seg in segments:
+        offsets.append(offsets[-1] + len(seg["text"].split()))
+    transcript_store.write_columnar(transcript_store.columnar_path(path), words, offsets)
+    return len(words)
+
+
+def describe(duration, seed):
+    words = script(duration, seed)
+    return {
+        "audio_seconds": duration,
+        "words": len(words),
+        "sentences": len(sentences(words)),
+        "words_per_second": round(len(words) / duration, 2) if duration else 0.0,
+        "speech_share": round(sum(w["end"] - w["start"] for w in words) / duration, 3) if duration else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic episode")
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--audio", help="WAV path")
+    parser.add_argument("--transcript", help="transcript JSON path")
+    args = parser.parse_args()
+
+    if args.audio:
+        write_audio(args.audio, args.seconds, args.seed)
+    if args.transcript:
+        write_transcript(args.transcript, args.seconds, args.seed, audio_file=args.audio)
+    print(json.dumps(describe(args.seconds, args.seed), indent=4))
@@ -0,0 +1,287 @@
+"""
+Persistent pipeline job queue.
+
+Jobs live in a SQLite database (DB_PATH) so they survive a crash or
+restart of the worker. Every job records its status, attempt count and
+the state and output of each pipeline stage:
+
+    queued -> running -> completed
+                 \\-> queued again after a failed stage (up to max_attempts,
+                     with exponential backoff), then failed
+
+A retried or recovered job resumes at its first unfinished stage. Jobs
+left "running" by a worker that died are put back in the queue by
+recover() at startup, and enqueue() refuses new jobs with QueueFull once
+MAX_QUEUED are waiting or running.
+
+    python -m src.pipeline.job_queue status
+    python -m src.pipeline.job_queue show <job_id>
+"""
+import json
+import time
+import uuid
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+from contextlib import contextmanager, closing
+
+DB_PATH = "data/jobs/queue.db"
+
+# Jobs waiting or running before enqueue() applies backpressure
+MAX_QUEUED = 20
+MAX_ATTEMPTS = 3
+# Delay before the first retry; doubled for every further attempt
+RETRY_DELAY_SECONDS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    audio_path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    run_after REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, run_after, created_at);
+CREATE TABLE IF NOT EXISTS stages (
+    job_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    state TEXT NOT NULL,
+    output TEXT,
+    seconds REAL,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job_id, stage)
+);
+"""
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+def _connect():
+    """
+    A new connection per call, so any thread may use the queue. WAL lets
+    readers (status polls) run while a worker thread writes.
+    """
+    path = DB_PATH
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    with _init_lock:
+        if path not in _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            _initialized.add(path)
+    return conn
+
+
+@contextmanager
+def _transaction():
+    with closing(_connect()) as conn:
+        # IMMEDIATE takes the write lock up front, so two workers can
+        # never claim the same job
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def _job_dict(conn, row):
+    job = dict(row)
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    stages = conn.execute(
+        "SELECT stage, state, output, seconds, error FROM stages WHERE job_id = ? ORDER BY rowid",
+        (job["id"],)
+    ).fetchall()
+    job["stages"] = [dict(s) for s in stages]
+    # Outputs of finished stages, which a retry does not run again
+    job["outputs"] = {s["stage"]: s["output"] for s in stages if s["state"] == "done"}
+    return job
+
+
+def enqueue(audio_path, job_id=None, max_attempts=None, max_queued=None):
+    """
+    Adds a job and returns it. Submitting an id that is already queued or
+    running returns that job unchanged; a finished id is queued again
+    (a failed job keeps its finished stages, a completed one starts over).
+    Raises QueueFull when max_queued jobs are already waiting or running.
+    """
+    job_id = str(job_id or uuid.uuid4().hex)
+    max_attempts = max_attempts or MAX_ATTEMPTS
+    max_queued = max_queued or MAX_QUEUED
+    now = time.time()
+
+    with _transaction() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is not None and row["status"] in ("queued", "running"):
+            return _job_dict(conn, row)
+
+        active = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+        ).fetchone()[0]
+        if active >= max_queued:
+            raise QueueFull(f"{active} jobs are already queued or running")
+
+        if row is None:
+            conn.execute(
+                "INSERT INTO jobs (id, audio_path, status, max_attempts, created_at, updated_at, run_after) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, audio_path, max_attempts, now, now, now)
+            )
+        else:
+            if row["status"] == "completed" or row["audio_path"] != audio_path:
+                conn.execute("DELETE FROM stages WHERE job_id = ?", (job_id,))
+            conn.execute(
+                "UPDATE jobs SET audio_path = ?, status = 'queued', stage = NULL, attempts = 0, "
+                "max_attempts = ?, error = NULL, result = NULL, updated_at = ?, run_after = ? WHERE id = ?",
+                (audio_path, max_attempts, now, now, job_id)
+            )
+
+        return _job_dict(conn, conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+
+def claim():
+    """Marks the oldest job that is due as running and returns it, or None."""
+    now = time.time()
+    with _transaction() as conn:
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' AND run_after <= ? "
+            "ORDER BY created_at LIMIT 1",
+            (now,)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+            (now, row["id"])
+        )
+        return _job_dict(conn, conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+
+
+def _set_stage(job_id, stage, state, output=None, seconds=None, error=None):
+    now = time.time()
+    with _transaction() as conn:
+        conn.execute(
+            "INSERT INTO stages (job_id, stage, state, output, seconds, error, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (job_id, stage) DO UPDATE SET state = excluded.state, output = excluded.output, "
+            "seconds = excluded.seconds, error = excluded.error, updated_at = excluded.updated_at",
+            (job_id, stage, state, output, seconds, error, now)
+        )
+        conn.execute("UPDATE jobs SET stage = ?, updated_at = ? WHERE id = ?", (stage, now, job_id))
+
+
+def stage_started(job_id, stage):
+    _set_stage(job_id, stage, "running")
+
+
+def stage_done(job_id, stage, output, seconds):
+    _set_stage(job_id, stage, "done", output=output, seconds=seconds)
+
+
+def complete(job_id, result):
+    with _transaction() as conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'completed', error = NULL, result = ?, updated_at = ? WHERE id = ?",
+            (json.dumps(result), time.time(), job_id)
+        )
+
+
+def fail(job_id, stage, error):
+    """
+    Records a failed attempt. Returns the seconds until the job is retried,
+    or None when it has used all its attempts and is now failed.
+    """
+    now = time.time()
+    with _transaction() as conn:
+        row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if stage:
+            conn.execute(
+                "UPDATE stages SET state = 'failed', error = ?, updated_at = ? WHERE job_id = ? AND stage = ?",
+                (error, now, job_id, stage)
+            )
+
+        if row["attempts"] < row["max_attempts"]:
+            delay = RETRY_DELAY_SECONDS * 2 ** (row["attempts"] - 1)
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', error = ?, updated_at = ?, run_after = ? WHERE id = ?",
+                (error, now, now + delay, job_id)
+            )
+            return delay
+
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+            (error, now, job_id)
+        )
+        return None
+
+
+def recover():
+    """
+    Puts jobs left running by a worker that died back in the queue (the
+    interrupted attempt counts). Jobs that have no attempts left are
+    failed. Returns (requeued_ids, failed_ids).
+    """
+    now = time.time()
+    with _transaction() as conn:
+        rows = conn.execute(
+            "SELECT id, attempts, max_attempts FROM jobs WHERE status = 'running'"
+        ).fetchall()
+        requeued, failed = [], []
+        for row in rows:
+            if row["attempts"] < row["max_attempts"]:
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', updated_at = ?, run_after = ? WHERE id = ?",
+                    (now, now, row["id"])
+                )
+                requeued.append(row["id"])
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Interrupted', updated_at = ? WHERE id = ?",
+                    (now, row["id"])
+                )
+                failed.append(row["id"])
+        conn.execute("UPDATE stages SET state = 'interrupted', updated_at = ? WHERE state = 'running'", (now,))
+    return requeued, failed
+
+
+def get_job(job_id):
+    with closing(_connect()) as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (str(job_id),)).fetchone()
+        return _job_dict(conn, row) if row is not None else None
+
+
+def depth():
+    """Number of jobs in each status."""
+    with closing(_connect()) as conn:
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+    return {status: counts.get(status, 0) for status in ("queued", "running", "completed", "failed")}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the pipeline job queue")
+    parser.add_argument("command", choices=["status", "show"])
+    parser.add_argument("job_id", nargs="?")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        print(json.dumps(depth(), indent=4))
+    else:
+        job = get_job(args.job_id)
+        if job is None:
+            raise SystemExit(f"No job {args.job_id}")
+        print(json.dumps(job, indent=4))
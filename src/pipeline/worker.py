@@ -0,0 +1,298 @@
+"""
+Long-lived pipeline worker.
+
+Loads the Vosk, MiniLM, KeyBERT and BART models once and then runs
+transcription -> segmentation -> keywords/summary jobs sent to it as
+JSON lines on stdin. Every reply and progress event is written as one
+JSON line on stdout, tagged with the id of the request it belongs to.
+
+Jobs are kept in the persistent job_queue and run by a pool of WORKERS
+threads sharing the loaded models. A process request's id is its job id;
+progress, retry and result events for the job carry that id, including
+jobs recovered after a restart.
+
+Requests:
+    {"id": "1", "cmd": "status"}
+    {"id": "2", "cmd": "process", "audio_path": "backend/uploads/123.mp3"}
+    {"id": "3", "cmd": "job", "job_id": "2"}
+    {"id": "4", "cmd": "shutdown"}
+"""
+import os
+import sys
+import json
+import time
+import threading
+import traceback
+
+from src.pipeline import job_queue
+from src.utils import stage_cache
+from src.utils import model_registry
+from src.utils import instrumentation
+
+STAGES = ["transcription", "segmentation", "enrichment"]
+
+# Protocol channel. Stage modules print progress with print(), so once the
+# worker starts sys.stdout is pointed at stderr and only events go here.
+_out = sys.stdout
+_out_lock = threading.Lock()
+
+# Jobs run at the same time. They share one copy of the models, so memory
+# does not grow with the pool. A shared model is not thread-safe, so every
+# call into it holds model_registry.lock(name): two jobs never run the same
+# model at once. Extra workers overlap transcription (each job has its own
+# recognizer), file I/O and stages on different models, nothing more.
+WORKERS = int(os.environ.get("PIPELINE_WORKERS", 1))
+# How often idle workers look for jobs whose retry delay has passed
+POLL_SECONDS = 1.0
+
+_wake = threading.Event()
+_stop = threading.Event()
+# Guards the job counters and the running map, shared by the job threads and status()
+_counter_lock = threading.Lock()
+
+_state = {
+    "started_at": time.time(),
+    "ready": False,
+    "load_seconds": None,
+    "draining": False,
+    # job id -> stage it is running
+    "running": {},
+    "jobs_completed": 0,
+    "jobs_failed": 0,
+}
+
+
+def emit(event):
+    line = json.dumps(event)
+    with _out_lock:
+        _out.write(line + "\n")
+        _out.flush()
+
+
+def load_models():
+    """
+    Import every stage module (which registers its models) and load the
+    models up front so the first job does not pay for them.
+    """
+    start = time.time()
+
+    from src.transcription import vosk_transcriber
+    from src.segmentation import batch_segmenter  # noqa: F401  (MiniLM)
+    from src.segmentation import batch_keyword_summarizer  # noqa: F401  (KeyBERT, BART)
+
+    if os.path.exists(vosk_transcriber.MODEL_PATH):
+        vosk_transcriber.get_model()
+    model_registry.preload()
+
+    _state["load_seconds"] = round(time.time() - start, 3)
+    _state["ready"] = True
+
+
+def status():
+    with _counter_lock:
+        running = dict(_state["running"])
+    return {
+        "ready": _state["ready"],
+        "pid": os.getpid(),
+        "uptime": round(time.time() - _state["started_at"], 3),
+        "load_seconds": _state["load_seconds"],
+        "workers": WORKERS,
+        "queue": job_queue.depth(),
+        "running": running,
+        "jobs_completed": _state["jobs_completed"],
+        "jobs_failed": _state["jobs_failed"],
+        "cache": stage_cache.stats(),
+        "models": model_registry.stats(),
+        "metrics": instrumentation.summary(),
+    }
+
+
+def run_stage(job_id, stage, func, *args):
+    with _counter_lock:
+        _state["running"][job_id] = stage
+    job_queue.stage_started(job_id, stage)
+    emit({"id": job_id, "type": "progress", "stage": stage, "state": "started"})
+
+    start = time.time()
+    result = func(*args)
+    seconds = round(time.time() - start, 3)
+
+    job_queue.stage_done(job_id, stage, result, seconds)
+    emit({
+        "id": job_id,
+        "type": "progress",
+        "stage": stage,
+        "state": "done",
+        "seconds": seconds
+    })
+    return result
+
+
+def process_job(job_id, audio_path, outputs=None):
+    """
+    Runs the pipeline for one job. outputs maps stages finished by an
+    earlier attempt to their output path; those stages are skipped while
+    the file is still there.
+    """
+    from src.transcription.batch_transcriber import transcribe_single_audio
+    from src.segmentation.batch_segmenter import segment_single_file
+    from src.segmentation.batch_keyword_summarizer import process_single_file
+
+    outputs = outputs or {}
+
+    def stage(name, func, arg):
+        previous = outputs.get(name)
+        if previous and os.path.isfile(previous):
+            emit({"id": job_id, "type": "progress", "stage": name, "state": "skipped"})
+            return previous
+        return run_stage(job_id, name, func, arg)
+
+    transcript_path = stage("transcription", transcribe_single_audio, audio_path)
+    segment_path = stage("segmentation", segment_single_file, transcript_path)
+    output_path = stage("enrichment", process_single_file, os.path.basename(segment_path))
+
+    return {
+        "transcript": transcript_path,
+        "segments": segment_path,
+        "output": output_path,
+        "file": os.path.basename(output_path)
+    }
+
+
+def run_job(job):
+    job_id = job["id"]
+    with _counter_lock:
+        _state["running"][job_id] = None
+
+    try:
+        with instrumentation.span("job", job_id=job_id, attempt=job["attempts"]):
+            result = process_job(job_id, job["audio_path"], job["outputs"])
+        job_queue.complete(job_id, result)
+        with _counter_lock:
+            _state["jobs_completed"] += 1
+        emit({"id": job_id, "type": "result", "ok": True, **result})
+    except Exception as e:
+        traceback.print_exc()
+        with _counter_lock:
+            stage = _state["running"].get(job_id)
+        retry_in = job_queue.fail(job_id, stage, str(e))
+
+        if retry_in is not None:
+            emit({
+                "id": job_id,
+                "type": "retry",
+                "stage": stage,
+                "error": str(e),
+                "attempt": job["attempts"],
+                "retry_in": retry_in
+            })
+        else:
+            with _counter_lock:
+                _state["jobs_failed"] += 1
+            emit({
+                "id": job_id,
+                "type": "result",
+                "ok": False,
+                "stage": stage,
+                "attempts": job["attempts"],
+                "error": str(e)
+            })
+    finally:
+        with _counter_lock:
+            _state["running"].pop(job_id, None)
+
+
+def job_loop():
+    while not _stop.is_set():
+        job = job_queue.claim()
+        if job is not None:
+            run_job(job)
+            continue
+
+        if _state["draining"] and job_queue.depth()["queued"] == 0:
+            break
+        _wake.wait(POLL_SECONDS)
+        _wake.clear()
+
+
+def handle_request(request):
+    cmd = request.get("cmd")
+    req_id = request.get("id")
+
+    if cmd == "status":
+        emit({"id": req_id, "type": "status", **status()})
+    elif cmd == "process":
+        if not request.get("audio_path"):
+            emit({"id": req_id, "type": "result", "ok": False, "error": "Missing audio_path"})
+            return
+        try:
+            job = job_queue.enqueue(request["audio_path"], job_id=req_id)
+        except job_queue.QueueFull as e:
+            # Backpressure: the caller should retry later
+            emit({"id": req_id, "type": "rejected", "error": str(e)})
+            return True
+        _wake.set()
+        emit({"id": req_id, "type": "accepted", "job_id": job["id"], "queue": job_queue.depth()})
+    elif cmd == "job":
+        emit({"id": req_id, "type": "job", "job": job_queue.get_job(request.get("job_id"))})
+    elif cmd == "shutdown":
+        # Finish running jobs; queued ones stay in the queue for next start
+        _stop.set()
+        _wake.set()
+        return False
+    else:
+        emit({"id": req_id, "type": "error", "error": f"Unknown command: {cmd}"})
+
+    return True
+
+
+def start_workers(workers):
+    load_models()
+    emit({"type": "ready", **status()})
+    for _ in range(WORKERS):
+        worker = threading.Thread(target=job_loop, daemon=True)
+        worker.start()
+        workers.append(worker)
+
+
+def main():
+    global _out
+    _out = sys.stdout
+    sys.stdout = sys.stderr
+
+    emit({"type": "starting", "pid": os.getpid()})
+    requeued, failed = job_queue.recover()
+    for job_id in failed:
+        emit({"id": job_id, "type": "result", "ok": False, "error": "Interrupted"})
+    if requeued:
+        print(f"Recovered {len(requeued)} interrupted jobs: {', '.join(requeued)}")
+
+    # Requests are accepted (and jobs queued) while the models load
+    workers = []
+    loader = threading.Thread(target=start_workers, args=(workers,), daemon=True)
+    loader.start()
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError:
+            emit({"type": "error", "error": "Invalid JSON request"})
+            continue
+
+        if handle_request(request) is False:
+            break
+    else:
+        # stdin closed: let queued jobs finish, then exit
+        _state["draining"] = True
+        _wake.set()
+
+    loader.join()
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,106 @@
-from src.preprocessing.noise_reduction import reduce_noise
-from src.preprocessing.normalization import normalize_audio
+from src.preprocessing.noise_reduction import denoise
+from src.preprocessing.normalization import peak_normalize
+from src.utils import instrumentation
 import os
+import tempfile
+import librosa
+import numpy as np
+import soundfile as sf
 
-def preprocess_audio(raw_file, cleaned_file):
-    temp_file = "temp.wav"
-    
-    reduce_noise(raw_file, temp_file)
-    
-    normalize_audio(temp_file, cleaned_file)
-    
-    if os.path.exists(temp_file):
-        os.remove(temp_file)
-    
-    print(f"Processed: {cleaned_file}")
\ No newline at end of file
+# Inputs longer than this are processed block by block so peak memory does
+# not grow with episode length.
+STREAM_THRESHOLD_SECONDS = 600
+
+# Streaming mode: audio denoised per block, with extra leading context from
+# the previous block so the noise estimate does not restart at each seam.
+BLOCK_SECONDS = 30
+CONTEXT_SECONDS = 1
+
+# Everything that affects the cleaned output. Bump "version" when the chain
+# changes so batch runs redo files processed with the old one.
+PREPROCESS_PARAMS = {
+    "version": 1,
+    "noise_reduction": "noisereduce",
+    "normalization": "peak",
+    "stream_threshold_seconds": STREAM_THRESHOLD_SECONDS,
+    "block_seconds": BLOCK_SECONDS,
+    "context_seconds": CONTEXT_SECONDS,
+}
+
+
+def _duration(path):
+    try:
+        return sf.info(path).duration
+    except RuntimeError:
+        # Format libsndfile cannot read (e.g. m4a): only librosa can decode it
+        return None
+
+
+def preprocess_in_memory(raw_file, cleaned_file):
+    # Decode once, denoise and normalize the same array, encode once
+    with instrumentation.timer("preprocess.decode"):
+        audio, sr = librosa.load(raw_file, sr=None)
+    with instrumentation.timer("preprocess.denoise", items=len(audio)):
+        audio = denoise(audio, sr)
+    audio = peak_normalize(audio)
+    with instrumentation.timer("preprocess.encode"):
+        sf.write(cleaned_file, audio, sr)
+
+
+def preprocess_streaming(raw_file, cleaned_file, block_seconds=BLOCK_SECONDS,
+                         context_seconds=CONTEXT_SECONDS):
+    """
+    Two passes over fixed-size blocks. Pass one denoises each block into a
+    float32 scratch file next to the output and tracks the global peak;
+    pass two rescales the scratch file into the final output. Only a block
+    or two is ever held in memory.
+    """
+    sr = sf.info(raw_file).samplerate
+    block = int(block_seconds * sr)
+    context = int(context_seconds * sr)
+
+    out_dir = os.path.dirname(os.path.abspath(cleaned_file))
+    fd, scratch = tempfile.mkstemp(prefix=".denoised_", suffix=".wav", dir=out_dir)
+    os.close(fd)
+
+    try:
+        peak = 0.0
+        with sf.SoundFile(scratch, "w", samplerate=sr, channels=1, subtype="FLOAT") as out:
+            blocks = sf.blocks(
+                raw_file,
+                blocksize=block + context,
+                overlap=context,
+                dtype="float32",
+                always_2d=True
+            )
+            for i, chunk in enumerate(blocks):
+                mono = chunk.mean(axis=1)
+                with instrumentation.timer("preprocess.denoise", items=len(mono)):
+                    cleaned = denoise(mono, sr).astype(np.float32)
+                if i > 0:
+                    # Drop the context frames already written by the previous block
+                    cleaned = cleaned[context:]
+                out.write(cleaned)
+                peak = max(peak, float(np.max(np.abs(cleaned))) if len(cleaned) else 0.0)
+
+        with sf.SoundFile(cleaned_file, "w", samplerate=sr, channels=1) as out:
+            for chunk in sf.blocks(scratch, blocksize=block, dtype="float32"):
+                out.write(peak_normalize(chunk, peak))
+    finally:
+        if os.path.exists(scratch):
+            os.remove(scratch)
+
+
+def preprocess_audio(raw_file, cleaned_file, streaming=None):
+    duration = _duration(raw_file)
+    if streaming is None:
+        streaming = duration is not None and duration > STREAM_THRESHOLD_SECONDS
+
+    with instrumentation.span("preprocessing", file=os.path.basename(raw_file),
+                              streaming=streaming, audio_seconds=duration):
+        if streaming:
+            preprocess_streaming(raw_file, cleaned_file)
+        else:
+            preprocess_in_memory(raw_file, cleaned_file)
+
+    print(f"Processed: {cleaned_file}")
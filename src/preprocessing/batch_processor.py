@@ -1,21 +1,149 @@
 import os
-from src.preprocessing.audio_preprocessor import preprocess_audio
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.preprocessing.audio_preprocessor import preprocess_audio, PREPROCESS_PARAMS
+from src.utils.hashing import file_sha256, params_hash
 
 RAW_DIR = "data/raw"
 PROCESSED_DIR = "data/processed"
 
-def preprocess_all_audio():
-    files = os.listdir(RAW_DIR)
-    
+# Content hash + parameters of every file already cleaned, so re-runs only
+# redo new or changed inputs.
+MANIFEST_PATH = os.path.join(PROCESSED_DIR, "manifest.json")
+TIMINGS_PATH = os.path.join(PROCESSED_DIR, "timings.json")
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest):
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def fingerprint(path, previous=None):
+    """
+    Size, mtime and content hash of path. The hash of an unchanged file
+    (same size and mtime as last time) is taken from the manifest instead of
+    re-reading multi-hour audio.
+    """
+    stat = os.stat(path)
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        digest = previous["sha256"]
+    else:
+        digest = file_sha256(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+
+
+def is_up_to_date(entry, fp, params_key, output_path):
+    return (
+        entry is not None
+        and entry.get("sha256") == fp["sha256"]
+        and entry.get("params") == params_key
+        and os.path.exists(output_path)
+    )
+
+
+def _preprocess_timed(input_path, output_path):
+    start = time.perf_counter()
+    preprocess_audio(input_path, output_path)
+    return time.perf_counter() - start
+
+
+def write_timings(timings):
+    with open(TIMINGS_PATH, "w", encoding="utf-8") as f:
+        json.dump(timings, f, indent=4)
+
+    processed = [t for t in timings if t["status"] == "processed"]
+    print(f"\n{'file':40} {'status':10} {'seconds':>8}")
+    for t in timings:
+        seconds = f"{t['seconds']:.2f}" if t["seconds"] is not None else "-"
+        print(f"{t['file'][:40]:40} {t['status']:10} {seconds:>8}")
+    print(
+        f"{len(processed)} processed, "
+        f"{sum(t['status'] == 'skipped' for t in timings)} skipped, "
+        f"{sum(t['status'] == 'failed' for t in timings)} failed "
+        f"in {sum(t['seconds'] for t in processed):.2f}s of processing time"
+    )
+
+
+def preprocess_all_audio(workers=1, force=False):
+    os.makedirs(PROCESSED_DIR, exist_ok=True)
+
+    manifest = load_manifest()
+    params_key = params_hash(PREPROCESS_PARAMS)
+
+    files = sorted(os.listdir(RAW_DIR))
+
+    timings = []
+    pending = []
     for f in files:
         if f.endswith((".mp3", ".wav", ".m4a",)):
             input_path = os.path.join(RAW_DIR, f)
             output_filename = os.path.splitext(f)[0] + "_cleaned.wav"
             output_path = os.path.join(PROCESSED_DIR, output_filename)
-            
-            preprocess_audio(input_path, output_path)
-            
-    print("All audio files processed successfully!")
-    
+
+            fp = fingerprint(input_path, manifest.get(f))
+
+            if not force and is_up_to_date(manifest.get(f), fp, params_key, output_path):
+                # Remember a new mtime so the next run can skip hashing again
+                manifest[f].update(fp)
+                timings.append({"file": f, "status": "skipped", "seconds": None})
+                continue
+
+            pending.append((f, input_path, output_path, fp))
+
+    save_manifest(manifest)
+
+    def record(f, output_path, fp, seconds):
+        manifest[f] = {**fp, "params": params_key, "output": output_path, "seconds": round(seconds, 3)}
+        timings.append({"file": f, "status": "processed", "seconds": round(seconds, 3)})
+        # Saved after every file so an interrupted backfill keeps its progress
+        save_manifest(manifest)
+
+    def record_failure(f, e):
+        # One bad file must not abort the rest of the batch
+        print(f"Failed to preprocess {f}: {e}")
+        timings.append({"file": f, "status": "failed", "seconds": None})
+
+    if workers == 1:
+        for f, input_path, output_path, fp in pending:
+            try:
+                record(f, output_path, fp, _preprocess_timed(input_path, output_path))
+            except Exception as e:
+                record_failure(f, e)
+    else:
+        with ProcessPoolExecutor(max_workers=workers or None) as executor:
+            futures = {
+                executor.submit(_preprocess_timed, input_path, output_path): (f, output_path, fp)
+                for f, input_path, output_path, fp in pending
+            }
+            for future in as_completed(futures):
+                f, output_path, fp = futures[future]
+                try:
+                    record(f, output_path, fp, future.result())
+                except Exception as e:
+                    record_failure(f, e)
+
+    write_timings(timings)
+    if not any(t["status"] == "failed" for t in timings):
+        print("All audio files processed successfully!")
+
+
 if __name__ == "__main__":
-    preprocess_all_audio()
+    parser = argparse.ArgumentParser(description="Noise-reduce and normalize raw audio")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="files processed at once (0 = one per CPU core)")
+    parser.add_argument("--force", action="store_true",
+                        help="reprocess every file even if the manifest says it is up to date")
+    args = parser.parse_args()
+
+    preprocess_all_audio(workers=args.workers, force=args.force)
@@ -2,7 +2,12 @@ import librosa
 import noisereduce as nr
 import soundfile as sf
 
+
+def denoise(audio, sr):
+    return nr.reduce_noise(y=audio, sr=sr)
+
+
 def reduce_noise(input_path, output_path):
     audio, sr = librosa.load(input_path, sr=None)
-    reduced_noise = nr.reduce_noise(y=audio, sr=sr)
-    sf.write(output_path, reduced_noise, sr)
\ No newline at end of file
+    reduced_noise = denoise(audio, sr)
+    sf.write(output_path, reduced_noise, sr)
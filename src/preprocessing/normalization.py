@@ -2,7 +2,17 @@ import librosa
 import numpy as np
 import soundfile as sf
 
+
+def peak_normalize(audio, peak=None):
+    """Scale audio so its largest absolute sample is 1.0 (silence is left as is)."""
+    if peak is None:
+        peak = np.max(np.abs(audio))
+    if peak == 0:
+        return audio
+    return audio / peak
+
+
 def normalize_audio(input_path, output_path):
     audio, sr = librosa.load(input_path, sr=None)
-    normalized_audio = audio / np.max(np.abs(audio))
-    sf.write(output_path,normalized_audio, sr)
\ No newline at end of file
+    normalized_audio = peak_normalize(audio)
+    sf.write(output_path,normalized_audio, sr)
@@ -0,0 +1,490 @@
+"""
+Inverted index over segment text, summary and keywords with BM25 ranking.
+
+Each episode in database/ gets its own shard under INDEX_DIR, so a new
+episode is indexed without rewriting the others:
+
+    <id>.postings   header (term count, newline-joined sorted terms and
+                    a uint32 directory of [offset, df, doc bytes, tf bytes,
+                    position bytes] per term), then for every term: doc ids
+                    (delta-encoded), term frequencies and the word positions
+                    in the segment text (delta-encoded per doc), all as
+                    unsigned LEB128 varints
+    <id>.docs.json  per segment: id, start/end time, BM25 length and, when
+                    the transcript is available, the start time of every
+                    word so a hit resolves to the second the word is said
+
+Queries look their terms up in each episode's directory and decode only
+those doc ids and frequencies; positions are decoded for the final top-k
+hits (and for phrase queries).
+
+    python -m src.search.lexical_index build
+    python -m src.search.lexical_index query "climate change" --phrase
+"""
+import os
+import re
+import json
+import heapq
+import struct
+import argparse
+import threading
+from array import array
+from math import log
+from pathlib import Path
+
+DATABASE_DIR = "database"
+SEGMENT_DIR = "data/segments"
+TRANSCRIPT_DIR = "data/transcripts"
+INDEX_DIR = "data/search/lexical"
+MANIFEST_NAME = "manifest.json"
+
+TOP_K = 10
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+DIRECTORY_FIELDS = 5
+
+# Term frequency weight of a match in the summary / keywords, relative to
+# one occurrence in the transcript text
+SUMMARY_WEIGHT = 1
+KEYWORD_WEIGHT = 2
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def encode_varints(values, out=None):
+    out = bytearray() if out is None else out
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return out
+
+
+def decode_varints(data, pos=0, count=None):
+    """Decode count varints (or all of data) from pos. Returns (values, pos)."""
+    values = []
+    end = len(data)
+    while pos < end and (count is None or len(values) < count):
+        value = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        values.append(value)
+    return values, pos
+
+
+def delta_encode(sorted_values):
+    previous = 0
+    deltas = []
+    for value in sorted_values:
+        deltas.append(value - previous)
+        previous = value
+    return deltas
+
+
+def delta_decode(deltas):
+    total = 0
+    values = []
+    for delta in deltas:
+        total += delta
+        values.append(total)
+    return values
+
+
+def _shard_paths(file_name):
+    file_id = Path(file_name).stem
+    return os.path.join(INDEX_DIR, f"{file_id}.postings"), os.path.join(INDEX_DIR, f"{file_id}.docs.json")
+
+
+def transcript_word_starts(file_name, records):
+    """
+    Start time of every word of each segment's text, from the transcript the
+    segments were cut from: the recognizer's own word times when the
+    columnar .words file matches it, otherwise times spread evenly over each
+    transcript segment. None for a segment that cannot be aligned.
+    """
+    file_id = Path(file_name).stem
+    segment_path = os.path.join(SEGMENT_DIR, f"{file_id}.json")
+    transcript_path = os.path.join(TRANSCRIPT_DIR, f"{file_id}.json")
+    if not (os.path.isfile(segment_path) and os.path.isfile(transcript_path)):
+        return [None] * len(records)
+
+    from src.segmentation.batch_segmenter import flatten_text, recognized_word_times
+
+    with open(segment_path, "r", encoding="utf-8") as f:
+        segments = json.loads(f.read()).get("bert_segments", [])
+    with open(transcript_path, "r", encoding="utf-8") as f:
+        text, word_times = flatten_text(json.loads(f.read())["segments"])
+    recognized = recognized_word_times(transcript_path, text)
+    if recognized is not None:
+        word_times = recognized
+
+    starts = []
+    for i, record in enumerate(records):
+        seg = segments[i] if i < len(segments) and isinstance(segments[i], dict) else {}
+        first, end = seg.get("start_word"), seg.get("end_word")
+        n_words = len(tokenize(record.get("text", "")))
+        # Token counts differ when the text has punctuation-only "words"
+        if first is None or end is None or end > len(word_times) or end - first != n_words:
+            starts.append(None)
+        else:
+            starts.append([round(t[0], 2) for t in word_times[first:end]])
+    return starts
+
+
+def build_shard(file_name, records):
+    """(postings file bytes, docs list) for one episode's enriched records."""
+    terms = {}
+    docs = []
+    word_starts = transcript_word_starts(file_name, records)
+
+    for doc, record in enumerate(records):
+        text_tokens = tokenize(record.get("text", ""))
+        summary_tokens = tokenize(record.get("summary", ""))
+        keyword_tokens = [t for kw in record.get("keywords") or [] for t in tokenize(kw)]
+
+        doc_terms = {}
+        for position, token in enumerate(text_tokens):
+            entry = doc_terms.setdefault(token, [0, []])
+            entry[0] += 1
+            entry[1].append(position)
+        for tokens, weight in ((summary_tokens, SUMMARY_WEIGHT), (keyword_tokens, KEYWORD_WEIGHT)):
+            for token in tokens:
+                doc_terms.setdefault(token, [0, []])[0] += weight
+
+        for token, (tf, positions) in doc_terms.items():
+            terms.setdefault(token, []).append((doc, tf, positions))
+
+        docs.append({
+            "segment_id": record.get("segment_id", doc),
+            "start_time": record.get("start_time"),
+            "end_time": record.get("end_time"),
+            "length": len(text_tokens) + len(summary_tokens) + len(keyword_tokens),
+            "words": len(text_tokens),
+            "word_starts": word_starts[doc],
+        })
+
+    out = bytearray()
+    directory = array("I")
+    tokens = sorted(terms)
+    for token in tokens:
+        postings = terms[token]
+
+        doc_ids = encode_varints(delta_encode([p[0] for p in postings]))
+        tfs = encode_varints([p[1] for p in postings])
+        positions = bytearray()
+        for _, _, doc_positions in postings:
+            encode_varints([len(doc_positions)] + delta_encode(doc_positions), positions)
+
+        directory.extend([len(out), len(postings), len(doc_ids), len(tfs), len(positions)])
+        out += doc_ids + tfs + positions
+
+    names = "\n".join(tokens).encode("utf-8")
+    header = struct.pack("<II", len(tokens), len(names)) + names + directory.tobytes()
+    return header + bytes(out), docs
+
+
+def parse_shard(data):
+    """
+    Split a postings file into (term -> directory row, directory, blobs).
+    Only the header is touched; postings stay encoded.
+    """
+    n_terms, names_len = struct.unpack_from("<II", data)
+    start = struct.calcsize("<II")
+    names = data[start:start + names_len].decode("utf-8").split("\n") if n_terms else []
+    start += names_len
+
+    directory = array("I")
+    directory.frombytes(data[start:start + n_terms * DIRECTORY_FIELDS * directory.itemsize])
+    start += n_terms * DIRECTORY_FIELDS * directory.itemsize
+
+    return dict(zip(names, range(n_terms))), directory, data[start:]
+
+
+def load_manifest():
+    path = os.path.join(INDEX_DIR, MANIFEST_NAME)
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.loads(f.read())
+
+
+def save_manifest(manifest):
+    Path(INDEX_DIR).mkdir(parents=True, exist_ok=True)
+    path = os.path.join(INDEX_DIR, MANIFEST_NAME)
+    # The search server and the pipeline both write this file
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(json.dumps(manifest, indent=4))
+    os.replace(tmp, path)
+
+
+def _database_stamp(file_name):
+    stat = os.stat(os.path.join(DATABASE_DIR, file_name))
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def add_episode(file_name, manifest=None):
+    """Index (or re-index) one enriched episode file from DATABASE_DIR."""
+    with open(os.path.join(DATABASE_DIR, file_name), "r", encoding="utf-8") as f:
+        records = json.loads(f.read())
+
+    postings, docs = build_shard(file_name, records)
+
+    Path(INDEX_DIR).mkdir(parents=True, exist_ok=True)
+    postings_path, docs_path = _shard_paths(file_name)
+    with open(postings_path, "wb") as f:
+        f.write(postings)
+    with open(docs_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(docs))
+
+    save = manifest is None
+    manifest = load_manifest() if manifest is None else manifest
+    manifest[file_name] = {**_database_stamp(file_name), "segments": len(docs)}
+    if save:
+        save_manifest(manifest)
+
+    print(f"Indexed {len(docs)} segments from {file_name} ({len(postings)} bytes of postings)")
+    return len(docs)
+
+
+def remove_episode(file_name, manifest):
+    for path in _shard_paths(file_name):
+        if os.path.isfile(path):
+            os.remove(path)
+    manifest.pop(file_name, None)
+
+
+def update_index():
+    """Add new or changed files in DATABASE_DIR, drop deleted ones."""
+    manifest = load_manifest()
+    files = sorted(f for f in os.listdir(DATABASE_DIR) if f.endswith(".json")) \
+        if os.path.isdir(DATABASE_DIR) else []
+
+    changed = 0
+    for file_name in files:
+        entry = manifest.get(file_name)
+        stamp = _database_stamp(file_name)
+        if entry and entry["size"] == stamp["size"] and entry["mtime_ns"] == stamp["mtime_ns"]:
+            continue
+        add_episode(file_name, manifest)
+        changed += 1
+
+    for file_name in set(manifest) - set(files):
+        remove_episode(file_name, manifest)
+        changed += 1
+
+    if changed:
+        save_manifest(manifest)
+    return changed
+
+
+def load_index():
+    """
+    Every shard in memory (postings still encoded) with its term directory,
+    plus the corpus statistics BM25 needs.
+    """
+    manifest = load_manifest()
+
+    episodes = []
+    total_length = 0
+    for file_name in sorted(manifest):
+        postings_path, docs_path = _shard_paths(file_name)
+        if not (os.path.isfile(postings_path) and os.path.isfile(docs_path)):
+            continue
+        with open(postings_path, "rb") as f:
+            terms, directory, postings = parse_shard(f.read())
+        with open(docs_path, "r", encoding="utf-8") as f:
+            docs = json.loads(f.read())
+
+        episodes.append({
+            "file": file_name, "terms": terms, "directory": directory,
+            "postings": postings, "docs": docs
+        })
+        total_length += sum(d["length"] for d in docs)
+
+    n_docs = sum(len(e["docs"]) for e in episodes)
+    return {
+        "episodes": episodes,
+        "files": {e["file"]: i for i, e in enumerate(episodes)},
+        "n_docs": n_docs,
+        "avg_length": total_length / n_docs if n_docs else 0.0,
+    }
+
+
+def _doc_positions(positions, doc_index):
+    """Positions of the doc_index-th posting in a term's positions block."""
+    pos = 0
+    for _ in range(doc_index):
+        (count,), pos = decode_varints(positions, pos, 1)
+        _, pos = decode_varints(positions, pos, count)
+    (count,), pos = decode_varints(positions, pos, 1)
+    deltas, _ = decode_varints(positions, pos, count)
+    return delta_decode(deltas)
+
+
+def _postings(index, token, episode_filter):
+    """(episode, doc ids, tfs, encoded positions) for every episode containing token."""
+    episodes = index["episodes"]
+    numbers = range(len(episodes)) if episode_filter is None else [episode_filter]
+
+    for episode in numbers:
+        row = episodes[episode]["terms"].get(token)
+        if row is None:
+            continue
+        directory = episodes[episode]["directory"]
+        offset, _, n_docs, n_tfs, n_pos = directory[row * DIRECTORY_FIELDS:(row + 1) * DIRECTORY_FIELDS]
+        data = episodes[episode]["postings"]
+        doc_ids = delta_decode(decode_varints(data[offset:offset + n_docs])[0])
+        offset += n_docs
+        tfs = decode_varints(data[offset:offset + n_tfs])[0]
+        offset += n_tfs
+        yield episode, doc_ids, tfs, data[offset:offset + n_pos]
+
+
+def document_frequency(index, token):
+    return sum(
+        e["directory"][e["terms"][token] * DIRECTORY_FIELDS + 1]
+        for e in index["episodes"] if token in e["terms"]
+    )
+
+
+def _phrase_start(term_positions):
+    """First position where the terms occur consecutively, or None."""
+    first, *rest = term_positions
+    following = [set(p) for p in rest]
+    for start in first:
+        if all(start + offset + 1 in positions for offset, positions in enumerate(following)):
+            return start
+    return None
+
+
+def search(index, query, top_k=TOP_K, file_name=None, phrase=False):
+    """
+    BM25-ranked segments for the query, optionally within one episode file.
+    With phrase=True a segment must contain the query words consecutively.
+    Each hit has the segment's id and times, the matched word position and
+    match_time, the time that word is spoken (interpolated when the
+    transcript could not be aligned).
+    """
+    tokens = tokenize(query)
+    if not tokens or not index["n_docs"]:
+        return []
+
+    episode_filter = None
+    if file_name:
+        if file_name not in index["files"]:
+            return []
+        episode_filter = index["files"][file_name]
+
+    n_docs, avg_length = index["n_docs"], index["avg_length"] or 1.0
+    scores = {}
+    # (episode, doc) -> {token: (positions block, posting number)}
+    matches = {}
+
+    for token in dict.fromkeys(tokens):
+        entries = list(_postings(index, token, episode_filter))
+        df = document_frequency(index, token)
+        if not entries:
+            if phrase:
+                return []
+            continue
+        idf = log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+        for episode, doc_ids, tfs, positions in entries:
+            docs = index["episodes"][episode]["docs"]
+            for n, (doc, tf) in enumerate(zip(doc_ids, tfs)):
+                length = docs[doc]["length"]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                key = (episode, doc)
+                scores[key] = scores.get(key, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+                matches.setdefault(key, {})[token] = (positions, n)
+
+    if phrase:
+        unique = set(tokens)
+        candidates = [key for key, found in matches.items() if set(found) == unique]
+    else:
+        candidates = list(scores)
+
+    # Phrase checks can reject candidates, so they walk the full ranking
+    rank_key = lambda key: (-scores[key], key)
+    if phrase:
+        ranked = sorted(candidates, key=rank_key)
+    else:
+        ranked = heapq.nsmallest(top_k, candidates, key=rank_key)
+
+    hits = []
+    for key in ranked:
+        found = matches[key]
+        positions = {t: _doc_positions(*found[t]) for t in found}
+
+        if phrase:
+            position = _phrase_start([positions[t] for t in tokens])
+            if position is None:
+                continue
+        else:
+            text_positions = [p[0] for p in positions.values() if p]
+            # Matched only in the summary / keywords
+            position = min(text_positions) if text_positions else None
+
+        hits.append(_hit(index, key, scores[key], position))
+        if len(hits) == top_k:
+            break
+
+    return hits
+
+
+def _hit(index, key, score, position):
+    episode, doc = key
+    record = index["episodes"][episode]["docs"][doc]
+    start, end = record["start_time"], record["end_time"]
+
+    match_time = None
+    if position is not None:
+        if record.get("word_starts"):
+            match_time = record["word_starts"][position]
+        elif start is not None and end is not None and record["words"]:
+            match_time = round(start + (end - start) * position / record["words"], 2)
+
+    return {
+        "file": index["episodes"][episode]["file"],
+        "segment_id": record["segment_id"],
+        "start_time": start,
+        "end_time": end,
+        "position": position,
+        "match_time": match_time,
+        "score": round(score, 4),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lexical (BM25) segment index")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("build", help="index new or changed files in database/")
+    add = sub.add_parser("add", help="index one file from database/")
+    add.add_argument("file")
+    query = sub.add_parser("query")
+    query.add_argument("text")
+    query.add_argument("--k", type=int, default=TOP_K)
+    query.add_argument("--file", help="only search this episode file")
+    query.add_argument("--phrase", action="store_true", help="match the words consecutively")
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        print(f"{update_index()} episode(s) updated")
+    elif args.cmd == "add":
+        add_episode(args.file)
+    else:
+        for hit in search(load_index(), args.text, args.k, args.file, args.phrase):
+            print(f"{hit['score']:.3f}  {hit['file']}  #{hit['segment_id']}  "
+                  f"{hit['start_time']}-{hit['end_time']}  match at {hit['match_time']}")
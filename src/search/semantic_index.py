@@ -0,0 +1,316 @@
+"""
+Semantic search over every enriched segment in database/*.json.
+
+Each episode is stored as its own shard under INDEX_DIR so a new episode is
+added without touching the others:
+
+    <id>.npy    (n_segments, dim) L2-normalized float16 segment vectors
+    <id>.json   one record per row: file, segment_id, start/end time, text
+
+Every segment vector is the mean of its sentences' MiniLM embeddings, the
+same pooling segmentation stores in its embedding sidecar. The sidecar is
+reused when it matches the episode; otherwise the segment's sentences are
+encoded here, so scores stay comparable across episodes. The manifest
+records the method (VECTOR_METHOD) and shards built another way are
+re-indexed. A query is encoded with
+the same model and scored against all rows with one matrix product. For
+large corpora an IVF-style partitioned index (k-means centroids, probe the
+nprobe closest partitions) can be built in memory on top of the same rows.
+
+    python -m src.search.semantic_index build
+    python -m src.search.semantic_index add 1767768303639.json
+    python -m src.search.semantic_index query "wolves in scotland" --k 5
+"""
+import os
+import json
+import argparse
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from src.segmentation.embedding_store import has_embeddings, load_embeddings
+
+DATABASE_DIR = "database"
+SEGMENT_DIR = "data/segments"
+INDEX_DIR = "data/search/semantic"
+MANIFEST_NAME = "manifest.json"
+
+VECTOR_DTYPE = np.float16
+# How segment vectors are built; shards indexed another way are rebuilt
+VECTOR_METHOD = "mean-sentence-minilm"
+TOP_K = 10
+
+# Partitioned search only pays off past this many rows
+IVF_MIN_ROWS = 50_000
+IVF_NPROBE = 8
+IVF_ITERATIONS = 10
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def encode_texts(texts):
+    from src.segmentation.bert_segmentation import get_model
+    from src.utils import model_registry
+
+    # The search server encodes queries on several request threads
+    with model_registry.lock("minilm"):
+        return get_model().encode(texts)
+
+
+def split_sentences(text):
+    from src.segmentation.bert_segmentation import split_sentences as split
+    return split(text)
+
+
+def _shard_paths(file_name):
+    file_id = Path(file_name).stem
+    return os.path.join(INDEX_DIR, f"{file_id}.npy"), os.path.join(INDEX_DIR, f"{file_id}.json")
+
+
+def load_manifest():
+    path = os.path.join(INDEX_DIR, MANIFEST_NAME)
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.loads(f.read())
+
+
+def save_manifest(manifest):
+    Path(INDEX_DIR).mkdir(parents=True, exist_ok=True)
+    path = os.path.join(INDEX_DIR, MANIFEST_NAME)
+    # The search server and the pipeline both write this file
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(json.dumps(manifest, indent=4))
+    os.replace(tmp, path)
+
+
+def _database_stamp(file_name):
+    stat = os.stat(os.path.join(DATABASE_DIR, file_name))
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def segment_vectors(file_name, records):
+    """
+    Mean sentence embedding of every segment: the pooled vectors from
+    segmentation if they line up, otherwise pooled here the same way.
+    """
+    file_id = Path(file_name).stem
+    if has_embeddings(SEGMENT_DIR, file_id):
+        pooled = load_embeddings(SEGMENT_DIR, file_id)["segments"]
+        if len(pooled) == len(records):
+            return np.asarray(pooled, dtype=np.float32)
+
+    sentences = []
+    spans = []
+    for r in records:
+        split = split_sentences(r.get("text", "")) or [r.get("text", "")]
+        spans.append((len(sentences), len(sentences) + len(split)))
+        sentences.extend(split)
+    embeddings = np.asarray(encode_texts(sentences), dtype=np.float32)
+    return np.vstack([embeddings[start:end].mean(axis=0) for start, end in spans])
+
+
+def add_episode(file_name, manifest=None):
+    """Index (or re-index) one enriched episode file from DATABASE_DIR."""
+    with open(os.path.join(DATABASE_DIR, file_name), "r", encoding="utf-8") as f:
+        records = json.loads(f.read())
+
+    rows = [
+        {
+            "file": file_name,
+            "segment_id": r.get("segment_id", i),
+            "start_time": r.get("start_time"),
+            "end_time": r.get("end_time"),
+            "text": r.get("text", ""),
+            "summary": r.get("summary", ""),
+        }
+        for i, r in enumerate(records)
+    ]
+
+    vectors = normalize(segment_vectors(file_name, records)) if rows else np.zeros((0, 0))
+
+    Path(INDEX_DIR).mkdir(parents=True, exist_ok=True)
+    vector_path, meta_path = _shard_paths(file_name)
+    np.save(vector_path, vectors.astype(VECTOR_DTYPE))
+    with open(meta_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(rows))
+
+    save = manifest is None
+    manifest = load_manifest() if manifest is None else manifest
+    manifest[file_name] = {**_database_stamp(file_name), "segments": len(rows), "vectors": VECTOR_METHOD}
+    if save:
+        save_manifest(manifest)
+
+    print(f"Indexed {len(rows)} segments from {file_name}")
+    return len(rows)
+
+
+def remove_episode(file_name, manifest):
+    for path in _shard_paths(file_name):
+        if os.path.isfile(path):
+            os.remove(path)
+    manifest.pop(file_name, None)
+
+
+def update_index():
+    """
+    Bring the index in line with DATABASE_DIR: add new or changed episode
+    files and drop deleted ones. Returns the number of episodes touched.
+    """
+    manifest = load_manifest()
+    files = sorted(f for f in os.listdir(DATABASE_DIR) if f.endswith(".json")) \
+        if os.path.isdir(DATABASE_DIR) else []
+
+    changed = 0
+    for file_name in files:
+        entry = manifest.get(file_name)
+        stamp = _database_stamp(file_name)
+        if (entry and entry["size"] == stamp["size"] and entry["mtime_ns"] == stamp["mtime_ns"]
+                and entry.get("vectors") == VECTOR_METHOD):
+            continue
+        add_episode(file_name, manifest)
+        changed += 1
+
+    for file_name in set(manifest) - set(files):
+        remove_episode(file_name, manifest)
+        changed += 1
+
+    if changed:
+        save_manifest(manifest)
+    return changed
+
+
+def build_ivf(vectors, n_partitions=None, iterations=IVF_ITERATIONS, seed=0):
+    """
+    Spherical k-means over the rows. Returns (centroids, lists) where lists[c]
+    holds the row numbers assigned to centroid c.
+    """
+    n = len(vectors)
+    n_partitions = n_partitions or max(1, int(np.sqrt(n)))
+    rng = np.random.default_rng(seed)
+
+    data = np.asarray(vectors, dtype=np.float32)
+    centroids = data[rng.choice(n, size=n_partitions, replace=False)]
+
+    for _ in range(iterations):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        empty = np.bincount(assign, minlength=n_partitions) == 0
+        # Re-seed empty partitions instead of leaving them dead
+        sums[empty] = data[rng.choice(n, size=int(empty.sum()))]
+        centroids = normalize(sums)
+
+    assign = np.argmax(data @ centroids.T, axis=1)
+    order = np.argsort(assign, kind="stable")
+    bounds = np.searchsorted(assign[order], np.arange(n_partitions + 1))
+    lists = [order[bounds[c]:bounds[c + 1]] for c in range(n_partitions)]
+    return centroids, lists
+
+
+def load_index(ivf=None):
+    """
+    Load every shard into one matrix. ivf=None builds the partitioned index
+    only when there are at least IVF_MIN_ROWS rows.
+    """
+    manifest = load_manifest()
+
+    matrices, records, episodes = [], [], {}
+    for file_name in sorted(manifest):
+        vector_path, meta_path = _shard_paths(file_name)
+        if not (os.path.isfile(vector_path) and os.path.isfile(meta_path)):
+            continue
+        with open(meta_path, "r", encoding="utf-8") as f:
+            rows = json.loads(f.read())
+        if not rows:
+            continue
+        matrices.append(np.load(vector_path))
+        episodes[file_name] = (len(records), len(records) + len(rows))
+        records.extend(rows)
+
+    vectors = np.vstack(matrices) if matrices else np.zeros((0, 0), dtype=VECTOR_DTYPE)
+    # Shards are contiguous, so an episode is a row range
+    index = {"vectors": vectors, "records": records, "episodes": episodes, "ivf": None}
+
+    if ivf is None:
+        ivf = len(records) >= IVF_MIN_ROWS
+    if ivf and records:
+        index["ivf"] = build_ivf(vectors)
+
+    return index
+
+
+def _candidate_rows(index, query_vector, file_name, nprobe):
+    rows = None
+    if index["ivf"] is not None:
+        centroids, lists = index["ivf"]
+        probe = np.argsort(-(centroids @ query_vector))[:nprobe]
+        rows = np.concatenate([lists[c] for c in probe])
+
+    if file_name:
+        start, end = index["episodes"].get(file_name, (0, 0))
+        if rows is None:
+            rows = np.arange(start, end)
+        else:
+            rows = rows[(rows >= start) & (rows < end)]
+
+    return rows
+
+
+def search(index, query, top_k=TOP_K, file_name=None, nprobe=IVF_NPROBE, query_vector=None):
+    """
+    Top-k segments by cosine similarity to the query, optionally within one
+    episode file. Each hit is its record plus "score".
+    """
+    if not index["records"]:
+        return []
+
+    if query_vector is None:
+        query_vector = encode_texts([query])[0]
+    query_vector = normalize(query_vector).astype(index["vectors"].dtype)
+
+    rows = _candidate_rows(index, query_vector, file_name, nprobe)
+    vectors = index["vectors"] if rows is None else index["vectors"][rows]
+    if len(vectors) == 0:
+        return []
+
+    scores = (vectors @ query_vector).astype(np.float32)
+    k = min(top_k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+
+    return [
+        {**index["records"][int(rows[i]) if rows is not None else int(i)], "score": round(float(scores[i]), 4)}
+        for i in top
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Semantic segment index")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("build", help="index new or changed files in database/")
+    add = sub.add_parser("add", help="index one file from database/")
+    add.add_argument("file")
+    query = sub.add_parser("query")
+    query.add_argument("text")
+    query.add_argument("--k", type=int, default=TOP_K)
+    query.add_argument("--file", help="only search this episode file")
+    query.add_argument("--ivf", action="store_true", help="force the partitioned index")
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        print(f"{update_index()} episode(s) updated")
+    elif args.cmd == "add":
+        add_episode(args.file)
+    else:
+        index = load_index(ivf=True if args.ivf else None)
+        for hit in search(index, args.text, args.k, args.file):
+            print(f"{hit['score']:.3f}  {hit['file']}  #{hit['segment_id']}  "
+                  f"{hit['start_time']}-{hit['end_time']}  {hit['text'][:80]}")
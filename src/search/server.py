@@ -0,0 +1,180 @@
+"""
+Local HTTP search service for the Express backend.
+
+    GET /health
+    GET /search/semantic?q=wolves&k=10&file=1767768303639.json
+    GET /search/lexical?q=climate+change&phrase=1&k=10&file=...
+
+Responses are JSON. Each index is loaded once and refreshed from database/
+at most every REFRESH_SECONDS, so episodes enriched after startup become
+searchable without a restart. A refresh runs in a background thread, one
+per index at a time, and searches keep using the loaded index until the
+refreshed one is swapped in.
+
+    python -m src.search.server --port 5001
+"""
+import os
+import json
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from src.search import lexical_index
+from src.search import semantic_index
+
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("SEARCH_PORT", 5001))
+REFRESH_SECONDS = 10
+MAX_K = 1000
+
+# One refresh per index at a time
+_refresh_locks = {"semantic": threading.Lock(), "lexical": threading.Lock()}
+_state = {
+    "semantic": {"index": None, "checked_at": 0.0, "manifest": None},
+    "lexical": {"index": None, "checked_at": 0.0, "manifest": None},
+}
+
+INDEX_MODULES = {"semantic": semantic_index, "lexical": lexical_index}
+
+
+def _refresh(kind):
+    """Updates the index on disk and swaps in the new one if it changed."""
+    module = INDEX_MODULES[kind]
+    state = _state[kind]
+    module.update_index()
+    manifest = module.load_manifest()
+    if state["index"] is None or manifest != state["manifest"]:
+        state["index"], state["manifest"] = module.load_index(), manifest
+
+
+def _refresh_in_background(kind):
+    try:
+        _refresh(kind)
+    except Exception as e:
+        print(f"Refreshing the {kind} index failed: {e}")
+    finally:
+        _refresh_locks[kind].release()
+
+
+def get_index(kind):
+    """
+    The loaded index of this kind. Only the first call waits for it to load;
+    after that, when database/ has new or changed episodes or another
+    process (the pipeline) updated the index on disk, the new index is
+    loaded in the background and used once it is ready.
+    """
+    state = _state[kind]
+    refresh_lock = _refresh_locks[kind]
+
+    if state["index"] is None:
+        with refresh_lock:
+            if state["index"] is None:
+                state["checked_at"] = time.time()
+                _refresh(kind)
+        return state["index"]
+
+    if time.time() - state["checked_at"] > REFRESH_SECONDS and refresh_lock.acquire(blocking=False):
+        state["checked_at"] = time.time()
+        threading.Thread(target=_refresh_in_background, args=(kind,), daemon=True).start()
+    return state["index"]
+
+
+def _query_params(params, module):
+    query = params.get("q", "").strip()
+    if not query:
+        raise ValueError("Missing search query ?q=")
+    k = int(params.get("k", module.TOP_K))
+    if k <= 0:
+        raise ValueError("k must be a positive integer")
+    k = min(k, MAX_K)
+    return query, k, params.get("file") or None
+
+
+def semantic_search(params):
+    query, k, file_name = _query_params(params, semantic_index)
+    index = get_index("semantic")
+    start = time.perf_counter()
+    results = semantic_index.search(index, query, top_k=k, file_name=file_name)
+
+    return 200, {
+        "query": query,
+        "took_ms": round((time.perf_counter() - start) * 1000, 2),
+        "results": results
+    }
+
+
+def lexical_search(params):
+    query, k, file_name = _query_params(params, lexical_index)
+    phrase = params.get("phrase", "") in ("1", "true")
+    index = get_index("lexical")
+    start = time.perf_counter()
+    results = lexical_index.search(index, query, top_k=k, file_name=file_name, phrase=phrase)
+
+    body = {
+        "query": query,
+        "took_ms": round((time.perf_counter() - start) * 1000, 2),
+        "results": results
+    }
+    if file_name:
+        # Lets callers tell "no match" from "episode not indexed yet"
+        body["indexed"] = file_name in index["files"]
+    return 200, body
+
+
+ROUTES = {
+    "/search/semantic": semantic_search,
+    "/search/lexical": lexical_search,
+    "/health": lambda params: (200, {"ok": True}),
+}
+
+
+class SearchHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        route = ROUTES.get(url.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if route is None:
+            status, body = 404, {"error": f"Unknown path: {url.path}"}
+        else:
+            try:
+                status, body = route(params)
+            except ValueError as e:
+                status, body = 400, {"error": str(e)}
+            except Exception as e:
+                status, body = 500, {"error": "Search failed", "details": str(e)}
+
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host=HOST, port=PORT):
+    for kind in INDEX_MODULES:
+        get_index(kind)
+    server = ThreadingHTTPServer((host, port), SearchHandler)
+    print(f"Search service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local search service")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    serve(args.host, args.port)
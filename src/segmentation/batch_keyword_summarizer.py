@@ -1,9 +1,13 @@
 import os
-import sys
 import json
-
-from src.segmentation.keywords import keyword_extractor
-from src.segmentation.summarizer import summarize_segment
+import argparse
+
+from src.segmentation import keywords
+from src.segmentation import summarizer
+from src.segmentation.keywords import keyword_extractor_batch
+from src.segmentation.summarizer import summarize_segments
+from src.utils import stage_cache, instrumentation
+from src.utils.hashing import params_hash
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
 SEGMENT_DIR = "data/segments"
@@ -14,7 +18,16 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 sentiment_analyzer = SentimentIntensityAnalyzer()
 
 
-def process_single_file(segment_filename):
+def enrichment_cache_key(bert_segments):
+    return stage_cache.make_key(
+        "enrichment",
+        params_hash(bert_segments),
+        {"summary": summarizer.model_id(), "keywords": keywords.MODEL_NAME, "sentiment": "vader"},
+        {"summary_max_length": 90, "summary_min_length": 5, "keyword_top_k": keywords.TOP_K}
+    )
+
+
+def load_segment_file(segment_filename):
     seg_path = os.path.join(SEGMENT_DIR, segment_filename)
     if not os.path.exists(seg_path):
         raise FileNotFoundError(f"Segment file not found: {seg_path}")
@@ -22,24 +35,87 @@ def process_single_file(segment_filename):
     with open(seg_path, "r", encoding="utf-8") as f:
         seg_data = json.load(f)
 
-    bert_segments = seg_data.get("bert_segments", [])
-    file_name = seg_data.get("file")
+    return seg_data.get("bert_segments", []), seg_data.get("file")
+
+
+def summary_sentence_vectors(segment_filename, n_segments):
+    """
+    For the extractive summarizer: each segment's sentence embeddings from
+    the file's segmentation sidecar (None for a segment without them).
+    None for the other backends.
+    """
+    if summarizer.BACKEND != "extractive":
+        return None
+
+    from src.segmentation import embedding_store
+
+    file_id = os.path.splitext(segment_filename)[0]
+    if embedding_store.has_embeddings(SEGMENT_DIR, file_id):
+        store = embedding_store.load_embeddings(SEGMENT_DIR, file_id)
+        if len(store["offsets"]) - 1 == n_segments:
+            return [embedding_store.segment_sentence_vectors(store, i) for i in range(n_segments)]
+    return [None] * n_segments
+
+
+def write_output(segment_filename, final_output):
+    output_path = os.path.join(OUTPUT_DIR, segment_filename)
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(final_output, f, indent=4)
+
+    print(f"Saved final output: {output_path}")
+    return output_path
+
+
+def segment_fields(i, seg):
+    if isinstance(seg, dict):
+        text = seg.get("text", "")
+        segment_id = seg.get("segment_id", i)
+        start_time = seg.get("start_time")
+        end_time = seg.get("end_time")
+    else:
+        text = str(seg)
+        segment_id = i
+        start_time = None
+        end_time = None
+
+    return text, segment_id, start_time, end_time
+
+
+def update_search_index(output_names):
+    """Add freshly written episodes to the lexical search index."""
+    from src.search import lexical_index
+
+    for name in output_names:
+        try:
+            lexical_index.add_episode(name)
+        except Exception as e:
+            # Search is rebuilt from database/ anyway; never fail enrichment for it
+            print(f"Search index update failed for {name}: {e}")
+
+
+def process_single_file(segment_filename, use_cache=True):
+    from src.segmentation.enrichment_executor import enrich_files
+
+    # Summaries, keywords and sentiment of the file run side by side
+    return enrich_files([segment_filename], use_cache=use_cache)[0]
+
 
+def sentiment_scores(texts):
+    """VADER compound score of every text."""
+    with instrumentation.timer("vader.polarity_scores", items=len(texts)):
+        return [sentiment_analyzer.polarity_scores(text)["compound"] for text in texts]
+
+
+def enrich_segments(bert_segments, file_name, summaries, segment_keywords, sentiments=None):
     final_output = []
 
+    if sentiments is None:
+        sentiments = sentiment_scores([segment_fields(i, seg)[0] for i, seg in enumerate(bert_segments)])
+
     for i, seg in enumerate(bert_segments):
-        if isinstance(seg, dict):
-            text = seg.get("text", "")
-            segment_id = seg.get("segment_id", i)
-            start_time = seg.get("start_time")
-            end_time = seg.get("end_time")
-        else:
-            text = str(seg)
-            segment_id = i
-            start_time = None
-            end_time = None
-
-        sentiment_score = sentiment_analyzer.polarity_scores(text)["compound"]
+        text, segment_id, start_time, end_time = segment_fields(i, seg)
+        sentiment_score = sentiments[i]
 
         record = {
             "file": file_name,
@@ -47,8 +123,8 @@ def process_single_file(segment_filename):
             "text": text,
 
             # ✅ semantic enrichment
-            "summary": summarize_segment(text),
-            "keywords": keyword_extractor(text),
+            "summary": summaries[i],
+            "keywords": segment_keywords[i],
 
             # ✅ PRESERVED timestamps (DO NOT TOUCH)
             "start_time": start_time,
@@ -61,23 +137,33 @@ def process_single_file(segment_filename):
 
         final_output.append(record)
 
-    output_path = os.path.join(OUTPUT_DIR, segment_filename)
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(final_output, f, indent=4)
+    return final_output
 
-    print(f"Saved final output: {output_path}")
 
+def process_all_files(**executor_options):
+    from src.segmentation.enrichment_executor import enrich_files
 
-def process_all_files():
-    files = [f for f in os.listdir(SEGMENT_DIR) if f.endswith(".json")]
+    files = sorted(f for f in os.listdir(SEGMENT_DIR) if f.endswith(".json"))
 
-    for file in files:
-        process_single_file(file)
+    # Several files in flight, each written as soon as it is enriched
+    return enrich_files(files, **executor_options)
 
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        process_single_file(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Summaries, keywords and sentiment for segment files")
+    parser.add_argument("segment_file", nargs="?", help="single file in data/segments (backend upload)")
+    parser.add_argument("--summary-workers", type=int, help="threads running the summarizer")
+    parser.add_argument("--keyword-workers", type=int, help="threads running KeyBERT")
+    parser.add_argument("--sentiment-workers", type=int, help="threads running VADER")
+    parser.add_argument("--max-files", type=int, help="segment files in flight at once")
+    args = parser.parse_args()
+
+    if args.segment_file:
+        process_single_file(args.segment_file)
     else:
-        process_all_files()
+        process_all_files(
+            summary_workers=args.summary_workers,
+            keyword_workers=args.keyword_workers,
+            sentiment_workers=args.sentiment_workers,
+            max_files=args.max_files
+        )
@@ -1,14 +1,26 @@
 import os
-import sys
 import json
+import argparse
+import shutil
 from pathlib import Path
 
-from src.segmentation.text_tiling import text_tiling_segments
-from src.segmentation.bert_segmentation import bert_topic_segments
+from src.segmentation.bert_segmentation import topic_segments_with_embeddings
+from src.segmentation.embedding_store import save_embeddings, sidecar_paths, SIDECAR_PARTS
+from src.transcription import transcript_store
+from src.utils import stage_cache, instrumentation
+from src.utils.hashing import params_hash
 
 TRANSCRIPT_DIR = "data/transcripts"
 SEGMENT_OUTPUT_DIR = "data/segments"
 
+# Model and parameters that decide the segment boundaries (stage cache key)
+SEGMENT_MODEL = "all-MiniLM-L6-v2"
+SEGMENT_PARAMS = {"threshold": 0.55}
+# Part of the cache key only: how segment start/end times were derived
+TIMESTAMP_METHOD = "word_offsets"
+# Same, when the recognizer's own word times came from the columnar transcript
+COLUMNAR_TIMESTAMP_METHOD = "recognized_words"
+
 os.makedirs(SEGMENT_OUTPUT_DIR, exist_ok=True)
 
 
@@ -19,12 +31,57 @@ def load_transcript(path):
 
 
 def flatten_text(segments):
-    return " ".join(seg["text"] for seg in segments)
+    """
+    Joined transcript text plus a (start, end) time for every word in it, in
+    text.split() order. Transcript segments only carry their own start/end,
+    so word times are spread evenly across the segment's words.
+    """
+    word_times = []
+    for seg in segments:
+        words = seg["text"].split()
+        if not words:
+            continue
+        step = (seg["end"] - seg["start"]) / len(words)
+        bounds = [seg["start"] + i * step for i in range(len(words))] + [seg["end"]]
+        word_times.extend(zip(bounds[:-1], bounds[1:]))
+
+    return " ".join(seg["text"] for seg in segments), word_times
+
+
+def recognized_word_times(transcript_path, text):
+    """
+    Actual (start, end) of every word from the columnar transcript next to
+    transcript_path, or None when there is none or it does not match text
+    word for word.
+    """
+    path = transcript_store.columnar_path(transcript_path)
+    if not os.path.isfile(path):
+        return None
+    store = transcript_store.load_columnar(path)
+    if transcript_store.word_count(store) != len(text.split()):
+        return None
+    return transcript_store.word_times(store)
+
+
+def segment_word_spans(sentences, spans):
+    """(first_word, end_word) offsets into the flattened text for each sentence span."""
+    offsets = [0]
+    for sentence in sentences:
+        offsets.append(offsets[-1] + len(sentence.split()))
+    return [(offsets[start], offsets[end]) for start, end in spans]
+
+
+def word_span_time(word_span, word_times):
+    start, end = word_span
+    if end <= start:
+        return None, None
+    return word_times[start][0], word_times[end - 1][1]
 
 
 def find_segment_time(segment_text, whisper_segments):
     """
-    Approximate start/end time by matching text
+    Approximate start/end time by matching text. Only used when the
+    sentence split does not line up word for word with the transcript.
     """
     segment_text = segment_text.strip().lower()
 
@@ -44,58 +101,132 @@ def find_segment_time(segment_text, whisper_segments):
     return start_time, end_time
 
 
-def segment_single_file(transcript_path):
-    if not os.path.exists(transcript_path):
-        raise FileNotFoundError(f"Transcript not found: {transcript_path}")
+def store_cached_embeddings(cache_key, file_id):
+    for part, path in sidecar_paths(SEGMENT_OUTPUT_DIR, file_id).items():
+        shutil.copyfile(path, stage_cache.attachment_path("segmentation", cache_key, f"{part}.npy"))
 
-    input_path = Path(transcript_path)
-    file_id = input_path.stem
-
-    print(f"Segmenting uploaded transcript: {file_id}")
-
-    whisper_segments = load_transcript(transcript_path)
-    text = flatten_text(whisper_segments)
-
-    tt_raw = text_tiling_segments(text)
-    bert_raw = bert_topic_segments(text)
-
-    bert_segments = []
-
-    for idx, seg_text in enumerate(bert_raw):
-        start_time, end_time = find_segment_time(
-            seg_text,
-            whisper_segments
-        )
 
-        bert_segments.append({
-            "segment_id": idx + 1,
-            "text": seg_text,
-            "start_time": start_time,
-            "end_time": end_time
-        })
+def restore_cached_embeddings(cache_key, file_id):
+    """Copy a cached embedding sidecar next to this file's segments, if complete."""
+    cached = [
+        stage_cache.get_attachment("segmentation", cache_key, f"{part}.npy")
+        for part in SIDECAR_PARTS
+    ]
+    if not all(cached):
+        return False
 
-    output = {
-        "file": f"{file_id}.json",
-        "bert_segments": bert_segments,
-        "num_bert": len(bert_segments)
-    }
+    paths = sidecar_paths(SEGMENT_OUTPUT_DIR, file_id)
+    for part, cached_path in zip(SIDECAR_PARTS, cached):
+        shutil.copyfile(cached_path, paths[part])
+    return True
 
-    output_path = os.path.join(SEGMENT_OUTPUT_DIR, f"{file_id}.json")
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=4)
+def segment_single_file(transcript_path, use_cache=True, text_tiling=False):
+    """
+    BERT topic segments with timestamps for one transcript. TextTiling
+    segments are only computed (and written as tt_segments) when
+    text_tiling is set.
+    """
+    if not os.path.exists(transcript_path):
+        raise FileNotFoundError(f"Transcript not found: {transcript_path}")
 
-    print(f"Saved segments to {output_path}")
+    input_path = Path(transcript_path)
+    file_id = input_path.stem
 
+    print(f"Segmenting uploaded transcript: {file_id}")
 
-def segment_all_files():
+    with instrumentation.span("segmentation", file=file_id) as span:
+        whisper_segments = load_transcript(transcript_path)
+        text, word_times = flatten_text(whisper_segments)
+
+        timestamp_method = TIMESTAMP_METHOD
+        recognized = recognized_word_times(transcript_path, text)
+        if recognized is not None:
+            word_times = recognized
+            timestamp_method = COLUMNAR_TIMESTAMP_METHOD
+
+        cache_key = None
+        bert_segments = None
+        if use_cache:
+            cache_key = stage_cache.make_key(
+                "segmentation", params_hash(whisper_segments), SEGMENT_MODEL,
+                {**SEGMENT_PARAMS, "timestamps": timestamp_method}
+            )
+            # The embedding sidecar must come back with the segments
+            if restore_cached_embeddings(cache_key, file_id):
+                bert_segments = stage_cache.get("segmentation", cache_key)
+
+        span.set(cached=bert_segments is not None, words=len(word_times))
+        if bert_segments is not None:
+            print(f"Using cached segmentation for {file_id}")
+        else:
+            bert_raw, sentences, sentence_embeddings, spans = topic_segments_with_embeddings(text, **SEGMENT_PARAMS)
+
+            # Keep the sentence embeddings for downstream steps instead of re-encoding
+            save_embeddings(SEGMENT_OUTPUT_DIR, file_id, sentence_embeddings, spans)
+
+            word_spans = segment_word_spans(sentences, spans)
+            aligned = bool(word_spans) and word_spans[-1][1] == len(word_times)
+
+            bert_segments = []
+
+            for idx, seg_text in enumerate(bert_raw):
+                if aligned:
+                    start_time, end_time = word_span_time(word_spans[idx], word_times)
+                else:
+                    start_time, end_time = find_segment_time(seg_text, whisper_segments)
+
+                segment = {
+                    "segment_id": idx + 1,
+                    "text": seg_text,
+                    "start_time": start_time,
+                    "end_time": end_time
+                }
+                if aligned:
+                    segment["start_word"], segment["end_word"] = word_spans[idx]
+
+                bert_segments.append(segment)
+
+            if use_cache:
+                store_cached_embeddings(cache_key, file_id)
+                stage_cache.put("segmentation", cache_key, bert_segments)
+
+        span.items = len(bert_segments)
+        output = {
+            "file": f"{file_id}.json",
+            "bert_segments": bert_segments,
+            "num_bert": len(bert_segments)
+        }
+
+        if text_tiling:
+            from src.segmentation.text_tiling import text_tiling_segments
+
+            output["tt_segments"] = text_tiling_segments(text)
+            output["num_tt"] = len(output["tt_segments"])
+
+        output_path = os.path.join(SEGMENT_OUTPUT_DIR, f"{file_id}.json")
+
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=4)
+
+        print(f"Saved segments to {output_path}")
+        return output_path
+
+
+def segment_all_files(text_tiling=False):
     for file in os.listdir(TRANSCRIPT_DIR):
         if file.endswith(".json"):
-            segment_single_file(os.path.join(TRANSCRIPT_DIR, file))
+            segment_single_file(os.path.join(TRANSCRIPT_DIR, file), text_tiling=text_tiling)
 
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        segment_single_file(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Topic-segment transcripts")
+    parser.add_argument("transcript_path", nargs="?", help="single transcript to segment (backend upload)")
+    parser.add_argument("--text-tiling", action="store_true",
+                        help="also run NLTK TextTiling and store its segments as tt_segments")
+    args = parser.parse_args()
+
+    if args.transcript_path:
+        segment_single_file(args.transcript_path, text_tiling=args.text_tiling)
     else:
-        segment_all_files()
+        segment_all_files(text_tiling=args.text_tiling)
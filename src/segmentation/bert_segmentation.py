@@ -1,15 +1,34 @@
-from sentence_transformers import SentenceTransformer
-from nltk.tokenize import sent_tokenize
-from sklearn.metrics.pairwise import cosine_similarity
-import nltk
+from bisect import bisect_left, insort
 
-nltk.download("punkt", quiet=True)
+import numpy as np
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+from src.utils import model_registry, instrumentation
 
-def bert_topic_segments(text, threshold=0.55):
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Sentences per forward pass when encoding
+ENCODE_BATCH_SIZE = 64
+
+
+def _load_sentence_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(MODEL_NAME)
+
+
+model_registry.register("minilm", _load_sentence_model)
+
+
+def get_model():
+    """The shared MiniLM sentence encoder, loaded on first use."""
+    return model_registry.get("minilm")
+
+
+def split_sentences(text):
+    from nltk.tokenize import sent_tokenize
+
+    model_registry.ensure_nltk_data("tokenizers/punkt", "punkt")
     sentences = sent_tokenize(text)
-    
+
     # Fallback for unpunctuated text (Vosk Small)
     if len(sentences) <= 1:
         words = text.split()
@@ -17,20 +36,165 @@ def bert_topic_segments(text, threshold=0.55):
              # Chunk into 20-word pseudo-sentences
              chunk_size = 20
              sentences = [" ".join(words[i:i+chunk_size]) for i in range(0, len(words), chunk_size)]
-    embeddings = model.encode(sentences)
+    return sentences
+
+
+def normalize_rows(embeddings):
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+
+def adjacent_similarities(unit):
+    """Cosine similarity of every sentence with the previous one: sims[i-1] is gap i."""
+    return np.einsum("ij,ij->i", unit[1:], unit[:-1])
+
+
+def block_similarities(unit, window):
+    """
+    Cosine similarity between the `window` sentences before and after each
+    gap, using the summed (unnormalised mean) block vectors. Block sums come
+    from one cumulative sum, so this is O(n * dim) whatever the window.
+    """
+    n = len(unit)
+    csum = np.vstack([np.zeros((1, unit.shape[1]), dtype=unit.dtype), np.cumsum(unit, axis=0)])
+
+    gaps = np.arange(1, n)
+    left = csum[gaps] - csum[np.maximum(gaps - window, 0)]
+    right = csum[np.minimum(gaps + window, n)] - csum[gaps]
+
+    return np.einsum("ij,ij->i", normalize_rows(left), normalize_rows(right))
+
+
+def depth_scores(sims):
+    """
+    TextTiling depth of each gap: how far the similarity dips below the
+    nearest peak on each side (climbing while the curve keeps rising).
+    """
+    n = len(sims)
+    left_peak = np.empty(n, dtype=np.float32)
+    right_peak = np.empty(n, dtype=np.float32)
+
+    for i in range(n):
+        if i > 0 and sims[i - 1] >= sims[i]:
+            left_peak[i] = max(left_peak[i - 1], sims[i])
+        else:
+            left_peak[i] = sims[i]
+
+    for i in range(n - 1, -1, -1):
+        if i < n - 1 and sims[i + 1] >= sims[i]:
+            right_peak[i] = max(right_peak[i + 1], sims[i])
+        else:
+            right_peak[i] = sims[i]
+
+    return (left_peak - sims) + (right_peak - sims)
+
+
+def enforce_lengths(candidates, strengths, n, min_sentences=1, max_sentences=None):
+    """
+    Pick boundaries from candidate gaps, strongest first, so that every
+    segment has at least min_sentences; then split any segment longer than
+    max_sentences at its strongest inner gap (or evenly if none fits).
+    strengths holds a score for every gap 1..n-1 (index gap - 1).
+    """
+    accepted = []
+    for gap in sorted(candidates, key=lambda g: -strengths[g - 1]):
+        pos = bisect_left(accepted, gap)
+        prev_gap = accepted[pos - 1] if pos > 0 else 0
+        next_gap = accepted[pos] if pos < len(accepted) else n
+        if gap - prev_gap >= min_sentences and next_gap - gap >= min_sentences:
+            insort(accepted, gap)
+
+    if not max_sentences:
+        return accepted
+
+    result = []
+    bounds = [0] + accepted + [n]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        stack = [(start, end)]
+        while stack:
+            s, e = stack.pop()
+            if e - s <= max_sentences:
+                if e < n:
+                    result.append(e)
+                continue
+            lo, hi = s + min_sentences, e - min_sentences
+            if lo <= hi:
+                inner = strengths[lo - 1:hi]
+                split = lo + int(np.argmax(inner))
+            else:
+                split = s + max_sentences
+            stack.append((split, e))
+            stack.append((s, split))
+
+    return sorted(set(result))
+
+
+def segment_boundaries(embeddings, method="threshold", threshold=0.55, window=3,
+                       min_sentences=1, max_sentences=None):
+    """
+    Gap indices i (a new segment starts at sentence i) for an embedding matrix.
+
+    method="threshold": split wherever adjacent sentences are less similar
+    than threshold (the original behaviour).
+    method="depth": compare `window`-sentence blocks on each side of every
+    gap and split at similarity valleys deeper than the mean valley depth.
+    """
+    n = len(embeddings)
+    if n < 2:
+        return []
+
+    unit = normalize_rows(embeddings)
+
+    if method == "threshold":
+        sims = adjacent_similarities(unit)
+        strengths = threshold - sims
+        candidates = (np.nonzero(sims < threshold)[0] + 1).tolist()
+    elif method == "depth":
+        sims = block_similarities(unit, window)
+        strengths = depth_scores(sims)
+
+        # Only valleys of the similarity curve can be boundaries, and only
+        # the ones deeper than the average valley.
+        valley = np.ones(len(sims), dtype=bool)
+        valley[1:] &= sims[1:] <= sims[:-1]
+        valley[:-1] &= sims[:-1] <= sims[1:]
+        depths = strengths[valley]
+        cutoff = depths.mean()
+        candidates = (np.nonzero(valley & (strengths > cutoff))[0] + 1).tolist()
+    else:
+        raise ValueError(f"Unknown segmentation method: {method}")
+
+    if min_sentences <= 1 and not max_sentences:
+        return candidates
+    return enforce_lengths(candidates, strengths, n, min_sentences, max_sentences)
+
+
+def topic_segments_with_embeddings(text, threshold=0.55, method="threshold", window=3,
+                                   min_sentences=1, max_sentences=None,
+                                   batch_size=ENCODE_BATCH_SIZE):
+    """
+    Same segmentation as bert_topic_segments, but also returns what was
+    computed on the way: the sentences, their embedding matrix and each
+    segment's (first_sentence, end_sentence) span into both.
+    """
+    sentences = split_sentences(text)
+    with model_registry.lock("minilm"), instrumentation.timer("minilm.encode", items=len(sentences)):
+        embeddings = get_model().encode(sentences, batch_size=batch_size)
 
-    segments = []
-    current_segment = [sentences[0]]
+    boundaries = segment_boundaries(
+        embeddings, method=method, threshold=threshold, window=window,
+        min_sentences=min_sentences, max_sentences=max_sentences
+    )
 
-    for i in range(1, len(sentences)):
-        sim = cosine_similarity([embeddings[i]], [embeddings[i-1]])[0][0]
+    starts = [0] + boundaries
+    ends = boundaries + [len(sentences)]
+    spans = list(zip(starts, ends))
 
-        # Topic shift detected
-        if sim < threshold:
-            segments.append(" ".join(current_segment))
-            current_segment = []
+    segments = [" ".join(sentences[start:end]) for start, end in spans]
+    return segments, sentences, embeddings, spans
 
-        current_segment.append(sentences[i])
 
-    segments.append(" ".join(current_segment))
-    return segments
+def bert_topic_segments(text, threshold=0.55, **kwargs):
+    return topic_segments_with_embeddings(text, threshold, **kwargs)[0]
@@ -0,0 +1,71 @@
+"""
+Sentence embeddings kept next to a segment file, so later steps (keywords,
+search, clustering) can reuse them instead of re-encoding the episode.
+
+For data/segments/<id>.json the sidecar is three .npy files:
+
+    <id>.sentences.npy   (n_sentences, dim)  sentence embeddings
+    <id>.segments.npy    (n_segments, dim)   mean-pooled embedding per segment
+    <id>.offsets.npy     (n_segments + 1,)   segment i owns sentence rows
+                                             offsets[i]:offsets[i+1]
+
+Readers open them with np.load(mmap_mode="r"), so slicing one segment only
+pages in that segment's rows.
+"""
+import os
+import numpy as np
+
+# float16 halves the size of MiniLM vectors with no effect on cosine ranking
+EMBEDDING_DTYPE = np.float16
+
+SIDECAR_PARTS = ("sentences", "segments", "offsets")
+
+
+def sidecar_paths(segment_dir, file_id):
+    return {part: os.path.join(segment_dir, f"{file_id}.{part}.npy") for part in SIDECAR_PARTS}
+
+
+def has_embeddings(segment_dir, file_id):
+    return all(os.path.isfile(p) for p in sidecar_paths(segment_dir, file_id).values())
+
+
+def pool_segments(sentence_embeddings, spans):
+    """Mean of each segment's sentence embeddings (float32)."""
+    sentence_embeddings = np.asarray(sentence_embeddings, dtype=np.float32)
+    if not spans:
+        return np.zeros((0, sentence_embeddings.shape[-1]), dtype=np.float32)
+    return np.vstack([
+        sentence_embeddings[start:end].mean(axis=0) if end > start
+        else np.zeros(sentence_embeddings.shape[-1], dtype=np.float32)
+        for start, end in spans
+    ])
+
+
+def save_embeddings(segment_dir, file_id, sentence_embeddings, spans, dtype=EMBEDDING_DTYPE):
+    paths = sidecar_paths(segment_dir, file_id)
+
+    offsets = np.array([start for start, _ in spans] + [spans[-1][1] if spans else 0], dtype=np.int64)
+
+    np.save(paths["sentences"], np.asarray(sentence_embeddings).astype(dtype))
+    np.save(paths["segments"], pool_segments(sentence_embeddings, spans).astype(dtype))
+    np.save(paths["offsets"], offsets)
+
+    return paths
+
+
+def load_embeddings(segment_dir, file_id):
+    """Memory-mapped sidecar arrays keyed by part name."""
+    return {
+        part: np.load(path, mmap_mode="r")
+        for part, path in sidecar_paths(segment_dir, file_id).items()
+    }
+
+
+def segment_sentence_vectors(store, segment_index):
+    """Sentence embeddings of one segment (0-based) as a view into the mmap."""
+    offsets = store["offsets"]
+    return store["sentences"][offsets[segment_index]:offsets[segment_index + 1]]
+
+
+def segment_vector(store, segment_index):
+    return store["segments"][segment_index]
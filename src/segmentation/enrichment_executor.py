@@ -0,0 +1,186 @@
+"""
+Concurrent enrichment of many segment files.
+
+Every file's segments go through three stages that run side by side, each
+on its own thread pool with its own worker budget:
+
+    summaries   summarize_segments over each file's segments, for every file
+                loaded since the last summary task went out (the extractive
+                backend also gets each file's sentence embeddings)
+    keywords    keyword_extractor_batch over batches of KEYWORD_BATCH segments
+    sentiment   VADER over batches of SENTIMENT_BATCH segments
+
+BART and MiniLM spend their time in torch, which releases the GIL, so
+keywords and sentiment no longer wait behind the summarizer, and the next
+file's keywords run while the current one is still being summarized. Up to
+MAX_FILES files are in flight at once. Each file is written (and added to
+the search index) as soon as its three stages are done, with records built
+by enrich_segments.
+
+While the summarizer is busy, newly loaded files queue their segments and
+the next summary task takes all of them; the first task covers every file
+loaded up front. Inside a task each file is still summarized on its own:
+summarize_segments sorts by length and pads each batch, and padded BART
+batches do not always decode like the same inputs padded differently, so
+mixing files would change summaries compared with enriching one file at a
+time.
+
+The summary and keyword models are shared by their stage's threads, and
+each call into a model holds model_registry.lock, since a Hugging Face fast
+tokenizer cannot be used by two threads at once. One worker per stage is
+the default: torch already uses every core for a single call, so more
+workers only queue up on the model's lock.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from src.segmentation import batch_keyword_summarizer as enrichment
+from src.utils import stage_cache, instrumentation
+
+SUMMARY_WORKERS = 1
+KEYWORD_WORKERS = 1
+SENTIMENT_WORKERS = 1
+
+KEYWORD_BATCH = 64
+SENTIMENT_BATCH = 256
+
+# Segment files loaded and waiting on their stages at the same time
+MAX_FILES = 4
+
+
+def _batches(texts, size):
+    return [(offset, texts[offset:offset + size]) for offset in range(0, len(texts), size)]
+
+
+def _run(stage, func, texts, files, parent):
+    with instrumentation.span(f"enrichment.{stage}", parent=parent, file=files) as span:
+        span.items = len(texts)
+        return func(texts)
+
+
+def _summarize_files(queued):
+    """Summaries of queued (file number, texts, sentence vectors) entries, one summarize_segments call per file."""
+    summaries = []
+    for _, texts, vectors in queued:
+        if vectors is None:
+            summaries += enrichment.summarize_segments(texts)
+        else:
+            summaries += enrichment.summarize_segments(texts, sentence_vectors=vectors)
+    return summaries
+
+
+def enrich_files(segment_filenames, use_cache=True, summary_workers=None, keyword_workers=None,
+                 sentiment_workers=None, max_files=None):
+    """
+    Enriches segment files concurrently (see the module docstring) and
+    returns the output paths in input order. If a stage fails, the files
+    that already completed stay written and the error is raised.
+    """
+    max_files = max_files or MAX_FILES
+    paths = [None] * len(segment_filenames)
+    upcoming = iter(enumerate(segment_filenames))
+    in_flight = {}
+    # future -> [(file number, stage, offset, count)]: where its results go
+    pending = {}
+    # (file number, texts, sentence vectors or None) waiting for the next summary task
+    summary_queue = []
+
+    with instrumentation.span("enrichment", files=len(segment_filenames)) as span, \
+            ThreadPoolExecutor(summary_workers or SUMMARY_WORKERS, thread_name_prefix="summaries") as summary_pool, \
+            ThreadPoolExecutor(keyword_workers or KEYWORD_WORKERS, thread_name_prefix="keywords") as keyword_pool, \
+            ThreadPoolExecutor(sentiment_workers or SENTIMENT_WORKERS, thread_name_prefix="sentiment") as sentiment_pool:
+
+        def finish(n, bert_segments, file_name, summaries, keywords, sentiments):
+            name = segment_filenames[n]
+            output = enrichment.enrich_segments(bert_segments, file_name, summaries, keywords, sentiments)
+            if use_cache:
+                stage_cache.put("enrichment", enrichment.enrichment_cache_key(bert_segments), output)
+            paths[n] = enrichment.write_output(name, output)
+            enrichment.update_search_index([name])
+
+        def start_next():
+            """Loads files until one has stage work queued. False when none are left."""
+            for n, name in upcoming:
+                bert_segments, file_name = enrichment.load_segment_file(name)
+
+                cached = (stage_cache.get("enrichment", enrichment.enrichment_cache_key(bert_segments))
+                          if use_cache else None)
+                if cached is not None:
+                    print(f"Using cached enrichment for {name}")
+                    # Same segments under a new upload name: only the file field differs
+                    paths[n] = enrichment.write_output(name, [{**record, "file": file_name} for record in cached])
+                    enrichment.update_search_index([name])
+                    continue
+
+                texts = [enrichment.segment_fields(i, seg)[0] for i, seg in enumerate(bert_segments)]
+                if not texts:
+                    finish(n, bert_segments, file_name, [], [], [])
+                    continue
+
+                file_id = name.rsplit(".", 1)[0]
+                state = {
+                    "segments": bert_segments,
+                    "file": file_name,
+                    "summaries": [None] * len(texts),
+                    "keywords": [None] * len(texts),
+                    "sentiment": [None] * len(texts),
+                    "left": 1,
+                }
+                summary_queue.append((n, texts, enrichment.summary_sentence_vectors(name, len(texts))))
+
+                tasks = [("keywords", keyword_pool, enrichment.keyword_extractor_batch, offset, batch)
+                         for offset, batch in _batches(texts, KEYWORD_BATCH)]
+                tasks += [("sentiment", sentiment_pool, enrichment.sentiment_scores, offset, batch)
+                          for offset, batch in _batches(texts, SENTIMENT_BATCH)]
+                for stage, pool, func, offset, batch in tasks:
+                    future = pool.submit(_run, stage, func, batch, file_id, span)
+                    pending[future] = [(n, stage, offset, len(batch))]
+                state["left"] += len(tasks)
+                in_flight[n] = state
+                return True
+            return False
+
+        def fill():
+            while len(in_flight) < max_files and start_next():
+                pass
+            summaries_running = any(parts[0][1] == "summaries" for parts in pending.values())
+            if summary_queue and not summaries_running:
+                submit_summaries()
+
+        def submit_summaries():
+            queued = summary_queue[:]
+            del summary_queue[:]
+
+            texts = [text for _, file_texts, _ in queued for text in file_texts]
+            files = [segment_filenames[n].rsplit(".", 1)[0] for n, _, _ in queued]
+            future = summary_pool.submit(_run, "summaries", lambda texts: _summarize_files(queued), texts,
+                                         files[0] if len(files) == 1 else files, span)
+            pending[future] = [(n, "summaries", 0, len(file_texts)) for n, file_texts, _ in queued]
+
+        try:
+            fill()
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    parts = pending.pop(future)
+                    results = future.result()
+
+                    position = 0
+                    for n, stage, offset, count in parts:
+                        state = in_flight[n]
+                        state[stage][offset:offset + count] = results[position:position + count]
+                        position += count
+                        state["left"] -= 1
+                        if state["left"] == 0:
+                            del in_flight[n]
+                            finish(n, state["segments"], state["file"],
+                                   state["summaries"], state["keywords"], state["sentiment"])
+                fill()
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+        span.items = sum(1 for path in paths if path is not None)
+
+    return paths
@@ -1,13 +1,117 @@
-from keybert import KeyBERT
-
-# Load model once
-kw_model = KeyBERT()
-
-def keyword_extractor(text, top_k=8):
-    keywords = kw_model.extract_keywords(
-        text, 
-        keyphrase_ngram_range=(1, 2), 
-        stop_words='english', 
-        top_n=top_k
-    )
-    return [kw[0] for kw in keywords]
\ No newline at end of file
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Same MiniLM instance the segmenter uses, instead of a second copy
+from src.segmentation.bert_segmentation import get_model as get_sentence_model
+from src.utils import model_registry, instrumentation
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+TOP_K = 8
+NGRAM_RANGE = (1, 2)
+STOP_WORDS = "english"
+
+# Candidate phrases repeat across segments and episodes ("mental health",
+# "last week", ...), so their embeddings are kept up to this many phrases.
+# The cache lives as long as the worker; stored as float16, 20k phrases of
+# MiniLM vectors take about 15 MB.
+PHRASE_CACHE_SIZE = int(os.environ.get("KEYWORD_PHRASE_CACHE", 20_000))
+
+_phrase_embeddings = OrderedDict()
+# Keyword batches may run on several enrichment threads
+_phrase_lock = threading.Lock()
+
+
+def _load_kw_model():
+    from keybert import KeyBERT
+    return KeyBERT(model=get_sentence_model())
+
+
+model_registry.register("keybert", _load_kw_model)
+
+
+def get_kw_model():
+    return model_registry.get("keybert")
+
+
+def keyword_extractor(text, top_k=TOP_K):
+    # KeyBERT wraps the shared MiniLM instance
+    with model_registry.lock("minilm"), instrumentation.timer("keybert.extract_keywords", items=1):
+        keywords = get_kw_model().extract_keywords(
+            text,
+            keyphrase_ngram_range=NGRAM_RANGE,
+            stop_words=STOP_WORDS,
+            top_n=top_k
+        )
+    return [kw[0] for kw in keywords]
+
+
+def embed_phrases(phrases):
+    """Embeddings for phrases, encoding only the ones not seen before."""
+    with _phrase_lock:
+        missing = [p for p in phrases if p not in _phrase_embeddings]
+        if missing:
+            with model_registry.lock("minilm"), instrumentation.timer("minilm.encode", items=len(missing)):
+                vectors = get_sentence_model().encode(missing)
+            for phrase, vector in zip(missing, np.asarray(vectors, dtype=np.float16)):
+                _phrase_embeddings[phrase] = vector
+            while len(_phrase_embeddings) > PHRASE_CACHE_SIZE:
+                _phrase_embeddings.popitem(last=False)
+
+        return np.vstack([_phrase_embeddings[p] for p in phrases]).astype(np.float32)
+
+
+def keyword_extractor_batch(texts, top_k=TOP_K, doc_embeddings=None):
+    """
+    Keywords for many texts in one KeyBERT pass.
+
+    Candidate n-grams are collected over all texts with one vectorizer and
+    embedded through the phrase cache; documents are embedded in one call
+    unless doc_embeddings (one row per text) is given. Each text gets the
+    same keywords keyword_extractor would return for it on its own, up to
+    ties that the float16 phrase cache rounds differently.
+    """
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    results = [[] for _ in texts]
+
+    idx = [i for i, text in enumerate(texts) if text.strip()]
+    if not idx:
+        return results
+    docs = [texts[i] for i in idx]
+
+    vectorizer = CountVectorizer(ngram_range=NGRAM_RANGE, stop_words=STOP_WORDS)
+    try:
+        vectorizer.fit(docs)
+    except ValueError:
+        # Only stop words: no candidates anywhere
+        return results
+
+    word_embeddings = embed_phrases(list(vectorizer.get_feature_names_out()))
+
+    if doc_embeddings is None:
+        with model_registry.lock("minilm"), instrumentation.timer("minilm.encode", items=len(docs)):
+            doc_embeddings = get_sentence_model().encode(docs)
+    else:
+        doc_embeddings = np.asarray(doc_embeddings)[idx]
+
+    with model_registry.lock("minilm"), instrumentation.timer("keybert.extract_keywords", items=len(docs)):
+        keywords = get_kw_model().extract_keywords(
+            docs,
+            keyphrase_ngram_range=NGRAM_RANGE,
+            stop_words=STOP_WORDS,
+            top_n=top_k,
+            vectorizer=vectorizer,
+            doc_embeddings=doc_embeddings,
+            word_embeddings=word_embeddings
+        )
+    # KeyBERT unwraps the list when there is a single document
+    if len(docs) == 1:
+        keywords = [keywords]
+
+    for i, doc_keywords in zip(idx, keywords):
+        results[i] = [kw[0] for kw in doc_keywords]
+
+    return results
@@ -1,26 +1,251 @@
-from transformers import pipeline
+"""
+Segment summaries, from one of three backends with the same contract:
 
-summarizer = pipeline("summarization", model="philschmid/bart-large-cnn-samsum")
+    bart        philschmid/bart-large-cnn-samsum, full precision (default)
+    bart-int8   the same model with its Linear layers dynamically quantized
+                to int8: smaller and faster on CPU, slightly different text
+    extractive  no generation: the segment's most central sentences (closest
+                to the mean MiniLM embedding), in their original order
 
-def summarize_segment(text):
+SUMMARY_BACKEND picks the backend for the pipeline; summarize_segment and
+summarize_segments also take backend= to override it per call. Only the
+selected backend's model is registered at import, so preloading the models
+does not load BART twice, or at all for the extractive backend.
+"""
+import os
+
+from src.utils import model_registry, instrumentation
+
+MODEL_NAME = "philschmid/bart-large-cnn-samsum"
+
+BACKENDS = ("bart", "bart-int8", "extractive")
+BACKEND = os.environ.get("SUMMARY_BACKEND", "bart")
+
+MAX_LENGTH = 90
+MIN_LENGTH = 5
+
+# Inputs per forward pass in summarize_segments
+BATCH_SIZE = 8
+
+# Extractive summaries: at most this many sentences and (past the first) words
+EXTRACTIVE_SENTENCES = 3
+EXTRACTIVE_MAX_WORDS = 60
+
+
+def _load_summarizer():
+    from transformers import pipeline
+    return pipeline("summarization", model=MODEL_NAME)
+
+
+def _load_quantized_summarizer():
+    import torch
+
+    summarizer = _load_summarizer()
+    summarizer.model = torch.quantization.quantize_dynamic(
+        summarizer.model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return summarizer
+
+
+# Registry name and loader of each generative backend
+_MODELS = {
+    "bart": _load_summarizer,
+    "bart-int8": _load_quantized_summarizer,
+}
+
+
+def _backend(backend=None):
+    backend = backend or BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown summary backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+    return backend
+
+
+def backend_model(backend=None):
+    """Registry name of the backend's model (None for extractive, which uses MiniLM)."""
+    backend = _backend(backend)
+    if backend in _MODELS:
+        model_registry.register(backend, _MODELS[backend])
+        return backend
+    return None
+
+
+def model_id(backend=None):
+    """What produced the summaries, for cache keys."""
+    backend = _backend(backend)
+    if backend == "bart":
+        return MODEL_NAME
+    if backend == "bart-int8":
+        return f"{MODEL_NAME}+qint8"
+    from src.segmentation.bert_segmentation import MODEL_NAME as SENTENCE_MODEL
+    return f"extractive:{SENTENCE_MODEL}:{EXTRACTIVE_SENTENCES}:{EXTRACTIVE_MAX_WORDS}"
+
+
+if BACKEND in _MODELS:
+    model_registry.register(BACKEND, _MODELS[BACKEND])
+
+
+def get_summarizer(backend=None):
+    name = backend_model(backend)
+    if name is None:
+        raise ValueError("The extractive backend has no summarization model")
+    return model_registry.get(name)
+
+
+def _is_too_short(text):
     # Heuristic: If text is extremely short, just return it
-    if len(text.split()) < 3:
+    return len(text.split()) < 3
+
+
+def _clean_summary(text, summary):
+    # Fallback if summary is garbage (e.g. ".")
+    if len(summary) < 5 or not any(c.isalpha() for c in summary):
+        return text
+    return summary
+
+
+def central_sentences(sentences, embeddings, max_sentences=EXTRACTIVE_SENTENCES,
+                      max_words=EXTRACTIVE_MAX_WORDS):
+    """
+    Indices, in text order, of the sentences most similar to the mean of
+    the (normalized) embeddings. The most central sentence is always kept;
+    the others only while they fit in max_words, and never all of them.
+    """
+    import numpy as np
+    from src.segmentation.bert_segmentation import normalize_rows
+
+    unit = normalize_rows(embeddings)
+    scores = unit @ unit.mean(axis=0)
+
+    limit = max(1, min(max_sentences, len(sentences) - 1))
+    chosen = []
+    words = 0
+    for i in np.argsort(-scores, kind="stable"):
+        if len(chosen) == limit:
+            break
+        n = len(sentences[i].split())
+        if chosen and words + n > max_words:
+            continue
+        chosen.append(int(i))
+        words += n
+    return sorted(chosen)
+
+
+def _summarize_extractive(texts, sentence_vectors=None):
+    """
+    Extractive summaries. sentence_vectors[i], if given, holds the MiniLM
+    embeddings of text i's sentences from segmentation (see embedding_store);
+    texts without them, or whose sentences no longer match them, are
+    encoded here in one call.
+    """
+    from src.segmentation.bert_segmentation import split_sentences, get_model, ENCODE_BATCH_SIZE
+
+    summaries = list(texts)
+    sentences = {}
+    vectors = {}
+    for i, text in enumerate(texts):
+        if _is_too_short(text):
+            continue
+        split = split_sentences(text)
+        if len(split) < 2:
+            continue
+        sentences[i] = split
+        given = sentence_vectors[i] if sentence_vectors is not None else None
+        if given is not None and len(given) == len(split):
+            vectors[i] = given
+
+    missing = [i for i in sentences if i not in vectors]
+    if missing:
+        batch = [s for i in missing for s in sentences[i]]
+        # Same MiniLM instance the keyword threads encode with
+        with model_registry.lock("minilm"), instrumentation.timer("minilm.encode", items=len(batch)):
+            encoded = get_model().encode(batch, batch_size=ENCODE_BATCH_SIZE)
+        offset = 0
+        for i in missing:
+            vectors[i] = encoded[offset:offset + len(sentences[i])]
+            offset += len(sentences[i])
+
+    with instrumentation.timer("extractive.summarize", items=len(sentences)):
+        for i, split in sentences.items():
+            summaries[i] = " ".join(split[j] for j in central_sentences(split, vectors[i]))
+    return summaries
+
+
+def summarize_segment(text, backend=None, sentence_vectors=None):
+    if _is_too_short(text):
         return text
 
+    backend = _backend(backend)
     try:
-        result = summarizer(
-            text,
-            max_length=90,
-            min_length=5,
-            do_sample=False
-        )
-        summary = result[0]["summary_text"]
-        
-        # Fallback if summary is garbage (e.g. ".")
-        if len(summary) < 5 or not any(c.isalpha() for c in summary):
-            return text
-            
-        return summary
+        if backend == "extractive":
+            return _summarize_extractive([text], [sentence_vectors])[0]
+
+        summarizer = get_summarizer(backend)
+        with model_registry.lock(backend), instrumentation.timer(f"{backend}.summarize", items=1):
+            result = summarizer(
+                text,
+                max_length=MAX_LENGTH,
+                min_length=MIN_LENGTH,
+                do_sample=False
+            )
+        return _clean_summary(text, result[0]["summary_text"])
     except Exception:
         # Fallback on error
-        return text
\ No newline at end of file
+        return text
+
+
+def summarize_segments(texts, batch_size=BATCH_SIZE, backend=None, sentence_vectors=None):
+    """
+    Summarize many texts with batched pipeline calls.
+
+    Inputs are sorted by token length before batching so each batch pads to
+    a similar length. Every item keeps summarize_segment's contract: short
+    texts and garbage summaries fall back to the text itself, and if a batch
+    fails its items are retried one at a time so one bad input only falls
+    back for itself. Results are returned in input order.
+
+    The extractive backend has no batches; sentence_vectors (one entry per
+    text, or None) lets it reuse the embeddings from segmentation.
+    """
+    backend = _backend(backend)
+    if backend == "extractive":
+        try:
+            return _summarize_extractive(texts, sentence_vectors)
+        except Exception:
+            # Per text, so one bad input only falls back for itself
+            vectors = sentence_vectors if sentence_vectors is not None else [None] * len(texts)
+            return [summarize_segment(text, backend, v) for text, v in zip(texts, vectors)]
+
+    summaries = list(texts)
+
+    todo = [i for i, text in enumerate(texts) if not _is_too_short(text)]
+    if not todo:
+        return summaries
+
+    summarizer = get_summarizer(backend)
+    with model_registry.lock(backend):
+        token_counts = summarizer.tokenizer([texts[i] for i in todo])["input_ids"]
+    lengths = {i: len(ids) for i, ids in zip(todo, token_counts)}
+    order = sorted(todo, key=lambda i: lengths[i])
+
+    for b in range(0, len(order), batch_size):
+        batch = order[b:b + batch_size]
+
+        try:
+            with model_registry.lock(backend), instrumentation.timer(f"{backend}.summarize", items=len(batch)):
+                results = summarizer(
+                    [texts[i] for i in batch],
+                    max_length=MAX_LENGTH,
+                    min_length=MIN_LENGTH,
+                    do_sample=False,
+                    batch_size=len(batch)
+                )
+        except Exception:
+            for i in batch:
+                summaries[i] = summarize_segment(texts[i], backend)
+            continue
+
+        for i, result in zip(batch, results):
+            summaries[i] = _clean_summary(texts[i], result["summary_text"])
+
+    return summaries
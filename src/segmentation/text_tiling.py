@@ -1,10 +1,12 @@
-import nltk
-from nltk.tokenize import TextTilingTokenizer
+from src.utils import model_registry
 
-nltk.download("punkt")
 
 def text_tiling_segments(text):
-    
+    from nltk.tokenize import TextTilingTokenizer
+
+    # TextTiling filters stop words with the NLTK corpus
+    model_registry.ensure_nltk_data("corpora/stopwords", "stopwords")
+
     text = text.replace(". ", ".\n\n")
     
     tokenizer = TextTilingTokenizer()
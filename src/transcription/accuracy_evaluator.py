@@ -1,4 +1,53 @@
+import re
 from jiwer import wer
+from rapidfuzz.distance import Levenshtein
+
+# Bracketed annotations such as "(laughter)", "[music]" or a transcription
+# service's "(Transcribed by ...)" banner are not speech
+_ANNOTATION = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+# Anything that is not a letter, digit or apostrophe separates words
+_SEPARATOR = re.compile(r"[^\w']+|_")
+
 
 def calculate_wer(true_text, predicted_text):
-    return wer(true_text, predicted_text)
\ No newline at end of file
+    return wer(true_text, predicted_text)
+
+
+def normalize_words(text):
+    """
+    Lowercased words without punctuation, so "T-shirts," and "t shirts"
+    score as the same words. Used on both sides of every comparison.
+    """
+    text = _ANNOTATION.sub(" ", text.lower().replace("’", "'"))
+    # Quotes, not contractions: 'hello' -> hello, don't stays
+    words = (w.strip("'") for w in _SEPARATOR.sub(" ", text).split())
+    return [w for w in words if w]
+
+
+def align_words(reference_words, hypothesis_words):
+    """
+    WER, error counts and the alignment of two normalized word lists. The
+    alignment is a list of (type, ref_start, ref_end, hyp_start, hyp_end)
+    with type equal/substitute/insert/delete.
+
+    This is the word-level Levenshtein alignment jiwer.process_words runs
+    (rapidfuzz opcodes over the word sequences), without jiwer
+    re-tokenizing text that is already normalized.
+    """
+    counts = {"equal": 0, "substitute": 0, "insert": 0, "delete": 0}
+    alignment = []
+    for tag, i1, i2, j1, j2 in Levenshtein.opcodes(reference_words, hypothesis_words):
+        tag = "substitute" if tag == "replace" else tag
+        counts[tag] += j2 - j1 if tag == "insert" else i2 - i1
+        alignment.append((tag, i1, i2, j1, j2))
+
+    errors = counts["substitute"] + counts["insert"] + counts["delete"]
+    return {
+        # An empty reference scores its insertions, like jiwer
+        "wer": errors / len(reference_words) if reference_words else float(errors),
+        "hits": counts["equal"],
+        "substitutions": counts["substitute"],
+        "insertions": counts["insert"],
+        "deletions": counts["delete"],
+        "alignment": alignment
+    }
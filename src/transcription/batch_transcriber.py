@@ -1,12 +1,17 @@
 import os
-import sys
-from src.transcription.vosk_transcriber import transcribe_audio
+import argparse
+from src.transcription.vosk_transcriber import (
+    transcribe_audio,
+    transcribe_audio_chunked,
+    transcribe_many,
+    compare_chunked_to_serial,
+)
 
 PROCESSED_DIR = "data/processed"
 TRANSCRIPT_DIR = "data/transcripts"
 
 
-def transcribe_single_audio(audio_path):
+def transcribe_single_audio(audio_path, chunked=False, workers=None):
     if not os.path.exists(audio_path):
         raise FileNotFoundError(f"Audio file not found: {audio_path}")
 
@@ -14,12 +19,18 @@ def transcribe_single_audio(audio_path):
     output_path = os.path.join(TRANSCRIPT_DIR, base_name + ".json")
 
     print(f"Transcribing uploaded file: {audio_path}")
-    transcribe_audio(audio_path, output_path)
+    if chunked:
+        # Long episode: split into overlapping windows transcribed in parallel
+        transcribe_audio_chunked(audio_path, output_path, workers=workers)
+    else:
+        transcribe_audio(audio_path, output_path)
+    return output_path
 
 
-def transcribe_all_audios():
+def transcribe_all_audios(workers=1, use_processes=False):
     files = os.listdir(PROCESSED_DIR)
 
+    jobs = []
     for f in files:
         if f.endswith((".wav", ".mp3")):
             input_path = os.path.join(PROCESSED_DIR, f)
@@ -27,16 +38,43 @@ def transcribe_all_audios():
             base_name = os.path.splitext(f)[0]
             output_path = os.path.join(TRANSCRIPT_DIR, base_name + ".json")
 
-            print(f"Transcribing: {f}")
+            jobs.append((input_path, output_path))
+
+    if workers == 1:
+        for input_path, output_path in jobs:
+            print(f"Transcribing: {os.path.basename(input_path)}")
             transcribe_audio(input_path, output_path)
+    else:
+        print(f"Transcribing {len(jobs)} files with {workers or os.cpu_count()} workers...")
+        results = transcribe_many(jobs, workers=workers, use_processes=use_processes)
+        failed = [r for r in results if r[2] is not None]
+        if failed:
+            print(f"\n{len(failed)} of {len(jobs)} transcriptions failed.")
+            return
 
     print("\nAll transcripts generated successfully!")
 
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
+    parser = argparse.ArgumentParser(description="Transcribe audio with Vosk")
+    parser.add_argument("audio_path", nargs="?", help="single file to transcribe (backend upload)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="parallel workers: files at once in batch mode (default 1), "
+                             "windows at once with --chunked (default one per CPU core); 0 = one per CPU core")
+    parser.add_argument("--processes", action="store_true",
+                        help="use one model per worker process instead of threads sharing one model")
+    parser.add_argument("--chunked", action="store_true",
+                        help="single file: transcribe overlapping windows in parallel processes")
+    parser.add_argument("--compare", action="store_true",
+                        help="single file: time chunked against serial transcription and report the speedup")
+    args = parser.parse_args()
+
+    if args.audio_path and args.compare:
+        compare_chunked_to_serial(args.audio_path, workers=args.workers or None)
+    elif args.audio_path:
         # 🔹 Single-file mode (backend upload)
-        transcribe_single_audio(sys.argv[1])
+        transcribe_single_audio(args.audio_path, chunked=args.chunked, workers=args.workers or None)
     else:
         # 🔹 Batch mode (existing behavior)
-        transcribe_all_audios()
+        workers = 1 if args.workers is None else args.workers
+        transcribe_all_audios(workers=workers, use_processes=args.processes)
@@ -1,61 +1,265 @@
+"""
+Word error rate of every transcript that has a ground truth text.
+
+Ground truth files (data/ground_truth/<name>.txt) are matched to transcripts
+through a name index built once per run, and pairs are scored in a process
+pool. Both sides go through the same normalization (accuracy_evaluator).
+The JSON report has, for every file, its WER, hit, substitution, insertion
+and deletion counts, and the time regions where the errors are. Times come
+from the columnar word transcript when there is one, otherwise from the
+segment timestamps.
+
+    python -m src.transcription.batch_wer_evaluator --workers 8
+"""
 import os
 import json
-from src.transcription.accuracy_evaluator import calculate_wer
+import time
+import argparse
+from functools import lru_cache
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from src.transcription.accuracy_evaluator import normalize_words, align_words
+from src.transcription import transcript_store
 
 GROUND_TRUTH_DIR = "data/ground_truth"
 TRANSCRIPT_DIR = "data/transcripts"
+REPORT_PATH = "data/reports/wer_report.json"
+
+# Errors closer than this (seconds) are reported as one region
+REGION_GAP_SECONDS = 2.0
+
 
 def load_transcript_json(path):
+    # The columnar transcript gives the same words without parsing the JSON
+    columnar = transcript_store.columnar_path(path)
+    if os.path.isfile(columnar):
+        return transcript_store.text(transcript_store.load_columnar(columnar))
+
     with open(path, "r", encoding="utf-8") as f:
         data = json.load(f)
         return " ".join([seg["text"] for seg in data["segments"]])
 
 
-def find_matching_json(txt_filename):
-    
-    base_name = txt_filename.replace(".txt", "").lower()
+def build_name_index(transcript_dir=None):
+    """
+    Lowercased transcript names -> file name, built from one listing.
+    Besides the full stem every "_"-prefix is indexed, so "bad habit"
+    finds "Bad Habit_cleaned.json". An exact stem beats a prefix, and a
+    shorter name beats a longer one.
+    """
+    transcript_dir = transcript_dir or TRANSCRIPT_DIR
+    ranked = {}
+    for file_name in sorted(os.listdir(transcript_dir)):
+        if not file_name.endswith(".json"):
+            continue
+        stem = file_name[:-len(".json")].lower()
+        parts = stem.split("_")
+        for k in range(len(parts), 0, -1):
+            key = "_".join(parts[:k])
+            rank = (k != len(parts), len(stem), file_name)
+            if key not in ranked or rank < ranked[key]:
+                ranked[key] = rank
+    return {key: rank[2] for key, rank in ranked.items()}
 
-    json_files = os.listdir(TRANSCRIPT_DIR)
 
-    for jf in json_files:
-        name_no_ext = jf.replace(".json", "").lower()
+def find_matching_json(txt_filename, index=None):
+    index = index if index is not None else build_name_index()
+    base_name = txt_filename.replace(".txt", "").lower()
 
-        
-        if base_name in name_no_ext:
-            return jf
+    match = index.get(base_name)
+    if match is not None:
+        return match
 
+    # Names that only contain the ground truth name somewhere inside
+    for file_name in sorted(set(index.values())):
+        if base_name in file_name[:-len(".json")].lower():
+            return file_name
     return None
 
 
-def evaluate_all_wer():
-    txt_files = os.listdir(GROUND_TRUTH_DIR)
+@lru_cache(maxsize=1024)
+def _reference_words(path, mtime_ns, size):
+    with open(path, "r", encoding="utf-8") as f:
+        return tuple(normalize_words(f.read()))
+
+
+def reference_words(path):
+    """Normalized ground truth words, cached per file version within a process."""
+    st = os.stat(path)
+    return list(_reference_words(path, st.st_mtime_ns, st.st_size))
+
+
+def hypothesis_words(transcript_path):
+    """
+    Normalized transcript words with a (start, end) time each, and which
+    timing was available ("words" or "segments").
+    """
+    columnar = transcript_store.columnar_path(transcript_path)
+    if os.path.isfile(columnar):
+        store = transcript_store.load_columnar(columnar)
+        raw = [(w["word"], w["start"], w["end"]) for w in transcript_store.words(store)]
+        timing = "words"
+    else:
+        with open(transcript_path, "r", encoding="utf-8") as f:
+            segments = json.load(f)["segments"]
+        raw = []
+        for seg in segments:
+            # Spread the segment's span evenly over its words
+            seg_words = seg["text"].split()
+            step = (seg["end"] - seg["start"]) / max(len(seg_words), 1)
+            for i, w in enumerate(seg_words):
+                raw.append((w, seg["start"] + i * step, seg["start"] + (i + 1) * step))
+        timing = "segments"
+
+    words = normalize_words(" ".join(w for w, _, _ in raw))
+    if len(words) == len(raw):
+        # Usual case: normalizing kept every word whole
+        return words, [(start, end) for _, start, end in raw], timing
 
-    for txt_file in txt_files:
-        if txt_file.endswith(".txt"):
+    words, times = [], []
+    for w, start, end in raw:
+        for token in normalize_words(w):
+            words.append(token)
+            times.append((start, end))
+    return words, times, timing
 
-            true_path = os.path.join(GROUND_TRUTH_DIR, txt_file)
 
-            
-            json_match = find_matching_json(txt_file)
+def error_regions(alignment, reference, hypothesis, times, gap=REGION_GAP_SECONDS):
+    """
+    Groups the non-matching alignment chunks into time regions. A deletion
+    has no transcript words, so it is placed where the next word starts.
+    """
+    regions = []
+    for tag, ref_start, ref_end, hyp_start, hyp_end in alignment:
+        if tag == "equal":
+            continue
 
-            if json_match is None:
-                print(f"❌ No matching JSON found for: {txt_file}")
-                continue
+        if hyp_end > hyp_start:
+            start, end = times[hyp_start][0], times[hyp_end - 1][1]
+        else:
+            start = end = times[hyp_start][0] if hyp_start < len(times) else (times[-1][1] if times else 0.0)
 
-            pred_path = os.path.join(TRANSCRIPT_DIR, json_match)
+        counts = {
+            "substitutions": ref_end - ref_start if tag == "substitute" else 0,
+            "insertions": hyp_end - hyp_start if tag == "insert" else 0,
+            "deletions": ref_end - ref_start if tag == "delete" else 0,
+        }
 
-            # Load ground truth text
-            with open(true_path, "r", encoding="utf-8") as f:
-                true_text = f.read()
+        last = regions[-1] if regions else None
+        if last is not None and start - last["end"] <= gap:
+            last["end"] = max(last["end"], end)
+            for key, value in counts.items():
+                last[key] += value
+            last["_ref"][1] = ref_end
+            last["_hyp"][1] = hyp_end
+        else:
+            regions.append({
+                "start": start,
+                "end": end,
+                **counts,
+                "_ref": [ref_start, ref_end],
+                "_hyp": [hyp_start, hyp_end],
+            })
 
-            # Load predicted text
-            predicted_text = load_transcript_json(pred_path)
+    for region in regions:
+        ref_start, ref_end = region.pop("_ref")
+        hyp_start, hyp_end = region.pop("_hyp")
+        region["start"] = round(region["start"], 2)
+        region["end"] = round(region["end"], 2)
+        region["reference"] = " ".join(reference[ref_start:ref_end])
+        region["hypothesis"] = " ".join(hypothesis[hyp_start:hyp_end])
+    return regions
 
-            # Calculate WER
-            score = calculate_wer(true_text, predicted_text)
 
-            print(f"WER for {txt_file.replace('.txt','')}: {score:.3f}")
+def score_pair(name, reference, transcript_path):
+    hypothesis, times, timing = hypothesis_words(transcript_path)
+    result = align_words(reference, hypothesis)
+
+    return {
+        "name": name,
+        "transcript": os.path.basename(transcript_path),
+        "reference_words": len(reference),
+        "hypothesis_words": len(hypothesis),
+        "wer": round(result["wer"], 4),
+        "hits": result["hits"],
+        "substitutions": result["substitutions"],
+        "insertions": result["insertions"],
+        "deletions": result["deletions"],
+        "timing": timing,
+        "regions": error_regions(result["alignment"], reference, hypothesis, times)
+    }
+
+
+def _score_task(args):
+    return score_pair(*args)
+
+
+def evaluate_all_wer(workers=None, output_path=None):
+    """
+    Scores every ground truth file against its transcript and writes the
+    report to output_path (REPORT_PATH by default). Returns the report.
+    """
+    output_path = output_path or REPORT_PATH
+    start = time.perf_counter()
+
+    index = build_name_index()
+    tasks = []
+    missing = []
+    for txt_file in sorted(os.listdir(GROUND_TRUTH_DIR)):
+        if not txt_file.endswith(".txt"):
+            continue
+
+        json_match = find_matching_json(txt_file, index)
+        if json_match is None:
+            print(f"❌ No matching JSON found for: {txt_file}")
+            missing.append(txt_file)
+            continue
+
+        tasks.append((
+            txt_file.replace(".txt", ""),
+            reference_words(os.path.join(GROUND_TRUTH_DIR, txt_file)),
+            os.path.join(TRANSCRIPT_DIR, json_match)
+        ))
+
+    workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+    if workers == 1:
+        files = [_score_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            files = list(executor.map(_score_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+    for f in files:
+        print(f"WER for {f['name']}: {f['wer']:.3f}")
+
+    reference_total = sum(f["reference_words"] for f in files)
+    errors = {key: sum(f[key] for f in files) for key in ("substitutions", "insertions", "deletions")}
+    report = {
+        "files": files,
+        "missing": missing,
+        "total": {
+            "files": len(files),
+            "reference_words": reference_total,
+            **errors,
+            # Corpus WER: all errors over all reference words
+            "wer": round(sum(errors.values()) / reference_total, 4) if reference_total else None
+        },
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+
+    print(f"\nCorpus WER {report['total']['wer']} over {len(files)} files "
+          f"in {report['seconds']}s, report saved to {output_path}")
+    return report
 
 
 if __name__ == "__main__":
-    evaluate_all_wer()
+    parser = argparse.ArgumentParser(description="Word error rate against data/ground_truth")
+    parser.add_argument("--workers", type=int, default=None, help="scoring processes (default one per CPU core)")
+    parser.add_argument("--output", default=REPORT_PATH, help="JSON report path")
+    args = parser.parse_args()
+
+    evaluate_all_wer(workers=args.workers, output_path=args.output)
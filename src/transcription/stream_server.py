@@ -0,0 +1,179 @@
+"""
+Local streaming transcription service.
+
+    POST /transcribe/stream?format=pcm&partials=1
+    GET  /health
+
+The request body is audio sent as it is recorded or uploaded, usually with
+Transfer-Encoding: chunked: raw 16 kHz 16-bit mono PCM (format=pcm, the
+default) or any container ffmpeg can read from a pipe (format=audio). The
+response is NDJSON, one stream_recognize event per line, flushed as soon as
+Vosk produces it:
+
+    {"type": "partial", "text": "the wolves", "chunk": 12, "audio_seconds": 3.0, "latency_ms": 4.1}
+    {"type": "final", "text": "the wolves came back", "words": [...], ...}
+
+chunk counts the PCM chunks recognized so far, so a client that remembers
+when it sent each chunk can measure end-to-end latency per chunk.
+
+    python -m src.transcription.stream_server --port 5002
+"""
+import os
+import json
+import argparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from src.transcription import vosk_transcriber
+
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("STREAM_PORT", 5002))
+MODEL_PATH = os.environ.get("VOSK_MODEL_PATH", vosk_transcriber.MODEL_PATH)
+
+
+def read_body(rfile, headers, read_size=vosk_transcriber.READ_SIZE):
+    """
+    Yields the request body in pieces of at most read_size bytes as they
+    arrive, decoding Transfer-Encoding: chunked when the client used it.
+    """
+    if "chunked" in headers.get("Transfer-Encoding", "").lower():
+        while True:
+            size_line = rfile.readline()
+            if not size_line:
+                raise ValueError("Request body ended before the last chunk")
+            size = int(size_line.split(b";")[0].strip(), 16)
+            if size == 0:
+                # Trailers, up to the blank line
+                while rfile.readline() not in (b"\r\n", b"\n", b""):
+                    pass
+                return
+            while size > 0:
+                data = rfile.read(min(size, read_size))
+                if not data:
+                    raise ValueError("Request body ended inside a chunk")
+                size -= len(data)
+                yield data
+            rfile.readline()
+    else:
+        remaining = int(headers.get("Content-Length", 0))
+        while remaining > 0:
+            data = rfile.read(min(remaining, read_size))
+            if not data:
+                raise ValueError("Request body ended early")
+            remaining -= len(data)
+            yield data
+
+
+def whole_samples(chunks):
+    """
+    Re-aligns PCM chunks to whole 16-bit samples. Transfer chunks can have
+    an odd byte count (a proxy forwards whatever arrived on the socket), and
+    Vosk drops a trailing odd byte, which would shift every later sample.
+    The odd byte is carried over to the next chunk instead.
+    """
+    carry = b""
+    for data in chunks:
+        data = carry + data
+        end = len(data) - len(data) % 2
+        carry = data[end:]
+        if end:
+            yield data[:end]
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    # Chunked responses need HTTP/1.1
+    protocol_version = "HTTP/1.1"
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(payload)
+        self.close_connection = True
+
+    def write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            self.send_json(200, {"ok": True, "model_loaded": bool(vosk_transcriber._models)})
+        else:
+            self.send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/transcribe/stream":
+            self.send_json(404, {"error": f"Unknown path: {url.path}"})
+            return
+
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        audio_format = params.get("format", "pcm")
+        if audio_format not in ("pcm", "audio"):
+            self.send_json(400, {"error": "format must be pcm or audio"})
+            return
+        partials = params.get("partials", "1") not in ("0", "false")
+
+        try:
+            model = vosk_transcriber.get_model(MODEL_PATH)
+        except FileNotFoundError as e:
+            self.send_json(503, {"error": str(e)})
+            return
+
+        chunks = read_body(self.rfile, self.headers)
+        if audio_format == "audio":
+            chunks = vosk_transcriber.decode_stream(chunks)
+        else:
+            chunks = whole_samples(chunks)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            for event in vosk_transcriber.stream_recognize(chunks, model, partials=partials):
+                self.write_chunk(json.dumps(event).encode("utf-8") + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away; nothing left to answer
+            return
+        except Exception as e:
+            # Headers are already sent, so the error is the last event
+            self.write_chunk(json.dumps({"type": "error", "error": str(e)}).encode("utf-8") + b"\n")
+
+        self.write_chunk(b"")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host=HOST, port=PORT):
+    server = ThreadingHTTPServer((host, port), StreamHandler)
+    print(f"Streaming transcription service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming transcription service")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--model", default=MODEL_PATH, help="Vosk model directory")
+    parser.add_argument("--preload", action="store_true", help="load the model before accepting requests")
+    args = parser.parse_args()
+
+    MODEL_PATH = args.model
+    if args.preload:
+        vosk_transcriber.get_model(MODEL_PATH)
+
+    serve(args.host, args.port)
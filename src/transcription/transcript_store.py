@@ -0,0 +1,143 @@
+"""
+Columnar word-level transcript, written next to data/transcripts/<id>.json.
+
+The JSON transcript only keeps grouped segments. <id>.words keeps every
+Vosk word with its timing in one binary file:
+
+    header      magic, n_words, n_segments, vocab_bytes   (struct "<4sIII")
+    vocab       distinct words, UTF-8, newline-joined, padded to 8 bytes
+    start       float32[n_words]   seconds
+    end         float32[n_words]   seconds
+    conf        float16[n_words]   padded to 4 bytes
+    word        uint32[n_words]    index into vocab
+    segments    uint32[n_segments + 1]   segment i owns words
+                                         segments[i]:segments[i+1]
+
+Readers open the columns with np.memmap, so a time-range lookup is a
+binary search over start/end and only pages in the words it returns.
+"""
+import os
+import struct
+import numpy as np
+
+SUFFIX = ".words"
+MAGIC = b"PTW1"
+HEADER = struct.Struct("<4sIII")
+
+
+def columnar_path(transcript_path):
+    return os.path.splitext(transcript_path)[0] + SUFFIX
+
+
+def _pad(n, align):
+    return (align - n % align) % align
+
+
+def write_columnar(path, words, segment_offsets):
+    """
+    Writes Vosk words (dicts with word/start/end/conf, in time order) and
+    the word offsets of the transcript segments.
+    """
+    vocab = {}
+    word_ids = np.array([vocab.setdefault(w["word"], len(vocab)) for w in words], dtype=np.uint32)
+    vocab_bytes = "\n".join(vocab).encode("utf-8")
+
+    columns = [
+        np.array([w["start"] for w in words], dtype=np.float32),
+        np.array([w["end"] for w in words], dtype=np.float32),
+        np.array([w.get("conf", 1.0) for w in words], dtype=np.float16),
+        word_ids,
+        np.asarray(segment_offsets, dtype=np.uint32),
+    ]
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(words), len(segment_offsets) - 1, len(vocab_bytes)))
+        f.write(vocab_bytes + b"\0" * _pad(HEADER.size + len(vocab_bytes), 8))
+        for column in columns:
+            data = column.tobytes()
+            f.write(data + b"\0" * _pad(len(data), 4))
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_columnar(path):
+    """
+    Memory-mapped columns (start, end, conf, word, segments) plus the
+    vocabulary list, keyed by name.
+    """
+    with open(path, "rb") as f:
+        magic, n_words, n_segments, vocab_len = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a columnar transcript")
+        vocab = f.read(vocab_len).decode("utf-8").split("\n") if vocab_len else []
+
+    store = {"vocab": vocab, "path": path}
+    offset = HEADER.size + vocab_len + _pad(HEADER.size + vocab_len, 8)
+    for name, dtype, count in (
+        ("start", np.float32, n_words),
+        ("end", np.float32, n_words),
+        ("conf", np.float16, n_words),
+        ("word", np.uint32, n_words),
+        ("segments", np.uint32, n_segments + 1),
+    ):
+        nbytes = np.dtype(dtype).itemsize * count
+        # np.memmap cannot map zero bytes
+        store[name] = (np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+                       if count else np.zeros(0, dtype=dtype))
+        offset += nbytes + _pad(nbytes, 4)
+    return store
+
+
+def word_count(store):
+    return len(store["start"])
+
+
+def word_range(store, start_time, end_time):
+    """(i, j) such that words i..j-1 overlap [start_time, end_time)."""
+    i = int(np.searchsorted(store["end"], start_time, side="right"))
+    j = int(np.searchsorted(store["start"], end_time, side="left"))
+    return i, max(i, j)
+
+
+def words(store, i=0, j=None):
+    """Words i..j-1 as Vosk-style dicts."""
+    j = word_count(store) if j is None else j
+    vocab = store["vocab"]
+    return [
+        {"word": vocab[w], "start": round(float(s), 3), "end": round(float(e), 3), "conf": round(float(c), 3)}
+        for w, s, e, c in zip(store["word"][i:j], store["start"][i:j], store["end"][i:j], store["conf"][i:j])
+    ]
+
+
+def text(store, i=0, j=None):
+    vocab = store["vocab"]
+    j = word_count(store) if j is None else j
+    return " ".join(vocab[w] for w in store["word"][i:j])
+
+
+def words_between(store, start_time, end_time):
+    return words(store, *word_range(store, start_time, end_time))
+
+
+def text_between(store, start_time, end_time):
+    return text(store, *word_range(store, start_time, end_time))
+
+
+def word_times(store):
+    """(start, end) of every word, in order."""
+    return list(zip(store["start"].tolist(), store["end"].tolist()))
+
+
+def segments(store):
+    """Transcript segments in the JSON transcript's {start, end, text} shape."""
+    offsets = store["segments"]
+    result = []
+    for k in range(len(offsets) - 1):
+        i, j = int(offsets[k]), int(offsets[k + 1])
+        result.append({
+            "start": round(float(store["start"][i]), 3),
+            "end": round(float(store["end"][j - 1]), 3),
+            "text": text(store, i, j)
+        })
+    return result
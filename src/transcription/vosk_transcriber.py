@@ -1,118 +1,506 @@
 import os
 import json
-import wave
+import time
+import threading
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from vosk import Model, KaldiRecognizer
+from src.utils import stage_cache, instrumentation
+from src.utils.hashing import file_sha256
+from src.transcription import transcript_store
 
 # Path to the model
 MODEL_PATH = "models/vosk-model-small-en-us-0.15"
 
-def convert_to_wav(input_path, output_path):
+SAMPLE_RATE = 16000
+# Bytes handed to AcceptWaveform per call (4000 frames of 16-bit mono PCM).
+# Larger reads mean fewer calls, smaller reads lower latency.
+READ_SIZE = 8000
+
+# Also write every word with its timing to a columnar <id>.words file
+WRITE_COLUMNAR = True
+
+# Chunk-parallel mode: window length and overlap between neighbouring windows
+WINDOW_SECONDS = 300.0
+OVERLAP_SECONDS = 15.0
+
+# Process-wide model registry: each model path is loaded once and shared.
+# A Vosk Model is safe to share between threads; each transcription gets
+# its own KaldiRecognizer.
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_model(model_path=MODEL_PATH):
+    with _models_lock:
+        model = _models.get(model_path)
+        if model is None:
+            if not os.path.exists(model_path):
+                raise FileNotFoundError(f"Vosk model not found at {model_path}. Please run scripts/download_vosk_model.py")
+            print(f"Loading Vosk model from {model_path}...")
+            with instrumentation.span("model.load", model="vosk", path=model_path):
+                model = Model(model_path)
+            _models[model_path] = model
+    return model
+
+
+def open_pcm_stream(input_path, sample_rate=SAMPLE_RATE, start=None, duration=None, stdin=None):
     """
-    Converts input audio to 16kHz Mono WAV (PCM) required by Vosk
-    using ffmpeg.
+    Starts ffmpeg decoding input audio to raw 16-bit mono PCM (s16le) at
+    the rate Vosk expects, written to its stdout pipe. start/duration (in
+    seconds) restrict decoding to one window of the file. Pass "pipe:0"
+    and stdin=subprocess.PIPE to decode audio written to ffmpeg's stdin.
     """
-    command = [
-        "ffmpeg",
+    command = ["ffmpeg", "-loglevel", "error"]
+    if start:
+        command += ["-ss", f"{start:.3f}"]
+    if duration:
+        command += ["-t", f"{duration:.3f}"]
+    command += [
         "-i", input_path,
-        "-ac", "1",            # Mono
-        "-ar", "16000",        # 16kHz
-        "-f", "wav",           # Format
-        "-y",                  # Overwrite
-        output_path
+        "-ac", "1",                 # Mono
+        "-ar", str(sample_rate),    # 16kHz
+        "-f", "s16le",              # Raw PCM, no container
+        "-acodec", "pcm_s16le",
+        "-"                         # stdout
     ]
-    subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return subprocess.Popen(command, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
 
-def transcribe_audio(audio_path, output_path):
-    if not os.path.exists(MODEL_PATH):
-        raise FileNotFoundError(f"Vosk model not found at {MODEL_PATH}. Please run scripts/download_vosk_model.py")
 
-    # Vosk requires 16kHz mono WAV. We create a temp file.
-    temp_wav = "temp_vosk_16k.wav"
-    
+def decode_stream(chunks, sample_rate=SAMPLE_RATE, read_size=READ_SIZE):
+    """
+    Decodes encoded audio (mp3, wav, ...) arriving as an iterable of byte
+    chunks and yields PCM chunks as soon as ffmpeg produces them. A feeder
+    thread writes the input so decoding keeps pace with the upload.
+    """
+    proc = open_pcm_stream("pipe:0", sample_rate=sample_rate, stdin=subprocess.PIPE)
+
+    def feed():
+        try:
+            for data in chunks:
+                proc.stdin.write(data)
+        except (OSError, ValueError):
+            # ffmpeg exited or the upload was cut off
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
     try:
-        print(f"Converting {audio_path} to 16kHz mono WAV for Vosk...")
-        convert_to_wav(audio_path, temp_wav)
-        
-        print("Loading Vosk model...")
-        model = Model(MODEL_PATH)
-        rec = KaldiRecognizer(model, 16000)
-        rec.SetWords(True)
-
-        wf = wave.open(temp_wav, "rb")
-        
-        results = []
-        text_accumulated = ""
-        
-        print("Transcribing...")
-        while True:
-            data = wf.readframes(4000)
-            if len(data) == 0:
-                break
-            if rec.AcceptWaveform(data):
-                part = json.loads(rec.Result())
-                if "text" in part:
-                    text_accumulated += part["text"] + " "
-                    # Vosk returns words too if SetWords(True)
-                    if "result" in part:
-                        results.extend(part["result"])
-            # else:
-            #     # Partial result, ignore for final JSON
-            #     pass
-
-        final_part = json.loads(rec.FinalResult())
-        if "text" in final_part:
-             text_accumulated += final_part["text"]
-        if "result" in final_part:
-             results.extend(final_part["result"])
-        
-        wf.close()
-        
-        
-        # Transform Vosk words into "segments" for compatibility.
-        # Group words into chunks (e.g., max 7 seconds duration or break on long silence).
-        segments = []
-        if results:
-            current_seg = {"start": results[0]["start"], "end": 0, "text": []}
-            
-            for i, r in enumerate(results):
-                # If gap > 0.8s or total duration > 10s, break
-                is_pause = (r["start"] - results[i-1]["end"]) > 0.8 if i > 0 else False
-                is_long = (r["end"] - current_seg["start"]) > 10.0
-                
-                if (is_pause or is_long) and current_seg["text"]:
-                    # Finish current
-                    current_seg["end"] = results[i-1]["end"]
-                    current_seg["text"] = " ".join(current_seg["text"])
-                    segments.append(current_seg)
-                    
-                    # Start new
-                    current_seg = {"start": r["start"], "end": 0, "text": []}
-                
-                current_seg["text"].append(r["word"])
-            
-            # Append last
-            if current_seg["text"]:
-                current_seg["end"] = results[-1]["end"]
-                current_seg["text"] = " ".join(current_seg["text"])
-                segments.append(current_seg)
-                
-        else:
-            segments = []
-
-        transcript_json = {
-            "audio_file": audio_path,
-            "model": "vosk-small",
-            "segments": segments,
-            "text": text_accumulated.strip() 
+        yield from iter_chunks(proc.stdout, read_size)
+    finally:
+        proc.stdout.close()
+        feeder.join()
+        stderr = proc.stderr.read()
+        proc.stderr.close()
+        returncode = proc.wait()
+
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode the stream: {stderr.decode(errors='replace').strip()}")
+
+
+def iter_chunks(stream, read_size=READ_SIZE):
+    """Yields successive reads of read_size bytes from a file-like stream."""
+    while True:
+        data = stream.read(read_size)
+        if len(data) == 0:
+            break
+        yield data
+
+
+def stream_recognize(chunks, model, sample_rate=SAMPLE_RATE, partials=True):
+    """
+    Incremental recognition over an iterable of 16-bit mono PCM chunks, as
+    they arrive from an upload or a live feed. Yields one event per result:
+
+        {"type": "partial", "text": ..., "chunk": n, "audio_seconds": t, "latency_ms": ms}
+        {"type": "final", "text": ..., "words": [...], "chunk": n, "audio_seconds": t, "latency_ms": ms}
+
+    Partials are only sent when their text changed. chunk is the number of
+    chunks consumed so far, audio_seconds the audio received so far and
+    latency_ms the time from receiving the chunk to yielding its result.
+    The last event is always the final result of the remaining audio.
+    """
+    rec = KaldiRecognizer(model, sample_rate)
+    rec.SetWords(True)
+
+    n = 0
+    received = 0
+    last_partial = ""
+
+    def event(kind, received_at, **fields):
+        return {
+            "type": kind,
+            **fields,
+            "chunk": n,
+            "audio_seconds": round(received / (2 * sample_rate), 3),
+            "latency_ms": round((time.perf_counter() - received_at) * 1000, 2)
         }
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(transcript_json, f, indent=4)
+    for data in chunks:
+        received_at = time.perf_counter()
+        n += 1
+        received += len(data)
+
+        with instrumentation.timer("vosk.accept_waveform"):
+            complete = rec.AcceptWaveform(data)
+        if complete:
+            part = json.loads(rec.Result())
+            last_partial = ""
+            yield event("final", received_at, text=part.get("text", ""), words=part.get("result", []))
+        elif partials:
+            text = json.loads(rec.PartialResult()).get("partial", "")
+            if text != last_partial:
+                last_partial = text
+                yield event("partial", received_at, text=text)
+
+    received_at = time.perf_counter()
+    part = json.loads(rec.FinalResult())
+    yield event("final", received_at, text=part.get("text", ""), words=part.get("result", []))
+
+
+def recognize_stream(stream, model, sample_rate=SAMPLE_RATE, read_size=READ_SIZE):
+    """
+    Feeds PCM bytes from a file-like stream into a KaldiRecognizer.
+    Returns (words, text) where words are Vosk's start/end/word/conf dicts.
+    """
+    results = []
+    texts = []
+
+    for event in stream_recognize(iter_chunks(stream, read_size), model, sample_rate, partials=False):
+        if event["text"]:
+            texts.append(event["text"])
+        results.extend(event["words"])
+
+    return results, " ".join(texts)
+
+
+def group_words_into_segments(results):
+    """
+    Transform Vosk words into "segments" for compatibility.
+    Group words into chunks (break on long silence or max 10 seconds duration).
+    """
+    segments = []
+    if not results:
+        return segments
+
+    current_seg = {"start": results[0]["start"], "end": 0, "text": []}
+
+    for i, r in enumerate(results):
+        # If gap > 0.8s or total duration > 10s, break
+        is_pause = (r["start"] - results[i-1]["end"]) > 0.8 if i > 0 else False
+        is_long = (r["end"] - current_seg["start"]) > 10.0
+
+        if (is_pause or is_long) and current_seg["text"]:
+            # Finish current
+            current_seg["end"] = results[i-1]["end"]
+            current_seg["text"] = " ".join(current_seg["text"])
+            segments.append(current_seg)
+
+            # Start new
+            current_seg = {"start": r["start"], "end": 0, "text": []}
+
+        current_seg["text"].append(r["word"])
+
+    # Append last
+    if current_seg["text"]:
+        current_seg["end"] = results[-1]["end"]
+        current_seg["text"] = " ".join(current_seg["text"])
+        segments.append(current_seg)
+
+    return segments
 
-        print(f"Saved transcript to {output_path}")
 
+def transcribe_pcm(audio_path, model, read_size=READ_SIZE, start=None, duration=None):
+    """
+    Decodes audio_path with ffmpeg and recognizes it straight from the pipe.
+    ffmpeg keeps decoding into the pipe buffer while Vosk consumes it, so
+    decoding and recognition overlap and nothing is written to disk.
+    """
+    proc = open_pcm_stream(audio_path, start=start, duration=duration)
+    try:
+        results, text = recognize_stream(proc.stdout, model, read_size=read_size)
     finally:
-        if os.path.exists(temp_wav):
-            os.remove(temp_wav)
+        proc.stdout.close()
+        stderr = proc.stderr.read()
+        proc.stderr.close()
+        returncode = proc.wait()
+
+    if returncode != 0:
+        raise RuntimeError(
+            f"ffmpeg failed to decode {audio_path}: {stderr.decode(errors='replace').strip()}"
+        )
+
+    return results, text
+
+
+def probe_duration(audio_path):
+    """Duration of audio_path in seconds, read with ffprobe."""
+    command = [
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        audio_path
+    ]
+    out = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return float(out.strip())
+
+
+def plan_windows(duration, window=WINDOW_SECONDS, overlap=OVERLAP_SECONDS):
+    """
+    Splits [0, duration) into (start, length) windows of `window` seconds,
+    each overlapping the previous one by `overlap` seconds.
+    """
+    if overlap >= window:
+        raise ValueError("overlap must be shorter than the window")
+
+    windows = []
+    start = 0.0
+    while True:
+        length = min(window, duration - start)
+        windows.append((start, length))
+        if start + length >= duration:
+            break
+        start += window - overlap
+
+    return windows
+
+
+def stitch_window_words(windows):
+    """
+    Merges per-window word lists onto one timeline.
+
+    windows is a list of (start, length, words) in time order, with word
+    times already global. Each overlap is cut at its midpoint and a word
+    belongs to the window that owns its centre, so words recognised twice
+    in an overlap are kept once and words cut off at a window edge are
+    taken from the neighbour that heard them whole.
+    """
+    merged = []
+
+    for k, (start, length, words) in enumerate(windows):
+        lo = float("-inf")
+        hi = float("inf")
+        if k > 0:
+            prev_start, prev_length, _ = windows[k - 1]
+            lo = (start + prev_start + prev_length) / 2
+        if k < len(windows) - 1:
+            next_start = windows[k + 1][0]
+            hi = (next_start + start + length) / 2
+
+        for w in words:
+            centre = (w["start"] + w["end"]) / 2
+            if lo <= centre < hi:
+                merged.append(w)
+
+    return merged
+
+
+def _transcribe_window(audio_path, start, length, model_path, read_size):
+    """Recognizes one window and shifts its word times onto the global timeline."""
+    model = get_model(model_path)
+    words, _ = transcribe_pcm(audio_path, model, read_size=read_size, start=start, duration=length)
+
+    for w in words:
+        w["start"] = round(w["start"] + start, 6)
+        w["end"] = round(w["end"] + start, 6)
+
+    return words
+
+
+def transcribe_chunked(audio_path, workers=None, window=WINDOW_SECONDS, overlap=OVERLAP_SECONDS,
+                       model_path=MODEL_PATH, read_size=READ_SIZE):
+    """
+    Transcribes one long file by recognizing overlapping windows in parallel
+    worker processes (one model per process) and stitching the words.
+    Returns (words, text) like transcribe_pcm.
+    """
+    windows = plan_windows(probe_duration(audio_path), window, overlap)
+
+    if len(windows) == 1:
+        return transcribe_pcm(audio_path, get_model(model_path), read_size=read_size)
+
+    workers = min(workers or os.cpu_count() or 1, len(windows))
+    print(f"Transcribing {len(windows)} windows of {window:.0f}s with {workers} workers...")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=get_model, initargs=(model_path,)) as executor:
+        futures = [
+            executor.submit(_transcribe_window, audio_path, start, length, model_path, read_size)
+            for start, length in windows
+        ]
+        window_words = [
+            (start, length, future.result())
+            for (start, length), future in zip(windows, futures)
+        ]
+
+    words = stitch_window_words(window_words)
+    return words, " ".join(w["word"] for w in words)
+
+
+def write_transcript(audio_path, output_path, results, text, columnar=None):
+    segments = group_words_into_segments(results)
+    transcript_json = {
+        "audio_file": audio_path,
+        "model": "vosk-small",
+        "segments": segments,
+        "text": text
+    }
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(transcript_json, f, indent=4)
+
+    print(f"Saved transcript to {output_path}")
+
+    if WRITE_COLUMNAR if columnar is None else columnar:
+        # Segments are consecutive runs of words, so their word counts give the offsets
+        offsets = [0]
+        for seg in segments:
+            offsets.append(offsets[-1] + len(seg["text"].split()))
+        transcript_store.write_columnar(transcript_store.columnar_path(output_path), results, offsets)
+
+
+def cached_recognition(audio_path, model_path, params, recognize, use_cache=True):
+    """
+    Returns (words, text) for audio_path from the stage cache when the same
+    audio was already recognized with the same model and parameters,
+    otherwise runs recognize() and stores its result.
+    """
+    if not use_cache:
+        return recognize()
+
+    key = stage_cache.make_key(
+        "transcription", file_sha256(audio_path), os.path.basename(model_path), params
+    )
+    cached = stage_cache.get("transcription", key)
+    if cached is not None:
+        print(f"Using cached transcription for {audio_path}")
+        return cached["words"], cached["text"]
+
+    results, text = recognize()
+    stage_cache.put("transcription", key, {"words": results, "text": text})
+    return results, text
+
+
+def record_transcription(span, results):
+    span.items = len(results)
+    # Up to the last recognized word: close to the audio length for speech
+    span.set(audio_seconds=results[-1]["end"] if results else 0.0)
+
+
+def transcribe_audio(audio_path, output_path, model_path=MODEL_PATH, read_size=READ_SIZE, use_cache=True):
+    def recognize():
+        model = get_model(model_path)
+
+        # Vosk requires 16kHz mono PCM, streamed from ffmpeg without a temp file.
+        print(f"Transcribing {audio_path} (streaming 16kHz mono PCM from ffmpeg)...")
+        return transcribe_pcm(audio_path, model, read_size=read_size)
+
+    params = {"sample_rate": SAMPLE_RATE, "read_size": read_size}
+    with instrumentation.span("transcription", file=os.path.basename(audio_path), mode="serial") as span:
+        results, text = cached_recognition(audio_path, model_path, params, recognize, use_cache)
+        write_transcript(audio_path, output_path, results, text)
+        record_transcription(span, results)
+
+
+def transcribe_audio_chunked(audio_path, output_path, workers=None, window=WINDOW_SECONDS,
+                             overlap=OVERLAP_SECONDS, model_path=MODEL_PATH, read_size=READ_SIZE,
+                             use_cache=True):
+    def recognize():
+        print(f"Transcribing {audio_path} in parallel windows...")
+        return transcribe_chunked(
+            audio_path, workers=workers, window=window, overlap=overlap,
+            model_path=model_path, read_size=read_size
+        )
+
+    params = {
+        "sample_rate": SAMPLE_RATE,
+        "read_size": read_size,
+        "window": window,
+        "overlap": overlap
+    }
+    with instrumentation.span("transcription", file=os.path.basename(audio_path), mode="chunked") as span:
+        results, text = cached_recognition(audio_path, model_path, params, recognize, use_cache)
+        write_transcript(audio_path, output_path, results, text)
+        record_transcription(span, results)
+
+
+def compare_chunked_to_serial(audio_path, workers=None, window=WINDOW_SECONDS,
+                              overlap=OVERLAP_SECONDS, model_path=MODEL_PATH):
+    """
+    Transcribes audio_path both ways and reports wall time and speedup of
+    the chunk-parallel path over the serial one. Model loading is done
+    before timing the serial run; the chunked run includes its per-process
+    model loads, since that is what a real run pays.
+    """
+    model = get_model(model_path)
+
+    t0 = time.perf_counter()
+    serial_words, _ = transcribe_pcm(audio_path, model)
+    serial_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    chunked_words, _ = transcribe_chunked(
+        audio_path, workers=workers, window=window, overlap=overlap, model_path=model_path
+    )
+    chunked_seconds = time.perf_counter() - t0
+
+    report = {
+        "audio_file": audio_path,
+        "serial_seconds": round(serial_seconds, 3),
+        "chunked_seconds": round(chunked_seconds, 3),
+        "speedup": round(serial_seconds / chunked_seconds, 2) if chunked_seconds else None,
+        "serial_words": len(serial_words),
+        "chunked_words": len(chunked_words)
+    }
+
+    print(
+        f"Serial: {report['serial_seconds']}s, chunked: {report['chunked_seconds']}s, "
+        f"speedup: {report['speedup']}x ({report['serial_words']} vs {report['chunked_words']} words)"
+    )
+    return report
+
+
+def transcribe_many(jobs, workers=None, use_processes=False, model_path=MODEL_PATH):
+    """
+    Transcribe many (audio_path, output_path) pairs concurrently.
+
+    With threads (default) every worker shares the single Model from the
+    registry and runs its own KaldiRecognizer. With use_processes=True each
+    worker process loads the model once and reuses it for all its files.
+    Returns a list of (audio_path, output_path, error) in input order.
+    """
+    jobs = list(jobs)
+    workers = workers or os.cpu_count() or 1
+
+    if use_processes:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=get_model,
+            initargs=(model_path,)
+        )
+    else:
+        # Load before fanning out so threads do not queue on the registry lock
+        get_model(model_path)
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+    with executor:
+        futures = [
+            executor.submit(transcribe_audio, audio_path, output_path, model_path)
+            for audio_path, output_path in jobs
+        ]
+
+        results = []
+        for (audio_path, output_path), future in zip(jobs, futures):
+            try:
+                future.result()
+                results.append((audio_path, output_path, None))
+            except Exception as e:
+                print(f"Failed to transcribe {audio_path}: {e}")
+                results.append((audio_path, output_path, e))
 
+    return results
@@ -0,0 +1,310 @@
+"""
+Spans and metrics for the pipeline stages.
+
+A span times one unit of stage work and records how many items it handled
+and the memory it left behind:
+
+    with instrumentation.span("segmentation", file=file_id) as s:
+        ...
+        s.items = len(segments)
+
+Every finished span is appended to SPANS_FILE as one JSON line:
+
+    {"span": "segmentation", "id": ..., "parent": ..., "root": ...,
+     "start": <unix time>, "seconds": 1.92, "status": "ok", "items": 41,
+     "rss_mb": 812.4, "max_rss_mb": 903.0, "pid": ..., "thread": ...,
+     "calls": {"minilm.encode": {"count": 1, "seconds": 1.71, "items": 380}},
+     "file": "episode_12"}
+
+Model calls that happen once per chunk or batch (AcceptWaveform, encode,
+summarize, extract_keywords) go through timer() instead: they are not
+written one by one, only added to the enclosing span's "calls" and to the
+metrics.
+
+Metrics for every span and timer name are kept per process and written in
+Prometheus text format to METRICS_DIR/<process>.prom (for node_exporter's
+textfile collector) whenever a top-level span ends, and at exit.
+
+PIPELINE_METRICS=0 turns all of this off; PIPELINE_METRICS_DIR moves the
+output, PIPELINE_METRICS_PROCESS names the .prom file.
+"""
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import atexit
+import threading
+import multiprocessing
+from pathlib import Path
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows: no memory high-water marks there
+    resource = None
+
+ENABLED = os.environ.get("PIPELINE_METRICS", "1") != "0"
+METRICS_DIR = os.environ.get("PIPELINE_METRICS_DIR", "data/metrics")
+SPANS_FILE = "spans.jsonl"
+# spans.jsonl is moved to spans.jsonl.1 once it grows past this
+MAX_SPANS_BYTES = 50 * 1024 * 1024
+
+# Histogram buckets, seconds: from one model call to an hour-long episode
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+
+_local = threading.local()
+_lock = threading.Lock()
+# name -> {"count", "errors", "seconds", "items", "buckets": [...]}
+_metrics = {}
+
+
+class Span:
+    def __init__(self, name, attrs, parent):
+        self.name = name
+        self.attrs = attrs
+        self.id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.items = None
+        self.calls = {}
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def current_span():
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+def max_rss_bytes():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _mb(n):
+    return round(n / (1024 * 1024), 1) if n is not None else None
+
+
+def _record(name, seconds, items, error):
+    with _lock:
+        m = _metrics.get(name)
+        if m is None:
+            m = _metrics[name] = {"count": 0, "errors": 0, "seconds": 0.0, "items": 0,
+                                  "buckets": [0] * len(BUCKETS)}
+        m["count"] += 1
+        m["errors"] += 1 if error else 0
+        m["seconds"] += seconds
+        m["items"] += items or 0
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                m["buckets"][i] += 1
+
+
+@contextmanager
+def span(name, parent=None, **attrs):
+    """
+    Times the block as a span; set .items and .set(...) on the yielded Span.
+    The parent is the span this thread is in, or `parent` for work handed
+    to another thread.
+    """
+    stack = _stack()
+    parent = parent or (stack[-1] if stack else None)
+    s = Span(name, attrs, parent)
+    if not ENABLED:
+        yield s
+        return
+
+    stack.append(s)
+    start_time = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield s
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        _record(name, seconds, s.items, error)
+
+        root = parent
+        while root is not None and root.parent is not None:
+            root = root.parent
+        record = {
+            "span": name,
+            "id": s.id,
+            "parent": parent.id if parent else None,
+            "root": root.id if root else s.id,
+            "start": round(start_time, 3),
+            "seconds": round(seconds, 4),
+            "status": "error" if error is not None else "ok",
+            "items": s.items,
+            "rss_mb": _mb(rss_bytes()),
+            "max_rss_mb": _mb(max_rss_bytes()),
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+            "calls": {k: {**v, "seconds": round(v["seconds"], 4)} for k, v in s.calls.items()},
+            **s.attrs,
+        }
+        if error is not None:
+            record["error"] = f"{type(error).__name__}: {error}"
+        _write_span(record)
+        if parent is None:
+            flush()
+
+
+@contextmanager
+def timer(name, items=None):
+    """
+    Times one model call. Only aggregated: adds to the metrics and to the
+    enclosing span's "calls", never written on its own.
+    """
+    if not ENABLED:
+        yield
+        return
+
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        _record(name, seconds, items, error)
+        s = current_span()
+        if s is not None:
+            call = s.calls.setdefault(name, {"count": 0, "seconds": 0.0, "items": 0})
+            call["count"] += 1
+            call["seconds"] += seconds
+            call["items"] += items or 0
+
+
+def _write_span(record):
+    path = Path(METRICS_DIR, SPANS_FILE)
+    line = json.dumps(record, default=str) + "\n"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _lock:
+            if path.is_file() and path.stat().st_size > MAX_SPANS_BYTES:
+                os.replace(path, str(path) + ".1")
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+    except OSError as e:
+        # Metrics must never fail the stage they measure
+        print(f"Could not write span {record['span']}: {e}", file=sys.stderr)
+
+
+def process_name():
+    name = os.environ.get("PIPELINE_METRICS_PROCESS")
+    if not name:
+        argv0 = sys.argv[0] if sys.argv else ""
+        name = Path(argv0).stem if argv0 not in ("", "-c", "-m") else "python"
+    return re.sub(r"[^A-Za-z0-9_]", "_", name)
+
+
+def snapshot():
+    """Current metrics per span/timer name (copies)."""
+    with _lock:
+        return {name: {**m, "buckets": list(m["buckets"])} for name, m in _metrics.items()}
+
+
+def summary():
+    """Per name: count, errors, total and mean seconds, items. For status replies."""
+    return {
+        name: {
+            "count": m["count"],
+            "errors": m["errors"],
+            "seconds": round(m["seconds"], 3),
+            "mean_seconds": round(m["seconds"] / m["count"], 4) if m["count"] else None,
+            "items": m["items"],
+        }
+        for name, m in snapshot().items()
+    }
+
+
+def prometheus_text(process=None):
+    process = process or process_name()
+    metrics = snapshot()
+
+    def labels(name, **extra):
+        pairs = {"process": process, "name": name, **extra}
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs.items()) + "}"
+
+    lines = [
+        "# HELP pipeline_span_seconds Wall time of pipeline stage spans and model calls.",
+        "# TYPE pipeline_span_seconds histogram",
+    ]
+    for name, m in sorted(metrics.items()):
+        for bound, count in zip(BUCKETS, m["buckets"]):
+            lines.append(f"pipeline_span_seconds_bucket{labels(name, le=bound)} {count}")
+        lines.append(f"pipeline_span_seconds_bucket{labels(name, le='+Inf')} {m['count']}")
+        lines.append(f"pipeline_span_seconds_sum{labels(name)} {m['seconds']:.6f}")
+        lines.append(f"pipeline_span_seconds_count{labels(name)} {m['count']}")
+
+    lines += [
+        "# HELP pipeline_span_items_total Items handled (files, chunks, sentences, segments).",
+        "# TYPE pipeline_span_items_total counter",
+    ]
+    lines += [f"pipeline_span_items_total{labels(name)} {m['items']}" for name, m in sorted(metrics.items())]
+
+    lines += [
+        "# HELP pipeline_span_errors_total Spans and model calls that raised.",
+        "# TYPE pipeline_span_errors_total counter",
+    ]
+    lines += [f"pipeline_span_errors_total{labels(name)} {m['errors']}" for name, m in sorted(metrics.items())]
+
+    peak = max_rss_bytes()
+    if peak is not None:
+        lines += [
+            "# HELP pipeline_max_rss_bytes Peak resident memory of the process.",
+            "# TYPE pipeline_max_rss_bytes gauge",
+            f'pipeline_max_rss_bytes{{process="{process}"}} {peak}',
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def flush():
+    """Rewrites this process's .prom file (atomically, for the textfile collector)."""
+    if not ENABLED or not _metrics:
+        return None
+    if multiprocessing.parent_process() is not None:
+        # A pool worker would overwrite its parent's file under the same name
+        return None
+    path = Path(METRICS_DIR, f"{process_name()}.prom")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = str(path) + f".{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(prometheus_text())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write metrics to {path}: {e}", file=sys.stderr)
+        return None
+    return str(path)
+
+
+atexit.register(flush)
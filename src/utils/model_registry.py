@@ -0,0 +1,91 @@
+"""
+Process-wide registry of lazily loaded models.
+
+Modules register a loader under a name at import time; the model itself is
+only built the first time get(name) is called, so importing a stage module
+is cheap and never touches the network. Each model is loaded once per
+process and shared.
+
+Sharing also means every thread calls the same instance, and neither a
+torch module mid-forward nor a Hugging Face fast tokenizer ("Already
+borrowed") may be used by two threads at once. Callers hold lock(name)
+around each call into a model.
+"""
+import time
+import threading
+
+from src.utils import instrumentation
+
+_loaders = {}
+_models = {}
+_load_seconds = {}
+_lock = threading.Lock()
+_call_locks = {}
+_call_locks_lock = threading.Lock()
+
+
+def register(name, loader):
+    """Register loader() as the way to build `name`. Re-registering is a no-op."""
+    _loaders.setdefault(name, loader)
+
+
+def get(name):
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(name)
+        if model is None:
+            if name not in _loaders:
+                raise KeyError(f"No model registered as {name}")
+            print(f"Loading model: {name}...")
+            start = time.time()
+            with instrumentation.span("model.load", model=name):
+                model = _loaders[name]()
+            _models[name] = model
+            _load_seconds[name] = round(time.time() - start, 3)
+    return model
+
+
+def lock(name):
+    """The lock to hold while calling model `name` (one per model, per process)."""
+    with _call_locks_lock:
+        return _call_locks.setdefault(name, threading.RLock())
+
+
+def is_loaded(name):
+    return name in _models
+
+
+def preload(names=None):
+    """Load the given models (default: every registered one) now."""
+    for name in (names if names is not None else list(_loaders)):
+        get(name)
+
+
+def unload(name):
+    with _lock:
+        _models.pop(name, None)
+        _load_seconds.pop(name, None)
+
+
+def stats():
+    return {
+        "registered": sorted(_loaders),
+        "loaded": dict(_load_seconds),
+    }
+
+
+def ensure_nltk_data(resource, package):
+    """
+    Make sure an NLTK resource (e.g. "tokenizers/punkt") is available,
+    downloading `package` quietly only if it is missing. Called on first use,
+    never at import.
+    """
+    import nltk
+
+    try:
+        nltk.data.find(resource)
+    except LookupError:
+        nltk.download(package, quiet=True)
@@ -0,0 +1,184 @@
+"""
+Content-addressed cache shared by the pipeline stages.
+
+An entry is keyed by a hash of the stage name, a hash of the stage input,
+the model name and the stage parameters, so a stage only reruns inference
+when something that affects its output changed. Entries are JSON files
+under CACHE_DIR/<stage>/, optionally with binary attachments next to them;
+once the cache grows past MAX_CACHE_BYTES the least recently used files are
+deleted.
+
+put() keeps a running total of the cache size instead of walking the whole
+directory on every write. The directory is only scanned (and evicted) when
+that total goes over the limit, and every RESCAN_EVERY puts so writes from
+other processes are picked up.
+"""
+import os
+import json
+import threading
+from pathlib import Path
+
+from src.utils.hashing import params_hash
+
+CACHE_DIR = "data/cache"
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+# Bump to invalidate every entry after a change in how stages build results
+CACHE_VERSION = 1
+
+RESCAN_EVERY = 200
+
+_stats = {}
+_lock = threading.Lock()
+# Bytes in CACHE_DIR as of the last scan plus what put() wrote since (None: not scanned yet)
+_size = None
+_puts_since_scan = 0
+# key -> {attachment path: size of the file it replaces}, until put() for that key
+_replaced = {}
+
+
+def make_key(stage, input_hash, model, params):
+    return params_hash({
+        "version": CACHE_VERSION,
+        "stage": stage,
+        "input": input_hash,
+        "model": model,
+        "params": params,
+    })
+
+
+def _entry_path(stage, key):
+    return os.path.join(CACHE_DIR, stage, key[:2], key + ".json")
+
+
+def attachment_path(stage, key, name):
+    """
+    Path for a binary file stored alongside an entry (e.g. an .npy array).
+    Callers write it before put() and should treat a missing attachment as
+    a miss, since eviction removes files individually.
+    """
+    path = os.path.join(CACHE_DIR, stage, key[:2], f"{key}.{name}")
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    # Size of the attachment being replaced, so put() can account for it
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        size = 0
+    with _lock:
+        _replaced.setdefault(key, {})[path] = size
+    return path
+
+
+def get_attachment(stage, key, name):
+    """Path of an existing attachment (marked as recently used), or None."""
+    path = os.path.join(CACHE_DIR, stage, key[:2], f"{key}.{name}")
+    if not os.path.isfile(path):
+        return None
+    os.utime(path)
+    return path
+
+
+def _count(stage, field):
+    with _lock:
+        counters = _stats.setdefault(stage, {"hits": 0, "misses": 0})
+        counters[field] += 1
+
+
+def get(stage, key):
+    """Cached value for key, or None on a miss."""
+    path = _entry_path(stage, key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            value = json.loads(f.read())
+    except (FileNotFoundError, ValueError):
+        _count(stage, "misses")
+        return None
+
+    # Mark as recently used for eviction
+    os.utime(path)
+    _count(stage, "hits")
+    return value
+
+
+def put(stage, key, value):
+    path = _entry_path(stage, key)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    # The whole previous entry: its payload and the attachments just replaced
+    try:
+        previous = os.path.getsize(path)
+    except OSError:
+        previous = 0
+    with _lock:
+        previous += sum(_replaced.pop(key, {}).values())
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(value))
+    os.replace(tmp_path, path)
+
+    global _size, _puts_since_scan
+    with _lock:
+        if _size is not None:
+            # Attachments were written just before, under the same key
+            _size += _entry_bytes(path, key) - previous
+            _puts_since_scan += 1
+        scan = _size is None or _size > MAX_CACHE_BYTES or _puts_since_scan >= RESCAN_EVERY
+
+    if scan:
+        evict()
+
+
+def _entry_bytes(path, key):
+    folder = os.path.dirname(path)
+    total = 0
+    for name in os.listdir(folder):
+        if name.startswith(key) and not name.endswith(".tmp"):
+            try:
+                total += os.path.getsize(os.path.join(folder, name))
+            except FileNotFoundError:
+                pass
+    return total
+
+
+def evict(max_bytes=None):
+    """Delete least recently used entries until the cache fits in max_bytes."""
+    max_bytes = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+
+    entries = []
+    total = 0
+    for root, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            if name.endswith(".tmp"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+    removed = 0
+    if total > max_bytes:
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+            if total <= max_bytes:
+                break
+
+    global _size, _puts_since_scan
+    with _lock:
+        _size = total
+        _puts_since_scan = 0
+    return removed
+
+
+def stats():
+    """Hit/miss counters per stage for this process."""
+    with _lock:
+        return {stage: dict(counters) for stage, counters in _stats.items()}
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Stages under test must not write spans or .prom files into the working
+# tree; set before any test module imports src.utils.instrumentation.
+os.environ["PIPELINE_METRICS"] = "0"
+
+from src.utils import instrumentation  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(tmp_path, monkeypatch):
+    # Tests that turn metrics back on write them here
+    monkeypatch.setattr(instrumentation, "METRICS_DIR", str(tmp_path / "metrics"))
@@ -1,8 +1,10 @@
 import unittest
-from unittest.mock import patch, MagicMock, mock_open
+from unittest.mock import patch, MagicMock, mock_open, call
 import sys
 import os
 import json
+import tempfile
+import shutil
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
@@ -18,8 +20,18 @@ from src.segmentation.batch_keyword_summarizer import process_single_file, senti
 class TestBatchKeywordSummarizer(unittest.TestCase):
 
     def setUp(self):
-        # Reset mocks if needed, or configure them here
-        pass
+        # Keep the stage cache out of the repository's data/ directory
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache_patcher = patch('src.utils.stage_cache.CACHE_DIR', self.cache_dir)
+        self.cache_patcher.start()
+        # Outputs are not real files here, so keep them out of the search index
+        self.index_patcher = patch('src.segmentation.batch_keyword_summarizer.update_search_index')
+        self.mock_update_index = self.index_patcher.start()
+
+    def tearDown(self):
+        self.cache_patcher.stop()
+        self.index_patcher.stop()
+        shutil.rmtree(self.cache_dir)
 
     @patch('src.segmentation.batch_keyword_summarizer.os.path.exists')
     @patch('src.segmentation.batch_keyword_summarizer.open', new_callable=mock_open)
@@ -29,11 +41,11 @@ class TestBatchKeywordSummarizer(unittest.TestCase):
         mock_exists.return_value = True
         
         # Configure mocked modules
-        from src.segmentation.summarizer import summarize_segment
-        summarize_segment.return_value = "Summary text"
+        from src.segmentation.summarizer import summarize_segments
+        summarize_segments.side_effect = lambda texts: ["Summary text" for _ in texts]
         
-        from src.segmentation.keywords import keyword_extractor
-        keyword_extractor.return_value = ["k1", "k2"]
+        from src.segmentation.keywords import keyword_extractor_batch
+        keyword_extractor_batch.side_effect = lambda texts: [["k1", "k2"] for _ in texts]
         
         # Configure the ALREADY INITIALIZED mock instance
         sentiment_analyzer.polarity_scores.return_value = {"compound": 0.9}
@@ -52,5 +64,87 @@ class TestBatchKeywordSummarizer(unittest.TestCase):
         self.assertEqual(output[0]['sentiment']['score'], 0.9)
         self.assertEqual(output[0]['summary'], "Summary text")
 
+    @patch('src.segmentation.batch_keyword_summarizer.os.path.exists')
+    @patch('src.segmentation.batch_keyword_summarizer.open', new_callable=mock_open)
+    @patch('src.segmentation.batch_keyword_summarizer.json.load')
+    @patch('src.segmentation.batch_keyword_summarizer.json.dump')
+    def test_executor_summarizes_each_file_on_its_own(self, mock_json_dump, mock_json_load, mock_file, mock_exists):
+        from src.segmentation import enrichment_executor
+        mock_exists.return_value = True
+
+        from src.segmentation.summarizer import summarize_segments
+        summarize_segments.reset_mock()
+        summarize_segments.side_effect = lambda texts: [t.upper() for t in texts]
+
+        from src.segmentation.keywords import keyword_extractor_batch
+        keyword_extractor_batch.side_effect = lambda texts: [[t.split()[0]] for t in texts]
+        sentiment_analyzer.polarity_scores.return_value = {"compound": 0.1}
+
+        mock_json_load.side_effect = [
+            {"file": "a.json", "bert_segments": [{"segment_id": 1, "text": "first a"}, {"segment_id": 2, "text": "second a"}]},
+            {"file": "b.json", "bert_segments": [{"segment_id": 1, "text": "only b"}]},
+        ]
+
+        enrichment_executor.enrich_files(["a.json", "b.json"], use_cache=False)
+
+        # Files are not padded together: one call per file, as when enriched alone
+        self.assertEqual(summarize_segments.call_args_list, [call(["first a", "second a"]), call(["only b"])])
+        outputs = {c[0][0][0]["file"]: c[0][0] for c in mock_json_dump.call_args_list}
+        self.assertEqual([r["summary"] for r in outputs["a.json"]], ["FIRST A", "SECOND A"])
+        self.assertEqual([r["summary"] for r in outputs["b.json"]], ["ONLY B"])
+        self.assertEqual(outputs["b.json"][0]["keywords"], ["only"])
+
+    def test_executor_output_matches_sequential_enrichment(self):
+        from src.segmentation import batch_keyword_summarizer, enrichment_executor
+        from src.segmentation.summarizer import summarize_segments
+        from src.segmentation.keywords import keyword_extractor_batch
+        summarize_segments.side_effect = lambda texts: [t.upper() for t in texts]
+        keyword_extractor_batch.side_effect = lambda texts: [[t.split()[0]] for t in texts]
+        sentiment_analyzer.polarity_scores.side_effect = lambda text: {"compound": len(text) / 100}
+        self.addCleanup(setattr, sentiment_analyzer.polarity_scores, "side_effect", None)
+
+        work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, work_dir)
+        segment_dir = os.path.join(work_dir, "segments")
+        os.makedirs(segment_dir)
+        names = []
+        for n, count in enumerate([3, 0, 5]):
+            name = f"ep{n}.json"
+            names.append(name)
+            segments = [{"segment_id": i + 1, "text": f"segment {i} of {name}", "start_time": i, "end_time": i + 1}
+                        for i in range(count)]
+            with open(os.path.join(segment_dir, name), "w", encoding="utf-8") as f:
+                f.write(json.dumps({"file": name, "bert_segments": segments}))
+
+        def sequential(name):
+            # One file at a time, every stage over all of its segments
+            bert_segments, file_name = batch_keyword_summarizer.load_segment_file(name)
+            texts = [batch_keyword_summarizer.segment_fields(i, seg)[0] for i, seg in enumerate(bert_segments)]
+            output = batch_keyword_summarizer.enrich_segments(
+                bert_segments, file_name, summarize_segments(texts), keyword_extractor_batch(texts)
+            )
+            return batch_keyword_summarizer.write_output(name, output)
+
+        outputs = {}
+        for mode in ("sequential", "executor"):
+            output_dir = os.path.join(work_dir, mode)
+            os.makedirs(output_dir)
+            with patch.object(batch_keyword_summarizer, "SEGMENT_DIR", segment_dir), \
+                    patch.object(batch_keyword_summarizer, "OUTPUT_DIR", output_dir), \
+                    patch.object(enrichment_executor, "KEYWORD_BATCH", 2), \
+                    patch.object(enrichment_executor, "SENTIMENT_BATCH", 2):
+                if mode == "sequential":
+                    paths = [sequential(name) for name in names]
+                else:
+                    paths = enrichment_executor.enrich_files(names, use_cache=False, keyword_workers=2, max_files=2)
+            self.assertEqual(paths, [os.path.join(output_dir, name) for name in names])
+            outputs[mode] = []
+            for path in paths:
+                with open(path, "rb") as f:
+                    outputs[mode].append(f.read())
+
+        self.assertEqual(outputs["executor"], outputs["sequential"])
+        self.assertIn(b'"summary": "SEGMENT 4 OF EP2.JSON"', outputs["executor"][2])
+
 if __name__ == '__main__':
     unittest.main()
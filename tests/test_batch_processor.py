@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import tempfile
+import shutil
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# --- MOCK HEAVY DEPENDENCIES BEFORE IMPORT ---
+mock_preprocessor_module = MagicMock()
+mock_preprocessor_module.PREPROCESS_PARAMS = {"version": 1}
+sys.modules['src.preprocessing.audio_preprocessor'] = mock_preprocessor_module
+
+from src.preprocessing import batch_processor
+
+
+def fake_preprocess(input_path, output_path):
+    with open(output_path, "wb") as f:
+        f.write(b"cleaned")
+
+
+class TestBatchProcessor(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.raw_dir = os.path.join(self.tmp, "raw")
+        self.processed_dir = os.path.join(self.tmp, "processed")
+        os.makedirs(self.raw_dir)
+        for name in ["a.wav", "b.mp3", "notes.txt"]:
+            with open(os.path.join(self.raw_dir, name), "wb") as f:
+                f.write(name.encode())
+
+        self.patchers = [
+            patch.object(batch_processor, "RAW_DIR", self.raw_dir),
+            patch.object(batch_processor, "PROCESSED_DIR", self.processed_dir),
+            patch.object(batch_processor, "MANIFEST_PATH", os.path.join(self.processed_dir, "manifest.json")),
+            patch.object(batch_processor, "TIMINGS_PATH", os.path.join(self.processed_dir, "timings.json")),
+        ]
+        for p in self.patchers:
+            p.start()
+
+        mock_preprocessor_module.preprocess_audio.reset_mock()
+        mock_preprocessor_module.preprocess_audio.side_effect = fake_preprocess
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+        shutil.rmtree(self.tmp)
+
+    def test_second_run_skips_unchanged_files(self):
+        preprocess_audio = batch_processor.preprocess_audio
+
+        batch_processor.preprocess_all_audio()
+        self.assertEqual(preprocess_audio.call_count, 2)
+
+        preprocess_audio.reset_mock()
+        batch_processor.preprocess_all_audio()
+        preprocess_audio.assert_not_called()
+
+    def test_changed_content_is_reprocessed(self):
+        preprocess_audio = batch_processor.preprocess_audio
+
+        batch_processor.preprocess_all_audio()
+        with open(os.path.join(self.raw_dir, "a.wav"), "wb") as f:
+            f.write(b"new episode cut")
+
+        preprocess_audio.reset_mock()
+        batch_processor.preprocess_all_audio()
+
+        preprocess_audio.assert_called_once()
+        self.assertIn("a.wav", preprocess_audio.call_args[0][0])
+
+    def test_changed_params_reprocess_everything(self):
+        preprocess_audio = batch_processor.preprocess_audio
+
+        batch_processor.preprocess_all_audio()
+
+        preprocess_audio.reset_mock()
+        with patch.object(batch_processor, "PREPROCESS_PARAMS", {"version": 2}):
+            batch_processor.preprocess_all_audio()
+
+        self.assertEqual(preprocess_audio.call_count, 2)
+
+    def test_failed_file_does_not_stop_serial_batch(self):
+        def fail_on_a(input_path, output_path):
+            if input_path.endswith("a.wav"):
+                raise RuntimeError("corrupt audio")
+            fake_preprocess(input_path, output_path)
+
+        batch_processor.preprocess_audio.side_effect = fail_on_a
+        batch_processor.preprocess_all_audio(workers=1)
+
+        self.assertEqual(batch_processor.preprocess_audio.call_count, 2)
+        manifest = batch_processor.load_manifest()
+        self.assertIn("b.mp3", manifest)
+        self.assertNotIn("a.wav", manifest)
+
+        # The failed file is retried on the next run
+        batch_processor.preprocess_audio.reset_mock()
+        batch_processor.preprocess_audio.side_effect = fake_preprocess
+        batch_processor.preprocess_all_audio(workers=1)
+        batch_processor.preprocess_audio.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,8 @@ from unittest.mock import patch, MagicMock, mock_open
 import sys
 import os
 import json
+import tempfile
+import shutil
 
 # Adjust path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -14,12 +16,28 @@ sys.modules['src.segmentation.bert_segmentation'] = mock_bert_module
 # Mock text_tiling_segments from text_tiling (assuming it might also be heavy or just to be safe)
 mock_tt_module = MagicMock()
 sys.modules['src.segmentation.text_tiling'] = mock_tt_module
+# Mock the embedding sidecar writer (numpy)
+mock_store_module = MagicMock()
+mock_store_module.SIDECAR_PARTS = ("sentences", "segments", "offsets")
+sys.modules['src.segmentation.embedding_store'] = mock_store_module
 
 # Now import the module under test
-from src.segmentation.batch_segmenter import segment_single_file, find_segment_time
+from src.segmentation.batch_segmenter import segment_single_file, find_segment_time, flatten_text, segment_word_spans, word_span_time, recognized_word_times
+from src.transcription import transcript_store
 
 class TestBatchSegmenter(unittest.TestCase):
 
+    def setUp(self):
+        # Keep the stage cache out of the repository's data/ directory
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache_patcher = patch('src.utils.stage_cache.CACHE_DIR', self.cache_dir)
+        self.cache_patcher.start()
+        mock_store_module.sidecar_paths.return_value = {}
+
+    def tearDown(self):
+        self.cache_patcher.stop()
+        shutil.rmtree(self.cache_dir)
+
     @patch('src.segmentation.batch_segmenter.os.path.exists')
     @patch('src.segmentation.batch_segmenter.open', new_callable=mock_open)
     @patch('src.segmentation.batch_segmenter.json.load')
@@ -37,8 +55,10 @@ class TestBatchSegmenter(unittest.TestCase):
         mock_json_load.return_value = mock_transcript_data
         
         # Configure the module-level mocks
-        from src.segmentation.bert_segmentation import bert_topic_segments
-        bert_topic_segments.return_value = ["Hello world", "This is a test"]
+        from src.segmentation.bert_segmentation import topic_segments_with_embeddings
+        sentences = ["Hello world", "This is a test"]
+        embeddings = [[1.0, 0.0], [0.0, 1.0]]
+        topic_segments_with_embeddings.return_value = (sentences, sentences, embeddings, [(0, 1), (1, 2)])
         
         from src.segmentation.text_tiling import text_tiling_segments
         text_tiling_segments.return_value = ["Hello world This is a test"]
@@ -56,6 +76,14 @@ class TestBatchSegmenter(unittest.TestCase):
         
         self.assertEqual(output_data['file'], "test_audio.json")
         self.assertEqual(len(output_data['bert_segments']), 2)
+        second = output_data['bert_segments'][1]
+        self.assertEqual((second['start_time'], second['end_time']), (2.0, 4.0))
+        self.assertEqual((second['start_word'], second['end_word']), (2, 6))
+
+        from src.segmentation.embedding_store import save_embeddings
+        args, _ = save_embeddings.call_args
+        self.assertEqual(args[1], "test_audio")
+        self.assertEqual(args[3], [(0, 1), (1, 2)])
 
     def test_find_segment_time(self):
         whisper_segments = [
@@ -66,5 +94,33 @@ class TestBatchSegmenter(unittest.TestCase):
         self.assertEqual(start, 0.0)
         self.assertEqual(end, 2.0)
 
+    def test_word_offsets_split_inside_transcript_segment(self):
+        whisper_segments = [
+            {"text": "so that was football", "start": 0.0, "end": 4.0},
+            {"text": "now the weather", "start": 5.0, "end": 8.0}
+        ]
+        text, word_times = flatten_text(whisper_segments)
+        self.assertEqual(len(word_times), len(text.split()))
+
+        # A topic boundary after "so that" falls inside the first segment
+        sentences = ["so that", "was football now the weather"]
+        word_spans = segment_word_spans(sentences, [(0, 1), (1, 2)])
+
+        self.assertEqual(word_spans, [(0, 2), (2, 7)])
+        self.assertEqual(word_span_time(word_spans[0], word_times), (0.0, 2.0))
+        self.assertEqual(word_span_time(word_spans[1], word_times), (2.0, 8.0))
+
+    def test_recognized_word_times_from_columnar_transcript(self):
+        transcript_path = os.path.join(self.cache_dir, "ep.json")
+        words = [{"word": w, "start": s, "end": e, "conf": 1.0}
+                 for w, s, e in [("now", 5.0, 5.25), ("the", 5.5, 5.75), ("weather", 7.0, 7.5)]]
+        transcript_store.write_columnar(transcript_store.columnar_path(transcript_path), words, [0, 3])
+
+        self.assertEqual(recognized_word_times(transcript_path, "now the weather"),
+                         [(5.0, 5.25), (5.5, 5.75), (7.0, 7.5)])
+        # Word count differs from the JSON text: fall back to spread times
+        self.assertIsNone(recognized_word_times(transcript_path, "now the weather today"))
+        self.assertIsNone(recognized_word_times(os.path.join(self.cache_dir, "other.json"), "now"))
+
 if __name__ == '__main__':
     unittest.main()
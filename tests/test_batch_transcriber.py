@@ -67,5 +67,22 @@ class TestBatchTranscriber(unittest.TestCase):
 
         mock_exists_patcher.stop()
 
+    @patch('src.transcription.batch_transcriber.os.listdir')
+    def test_transcribe_all_audios_parallel(self, mock_listdir):
+        mock_listdir.return_value = ["a.wav", "b.mp3", "notes.txt"]
+
+        from src.transcription.vosk_transcriber import transcribe_audio, transcribe_many
+        transcribe_many.return_value = []
+
+        transcribe_all_audios(workers=4, use_processes=True)
+
+        transcribe_audio.assert_not_called()
+        args, kwargs = transcribe_many.call_args
+        jobs = args[0]
+        self.assertEqual(len(jobs), 2)
+        self.assertIn("a.json", jobs[0][1])
+        self.assertEqual(kwargs["workers"], 4)
+        self.assertTrue(kwargs["use_processes"])
+
 if __name__ == '__main__':
     unittest.main()
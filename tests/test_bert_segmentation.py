@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# --- MOCK HEAVY DEPENDENCIES BEFORE IMPORT ---
+# Other tests replace src.segmentation.bert_segmentation in sys.modules, so
+# the real module is imported with only its model libraries mocked.
+with patch.dict(sys.modules, {
+    'sentence_transformers': MagicMock(),
+    'nltk': MagicMock(),
+    'nltk.tokenize': MagicMock(),
+}):
+    import importlib.util
+    _spec = importlib.util.spec_from_file_location(
+        "bert_segmentation_under_test",
+        os.path.join(os.path.dirname(__file__), '..', 'src', 'segmentation', 'bert_segmentation.py')
+    )
+    bert_segmentation = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(bert_segmentation)
+
+
+def topic_embeddings(topic_lengths, dim=16, noise=0.05, seed=0):
+    """Sentences drawn around one random centre per topic."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for length in topic_lengths:
+        centre = rng.normal(size=dim)
+        rows.extend(centre + noise * rng.normal(size=dim) for _ in range(length))
+    return np.array(rows, dtype=np.float32)
+
+
+def legacy_boundaries(embeddings, threshold):
+    """The original per-pair loop, for comparison."""
+    boundaries = []
+    for i in range(1, len(embeddings)):
+        a, b = embeddings[i], embeddings[i - 1]
+        sim = np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+        if sim < threshold:
+            boundaries.append(i)
+    return boundaries
+
+
+class TestBertSegmentation(unittest.TestCase):
+
+    def test_threshold_matches_pairwise_loop(self):
+        embeddings = np.random.default_rng(1).normal(size=(200, 16)).astype(np.float32)
+
+        for threshold in (0.0, 0.1, 0.55):
+            self.assertEqual(
+                bert_segmentation.segment_boundaries(embeddings, threshold=threshold),
+                legacy_boundaries(embeddings, threshold)
+            )
+
+    def test_depth_finds_topic_shifts(self):
+        embeddings = topic_embeddings([12, 9, 15])
+
+        boundaries = bert_segmentation.segment_boundaries(
+            embeddings, method="depth", window=3, min_sentences=3
+        )
+
+        self.assertEqual(boundaries, [12, 21])
+
+    def test_min_and_max_segment_lengths(self):
+        embeddings = np.random.default_rng(2).normal(size=(100, 16)).astype(np.float32)
+
+        boundaries = bert_segmentation.segment_boundaries(
+            embeddings, threshold=0.5, min_sentences=4, max_sentences=10
+        )
+
+        bounds = [0] + boundaries + [100]
+        lengths = [b - a for a, b in zip(bounds[:-1], bounds[1:])]
+        self.assertTrue(all(4 <= length <= 10 for length in lengths), lengths)
+
+    def test_spans_cover_all_sentences(self):
+        sentences = [f"sentence {i}." for i in range(6)]
+        embeddings = topic_embeddings([3, 3])
+
+        with patch.object(bert_segmentation, "split_sentences", return_value=sentences), \
+                patch.object(bert_segmentation, "get_model") as get_model:
+            get_model.return_value.encode.return_value = embeddings
+            segments, _, _, spans = bert_segmentation.topic_segments_with_embeddings("ignored")
+
+        self.assertEqual(spans, [(0, 3), (3, 6)])
+        self.assertEqual(segments[1], "sentence 3. sentence 4. sentence 5.")
+
+
+if __name__ == '__main__':
+    unittest.main()
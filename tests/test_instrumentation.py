@@ -0,0 +1,97 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import tempfile
+import shutil
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import instrumentation
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.patches = [
+            patch.object(instrumentation, "METRICS_DIR", self.metrics_dir),
+            patch.object(instrumentation, "ENABLED", True),
+            patch.object(instrumentation, "_metrics", {}),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.metrics_dir)
+
+    def read_spans(self):
+        with open(os.path.join(self.metrics_dir, instrumentation.SPANS_FILE), "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_nested_spans_and_calls(self):
+        with instrumentation.span("job", job_id="7") as outer:
+            with instrumentation.span("segmentation", file="ep") as inner:
+                with instrumentation.timer("minilm.encode", items=30):
+                    pass
+                with instrumentation.timer("minilm.encode", items=10):
+                    pass
+                inner.items = 4
+            outer.items = 1
+
+        segmentation, job = self.read_spans()
+        self.assertEqual(segmentation["span"], "segmentation")
+        self.assertEqual(segmentation["parent"], job["id"])
+        self.assertEqual(segmentation["root"], job["id"])
+        self.assertEqual(segmentation["file"], "ep")
+        self.assertEqual(segmentation["items"], 4)
+        self.assertEqual(segmentation["calls"]["minilm.encode"]["count"], 2)
+        self.assertEqual(segmentation["calls"]["minilm.encode"]["items"], 40)
+        self.assertEqual(job["parent"], None)
+        self.assertEqual(job["job_id"], "7")
+
+        summary = instrumentation.summary()
+        self.assertEqual(summary["minilm.encode"]["count"], 2)
+        self.assertEqual(summary["segmentation"]["items"], 4)
+
+    def test_failed_span_is_recorded_and_reraised(self):
+        with self.assertRaises(ValueError):
+            with instrumentation.span("enrichment"):
+                raise ValueError("bad segment file")
+
+        span, = self.read_spans()
+        self.assertEqual(span["status"], "error")
+        self.assertEqual(span["error"], "ValueError: bad segment file")
+        self.assertEqual(instrumentation.summary()["enrichment"]["errors"], 1)
+
+    def test_top_level_span_writes_prometheus_file(self):
+        with patch.object(instrumentation, "process_name", return_value="worker"):
+            with instrumentation.span("transcription"):
+                with instrumentation.timer("vosk.accept_waveform"):
+                    pass
+
+            with open(os.path.join(self.metrics_dir, "worker.prom"), "r", encoding="utf-8") as f:
+                text = f.read()
+
+        self.assertIn("# TYPE pipeline_span_seconds histogram", text)
+        self.assertIn('pipeline_span_seconds_count{process="worker",name="transcription"} 1', text)
+        self.assertIn('pipeline_span_seconds_bucket{process="worker",name="vosk.accept_waveform",le="+Inf"} 1', text)
+        # Buckets are cumulative: the largest finite one holds every fast call
+        self.assertIn('pipeline_span_seconds_bucket{process="worker",name="vosk.accept_waveform",le="3600"} 1', text)
+
+    def test_disabled_writes_nothing(self):
+        with patch.object(instrumentation, "ENABLED", False):
+            with instrumentation.span("segmentation") as s:
+                s.items = 3
+                with instrumentation.timer("minilm.encode"):
+                    pass
+
+        self.assertEqual(os.listdir(self.metrics_dir), [])
+        self.assertEqual(instrumentation.summary(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
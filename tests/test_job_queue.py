@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import shutil
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pipeline import job_queue
+
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        patcher = patch.object(job_queue, "DB_PATH", os.path.join(self.tmp, "queue.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_claims_oldest_job_once(self):
+        job_queue.enqueue("a.mp3", job_id="a")
+        job_queue.enqueue("b.mp3", job_id="b")
+
+        first = job_queue.claim()
+        second = job_queue.claim()
+
+        self.assertEqual((first["id"], first["status"], first["attempts"]), ("a", "running", 1))
+        self.assertEqual(second["id"], "b")
+        self.assertIsNone(job_queue.claim())
+        self.assertEqual(job_queue.depth(), {"queued": 0, "running": 2, "completed": 0, "failed": 0})
+
+    def test_resubmitting_an_active_job_does_not_duplicate_it(self):
+        job_queue.enqueue("a.mp3", job_id="a")
+        job_queue.enqueue("a.mp3", job_id="a")
+
+        self.assertEqual(job_queue.depth()["queued"], 1)
+
+    def test_backpressure(self):
+        with patch.object(job_queue, "MAX_QUEUED", 2):
+            job_queue.enqueue("a.mp3")
+            job_queue.enqueue("b.mp3")
+            with self.assertRaises(job_queue.QueueFull):
+                job_queue.enqueue("c.mp3")
+
+    def test_failed_attempts_back_off_then_fail(self):
+        job_queue.enqueue("a.mp3", job_id="a", max_attempts=2)
+
+        job = job_queue.claim()
+        job_queue.stage_done("a", "transcription", "t.json", 1.0)
+        job_queue.stage_started("a", "segmentation")
+        self.assertEqual(job_queue.fail("a", "segmentation", "boom"), job_queue.RETRY_DELAY_SECONDS)
+        # Not due until the retry delay has passed
+        self.assertIsNone(job_queue.claim())
+
+        with patch.object(job_queue.time, "time", return_value=job["updated_at"] + 3600):
+            retry = job_queue.claim()
+        self.assertEqual(retry["outputs"], {"transcription": "t.json"})
+        self.assertIsNone(job_queue.fail("a", "segmentation", "boom again"))
+
+        job = job_queue.get_job("a")
+        self.assertEqual((job["status"], job["attempts"], job["error"]), ("failed", 2, "boom again"))
+        self.assertEqual([(s["stage"], s["state"]) for s in job["stages"]],
+                         [("transcription", "done"), ("segmentation", "failed")])
+
+    def test_recover_requeues_interrupted_jobs(self):
+        job_queue.enqueue("a.mp3", job_id="a", max_attempts=2)
+        job_queue.enqueue("b.mp3", job_id="b", max_attempts=1)
+        job_queue.claim()
+        job_queue.claim()
+        job_queue.stage_started("a", "transcription")
+
+        requeued, failed = job_queue.recover()
+
+        self.assertEqual((requeued, failed), (["a"], ["b"]))
+        job = job_queue.claim()
+        self.assertEqual((job["id"], job["attempts"]), ("a", 2))
+        self.assertEqual(job["stages"][0]["state"], "interrupted")
+        self.assertEqual(job_queue.get_job("b")["status"], "failed")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import tempfile
+import shutil
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.search import lexical_index
+
+
+class TestLexicalIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.database = os.path.join(self.root, "database")
+        os.makedirs(self.database)
+        self.patchers = [
+            patch.object(lexical_index, "DATABASE_DIR", self.database),
+            patch.object(lexical_index, "SEGMENT_DIR", os.path.join(self.root, "segments")),
+            patch.object(lexical_index, "TRANSCRIPT_DIR", os.path.join(self.root, "transcripts")),
+            patch.object(lexical_index, "INDEX_DIR", os.path.join(self.root, "index")),
+        ]
+        for p in self.patchers:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+        shutil.rmtree(self.root)
+
+    def write_episode(self, name, texts, keywords=None):
+        records = [
+            {
+                "segment_id": i + 1,
+                "text": text,
+                "summary": "",
+                "keywords": (keywords or {}).get(i, []),
+                "start_time": 100.0 * i,
+                "end_time": 100.0 * i + 100.0
+            }
+            for i, text in enumerate(texts)
+        ]
+        with open(os.path.join(self.database, name), "w", encoding="utf-8") as f:
+            json.dump(records, f)
+
+    def test_varint_delta_round_trip(self):
+        values = [0, 1, 127, 128, 300, 16384, 2 ** 31]
+        encoded = lexical_index.encode_varints(lexical_index.delta_encode(values))
+        decoded, _ = lexical_index.decode_varints(encoded)
+        self.assertEqual(lexical_index.delta_decode(decoded), values)
+        self.assertEqual(len(lexical_index.encode_varints([127, 128])), 3)
+
+    def test_bm25_ranking_and_match_time(self):
+        self.write_episode("a.json", [
+            "we talked about the weather today",
+            "wolves wolves everywhere and more wolves in the hills",
+            "one word about wolves at the very end of a long segment about other things entirely",
+        ])
+        self.write_episode("b.json", ["nothing relevant here just some talk about the news and the sports results"], keywords={0: ["wolves"]})
+        lexical_index.update_index()
+
+        index = lexical_index.load_index()
+        hits = lexical_index.search(index, "wolves")
+
+        self.assertEqual([(h["file"], h["segment_id"]) for h in hits][0], ("a.json", 2))
+        self.assertEqual(len(hits), 3)
+
+        # "wolves" is word 3 of 16 in segment 3, which spans 200-300s
+        third = next(h for h in hits if h["segment_id"] == 3)
+        self.assertEqual(third["position"], 3)
+        self.assertAlmostEqual(third["match_time"], 200.0 + 100.0 * 3 / 16, places=2)
+
+        # Keyword-only match: no word position to point at
+        keyword_hit = next(h for h in hits if h["file"] == "b.json")
+        self.assertIsNone(keyword_hit["match_time"])
+
+    def test_phrase_and_episode_filter(self):
+        self.write_episode("a.json", ["climate change is real", "change the climate of the room"])
+        self.write_episode("b.json", ["the climate change debate"])
+        lexical_index.update_index()
+        index = lexical_index.load_index()
+
+        hits = lexical_index.search(index, "climate change", phrase=True)
+        self.assertEqual({(h["file"], h["segment_id"]) for h in hits}, {("a.json", 1), ("b.json", 1)})
+        self.assertEqual(next(h for h in hits if h["file"] == "b.json")["position"], 1)
+
+        hits = lexical_index.search(index, "climate", file_name="b.json")
+        self.assertEqual([h["file"] for h in hits], ["b.json"])
+
+    def test_match_time_uses_recognized_word_times(self):
+        from src.transcription import transcript_store
+
+        text = "the grey wolves came back"
+        self.write_episode("ep.json", [text])
+        os.makedirs(os.path.join(self.root, "segments"))
+        os.makedirs(os.path.join(self.root, "transcripts"))
+        with open(os.path.join(self.root, "segments", "ep.json"), "w", encoding="utf-8") as f:
+            json.dump({"bert_segments": [{"segment_id": 1, "text": text, "start_word": 0, "end_word": 5}]}, f)
+        transcript_path = os.path.join(self.root, "transcripts", "ep.json")
+        with open(transcript_path, "w", encoding="utf-8") as f:
+            json.dump({"segments": [{"start": 0.0, "end": 10.0, "text": text}]}, f)
+
+        # Evenly spread, "wolves" would start at 4.0s; the recognizer heard it at 7.25s
+        starts = [0.0, 0.5, 7.25, 8.0, 9.0]
+        words = [{"word": w, "start": s, "end": s + 0.5} for w, s in zip(text.split(), starts)]
+        transcript_store.write_columnar(transcript_store.columnar_path(transcript_path), words, [0, 5])
+
+        lexical_index.update_index()
+        hit, = lexical_index.search(lexical_index.load_index(), "wolves")
+        self.assertEqual(hit["match_time"], 7.25)
+
+    def test_update_reindexes_only_changed_episodes(self):
+        self.write_episode("a.json", ["first episode"])
+        self.assertEqual(lexical_index.update_index(), 1)
+        self.assertEqual(lexical_index.update_index(), 0)
+
+        self.write_episode("b.json", ["second episode"])
+        os.remove(os.path.join(self.database, "a.json"))
+        self.assertEqual(lexical_index.update_index(), 2)
+
+        index = lexical_index.load_index()
+        self.assertEqual([e["file"] for e in index["episodes"]], ["b.json"])
+        self.assertEqual(lexical_index.search(index, "first"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
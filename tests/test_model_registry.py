@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import model_registry
+
+
+class TestModelRegistry(unittest.TestCase):
+
+    def tearDown(self):
+        model_registry._loaders.pop("test-model", None)
+        model_registry.unload("test-model")
+
+    def test_loads_on_first_use_only(self):
+        loader = MagicMock(return_value="model")
+        model_registry.register("test-model", loader)
+
+        self.assertFalse(model_registry.is_loaded("test-model"))
+        loader.assert_not_called()
+
+        self.assertEqual(model_registry.get("test-model"), "model")
+        self.assertEqual(model_registry.get("test-model"), "model")
+        loader.assert_called_once()
+        self.assertIn("test-model", model_registry.stats()["loaded"])
+
+    def test_one_call_lock_per_model(self):
+        self.assertIs(model_registry.lock("test-model"), model_registry.lock("test-model"))
+        self.assertIsNot(model_registry.lock("test-model"), model_registry.lock("other-model"))
+
+        # Re-entrant: a fallback inside a locked call may call the model again
+        with model_registry.lock("test-model"):
+            with model_registry.lock("test-model"):
+                pass
+
+    def test_unknown_model(self):
+        with self.assertRaises(KeyError):
+            model_registry.get("test-model")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import threading
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.search import server
+
+
+class TestIndexRefresh(unittest.TestCase):
+
+    def setUp(self):
+        self.module = MagicMock()
+        self.module.load_manifest.return_value = {"version": 1}
+        self.module.load_index.return_value = "first index"
+        patchers = [
+            patch.dict(server.INDEX_MODULES, {"lexical": self.module}),
+            patch.dict(server._state, {"lexical": {"index": None, "checked_at": 0.0, "manifest": None}}),
+            patch.dict(server._refresh_locks, {"lexical": threading.Lock()}),
+        ]
+        for p in patchers:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_searches_do_not_wait_for_a_refresh(self):
+        self.assertEqual(server.get_index("lexical"), "first index")
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_update():
+            started.set()
+            release.wait(5)
+
+        self.module.update_index.side_effect = slow_update
+        self.module.load_manifest.return_value = {"version": 2}
+        self.module.load_index.return_value = "second index"
+        server._state["lexical"]["checked_at"] = 0.0
+
+        # Starts the refresh, and the searches during it keep the old index
+        self.assertEqual(server.get_index("lexical"), "first index")
+        self.assertTrue(started.wait(5))
+        server._state["lexical"]["checked_at"] = 0.0
+        self.assertEqual(server.get_index("lexical"), "first index")
+
+        release.set()
+        with server._refresh_locks["lexical"]:
+            pass
+        self.assertEqual(self.module.update_index.call_count, 2)
+        self.assertEqual(server.get_index("lexical"), "second index")
+
+
+if __name__ == '__main__':
+    unittest.main()
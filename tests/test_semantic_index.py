@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import tempfile
+import shutil
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.search import semantic_index
+
+DIM = 8
+
+
+def fake_encode(texts):
+    """One-hot vectors keyed on the first word, so matching is predictable."""
+    vocab = ["wolves", "markets", "music"]
+    vectors = np.full((len(texts), DIM), 0.01, dtype=np.float32)
+    for i, text in enumerate(texts):
+        vectors[i, vocab.index(text.split()[0])] = 1.0
+    return vectors
+
+
+class TestSemanticIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.database = os.path.join(self.root, "database")
+        os.makedirs(self.database)
+        self.patchers = [
+            patch.object(semantic_index, "DATABASE_DIR", self.database),
+            patch.object(semantic_index, "SEGMENT_DIR", os.path.join(self.root, "segments")),
+            patch.object(semantic_index, "INDEX_DIR", os.path.join(self.root, "index")),
+            patch.object(semantic_index, "encode_texts", side_effect=fake_encode),
+            # No segmentation sidecars: vectors come from the encoder
+            patch.object(semantic_index, "has_embeddings", return_value=False),
+            patch.object(semantic_index, "split_sentences", side_effect=lambda text: text.split(". ")),
+        ]
+        for p in self.patchers:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+        shutil.rmtree(self.root)
+
+    def write_episode(self, name, texts):
+        records = [
+            {"file": name, "segment_id": i + 1, "text": text, "start_time": 10.0 * i, "end_time": 10.0 * i + 9}
+            for i, text in enumerate(texts)
+        ]
+        with open(os.path.join(self.database, name), "w", encoding="utf-8") as f:
+            json.dump(records, f)
+
+    def test_search_returns_timestamps_across_episodes(self):
+        self.write_episode("a.json", ["wolves roam", "markets fell"])
+        self.write_episode("b.json", ["music tonight", "wolves howl"])
+        self.assertEqual(semantic_index.update_index(), 2)
+
+        index = semantic_index.load_index()
+        hits = semantic_index.search(index, "wolves", top_k=2)
+
+        self.assertEqual({(h["file"], h["segment_id"]) for h in hits}, {("a.json", 1), ("b.json", 2)})
+        times = {h["file"]: (h["start_time"], h["end_time"]) for h in hits}
+        self.assertEqual(times, {"a.json": (0.0, 9.0), "b.json": (10.0, 19.0)})
+
+        hits = semantic_index.search(index, "wolves", top_k=5, file_name="b.json")
+        self.assertEqual(hits[0]["segment_id"], 2)
+        self.assertTrue(all(h["file"] == "b.json" for h in hits))
+
+    def test_update_only_touches_new_episodes(self):
+        self.write_episode("a.json", ["wolves roam"])
+        semantic_index.update_index()
+
+        self.write_episode("b.json", ["music tonight"])
+        with patch.object(semantic_index, "add_episode", wraps=semantic_index.add_episode) as add:
+            self.assertEqual(semantic_index.update_index(), 1)
+        add.assert_called_once()
+        self.assertEqual(add.call_args[0][0], "b.json")
+
+        self.assertEqual(len(semantic_index.load_index()["records"]), 2)
+
+    def test_segments_without_sidecar_are_pooled_sentence_vectors(self):
+        self.write_episode("a.json", ["wolves roam. music plays", "markets fell"])
+        semantic_index.update_index()
+
+        vectors = np.load(os.path.join(self.root, "index", "a.npy")).astype(np.float32)
+        expected = semantic_index.normalize(fake_encode(["wolves roam", "music plays"]).mean(axis=0))
+        np.testing.assert_allclose(vectors[0], expected, atol=1e-3)
+
+        # Shards indexed with an older vector method are rebuilt
+        manifest = semantic_index.load_manifest()
+        manifest["a.json"]["vectors"] = "full-text-minilm"
+        semantic_index.save_manifest(manifest)
+        self.assertEqual(semantic_index.update_index(), 1)
+        self.assertEqual(semantic_index.load_manifest()["a.json"]["vectors"], semantic_index.VECTOR_METHOD)
+
+    def test_ivf_agrees_with_exact_search_on_clusters(self):
+        rng = np.random.default_rng(0)
+        centres = semantic_index.normalize(rng.normal(size=(20, DIM * 4)))
+        vectors = semantic_index.normalize(np.repeat(centres, 50, axis=0) + 0.05 * rng.normal(size=(1000, DIM * 4)))
+        records = [{"file": "x.json", "segment_id": i} for i in range(1000)]
+
+        exact = {"vectors": vectors.astype(np.float16), "records": records, "episodes": {}, "ivf": None}
+        partitioned = dict(exact, ivf=semantic_index.build_ivf(vectors))
+
+        for centre in centres[:5]:
+            top_exact = semantic_index.search(exact, None, top_k=1, query_vector=centre)[0]["segment_id"]
+            top_ivf = semantic_index.search(partitioned, None, top_k=1, query_vector=centre)[0]["segment_id"]
+            self.assertEqual(top_exact, top_ivf)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+import shutil
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import stage_cache
+
+
+class TestStageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.patcher = patch.object(stage_cache, "CACHE_DIR", self.cache_dir)
+        self.patcher.start()
+        stage_cache._stats.clear()
+        stage_cache._size = None
+        stage_cache._replaced.clear()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.cache_dir)
+
+    def test_miss_then_hit(self):
+        key = stage_cache.make_key("segmentation", "abc", "all-MiniLM-L6-v2", {"threshold": 0.55})
+
+        self.assertIsNone(stage_cache.get("segmentation", key))
+        stage_cache.put("segmentation", key, [{"segment_id": 1, "text": "hi"}])
+
+        self.assertEqual(stage_cache.get("segmentation", key), [{"segment_id": 1, "text": "hi"}])
+        self.assertEqual(stage_cache.stats(), {"segmentation": {"hits": 1, "misses": 1}})
+
+    def test_key_depends_on_params_and_model(self):
+        base = stage_cache.make_key("enrichment", "abc", "bart", {"top_k": 8})
+
+        self.assertEqual(base, stage_cache.make_key("enrichment", "abc", "bart", {"top_k": 8}))
+        self.assertNotEqual(base, stage_cache.make_key("enrichment", "abc", "bart", {"top_k": 5}))
+        self.assertNotEqual(base, stage_cache.make_key("enrichment", "abc", "t5", {"top_k": 8}))
+        self.assertNotEqual(base, stage_cache.make_key("enrichment", "abd", "bart", {"top_k": 8}))
+
+    def test_evicts_least_recently_used(self):
+        keys = [stage_cache.make_key("transcription", str(i), "vosk", {}) for i in range(3)]
+        for i, key in enumerate(keys):
+            stage_cache.put("transcription", key, {"text": "x" * 100})
+            # Distinct, increasing access times
+            path = stage_cache._entry_path("transcription", key)
+            os.utime(path, (1000 + i, 1000 + i))
+
+        size = os.path.getsize(stage_cache._entry_path("transcription", keys[0]))
+        removed = stage_cache.evict(max_bytes=2 * size)
+
+        self.assertEqual(removed, 1)
+        self.assertFalse(os.path.exists(stage_cache._entry_path("transcription", keys[0])))
+        self.assertTrue(os.path.exists(stage_cache._entry_path("transcription", keys[2])))
+
+    def test_put_only_scans_when_over_the_limit(self):
+        scans = []
+        real_walk = os.walk
+
+        def counting_walk(top):
+            scans.append(top)
+            return real_walk(top)
+
+        keys = [stage_cache.make_key("transcription", str(i), "vosk", {}) for i in range(10)]
+        with patch.object(stage_cache.os, "walk", side_effect=counting_walk):
+            for key in keys[:5]:
+                stage_cache.put("transcription", key, {"text": "x" * 100})
+            # First put scans to learn the size; the rest only add to it
+            self.assertEqual(len(scans), 1)
+
+            size = os.path.getsize(stage_cache._entry_path("transcription", keys[0]))
+            with patch.object(stage_cache, "MAX_CACHE_BYTES", 6 * size):
+                stage_cache.put("transcription", keys[5], {"text": "x" * 100})
+                self.assertEqual(len(scans), 1)
+                stage_cache.put("transcription", keys[6], {"text": "x" * 100})
+
+        self.assertEqual(len(scans), 2)
+        self.assertEqual(stage_cache._size, 6 * size)
+
+    def test_overwrite_with_attachment_keeps_the_size_exact(self):
+        key = stage_cache.make_key("segmentation", "abc", "all-MiniLM-L6-v2", {})
+
+        def write_entry():
+            with open(stage_cache.attachment_path("segmentation", key, "vectors.npy"), "wb") as f:
+                f.write(b"\0" * 1000)
+            stage_cache.put("segmentation", key, {"text": "x" * 100})
+
+        write_entry()
+        write_entry()
+
+        self.assertEqual(stage_cache._size, stage_cache._entry_bytes(stage_cache._entry_path("segmentation", key), key))
+        self.assertEqual(stage_cache._replaced, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
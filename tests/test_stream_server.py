@@ -0,0 +1,121 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import importlib.util
+import http.client
+import threading
+import sys
+import os
+import json
+from http.server import ThreadingHTTPServer
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+
+def _load(name, *parts):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, *parts))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# --- MOCK HEAVY DEPENDENCIES BEFORE IMPORT ---
+# Other tests replace src.transcription.vosk_transcriber in sys.modules, so
+# the real modules are loaded from their files under private names.
+with patch.dict(sys.modules, {'vosk': MagicMock()}):
+    vosk_transcriber = _load("vosk_transcriber_for_stream", "src", "transcription", "vosk_transcriber.py")
+    with patch.dict(sys.modules, {'src.transcription.vosk_transcriber': vosk_transcriber}):
+        import src.transcription
+        with patch.object(src.transcription, "vosk_transcriber", vosk_transcriber, create=True):
+            stream_server = _load("stream_server_under_test", "src", "transcription", "stream_server.py")
+
+
+class WordPerChunkRecognizer:
+    """Final result for every even chunk, partial for every odd one."""
+
+    def __init__(self, model, sample_rate):
+        self.chunks = []
+
+    def SetWords(self, enabled):
+        pass
+
+    def AcceptWaveform(self, data):
+        self.chunks.append(data)
+        return len(self.chunks) % 2 == 0
+
+    def PartialResult(self):
+        return json.dumps({"partial": f"p{len(self.chunks)}"})
+
+    def Result(self):
+        i = len(self.chunks)
+        return json.dumps({"text": f"w{i}", "result": [{"word": f"w{i}", "start": i, "end": i + 0.5}]})
+
+    def FinalResult(self):
+        return json.dumps({"text": ""})
+
+
+class TestStreamServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), stream_server.StreamHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.conn = http.client.HTTPConnection("127.0.0.1", self.server.server_port, timeout=5)
+
+        patches = [
+            patch.object(vosk_transcriber, "KaldiRecognizer", WordPerChunkRecognizer),
+            patch.object(vosk_transcriber, "get_model", return_value=None),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_chunked_upload_streams_ndjson_events(self):
+        # Chunks larger than READ_SIZE are split before recognition
+        body = iter([b"\x00" * 4000, b"\x00" * 12000])
+        self.conn.request("POST", "/transcribe/stream", body=body, encode_chunked=True)
+
+        response = self.conn.getresponse()
+        events = [json.loads(line) for line in response.read().splitlines()]
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Content-Type"), "application/x-ndjson")
+        self.assertEqual([(e["type"], e["text"]) for e in events],
+                         [("partial", "p1"), ("final", "w2"), ("partial", "p3"), ("final", "")])
+        self.assertEqual(events[1]["words"][0]["word"], "w2")
+        self.assertEqual(events[-1]["audio_seconds"], 0.5)
+
+    def test_odd_sized_chunks_are_realigned_to_samples(self):
+        recognizers = []
+
+        def recognizer(model, sample_rate):
+            recognizers.append(WordPerChunkRecognizer(model, sample_rate))
+            return recognizers[-1]
+
+        audio = bytes(range(256)) * 4
+        pieces = [audio[:3], audio[3:4], audio[4:517], audio[517:]]
+        with patch.object(vosk_transcriber, "KaldiRecognizer", recognizer):
+            self.conn.request("POST", "/transcribe/stream", body=iter(pieces), encode_chunked=True)
+            response = self.conn.getresponse()
+            response.read()
+
+        self.assertEqual(response.status, 200)
+        chunks = recognizers[0].chunks
+        self.assertTrue(all(len(data) % 2 == 0 for data in chunks))
+        self.assertEqual(b"".join(chunks), audio)
+
+    def test_missing_model_is_unavailable(self):
+        with patch.object(vosk_transcriber, "get_model", side_effect=FileNotFoundError("no model")):
+            self.conn.request("POST", "/transcribe/stream", body=b"\x00" * 10)
+            response = self.conn.getresponse()
+
+        self.assertEqual(response.status, 503)
+        self.assertEqual(json.loads(response.read()), {"error": "no model"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+import types
+import importlib.util
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Other tests replace the summarizer and bert_segmentation modules in
+# sys.modules, so the real ones are loaded from their files.
+def load_module(name, filename):
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(os.path.dirname(__file__), '..', 'src', 'segmentation', filename)
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+summarizer = load_module("summarizer_under_test", "summarizer.py")
+bert_segmentation = load_module("bert_segmentation_for_summarizer", "bert_segmentation.py")
+
+
+def fake_split(text):
+    return [s.strip() + "." for s in text.split(".") if s.strip()]
+
+
+class TestSummarizerBackends(unittest.TestCase):
+
+    TEXT = "Dogs bark at night. Cats sleep all day. Dogs bark at the mailman."
+
+    def setUp(self):
+        patcher = patch.dict(sys.modules, {"src.segmentation.bert_segmentation": bert_segmentation})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_extractive_picks_central_sentences_from_segmentation_vectors(self):
+        # The two dog sentences point the same way, the cat one does not
+        vectors = np.array([[1.0, 0.1], [0.0, 1.0], [1.0, 0.0]], dtype=np.float16)
+
+        with patch.object(bert_segmentation, "split_sentences", fake_split), \
+                patch.object(bert_segmentation, "get_model") as get_model:
+            summary = summarizer.summarize_segment(self.TEXT, backend="extractive", sentence_vectors=vectors)
+
+        get_model.assert_not_called()
+        self.assertEqual(summary, "Dogs bark at night. Dogs bark at the mailman.")
+
+    def test_extractive_encodes_texts_without_matching_vectors(self):
+        encoder = MagicMock()
+        encoder.encode.side_effect = lambda sentences, batch_size: np.array(
+            [[1.0, 0.0] if "Dogs" in s else [0.0, 1.0] for s in sentences]
+        )
+        texts = [self.TEXT, "Too short", "One sentence only here."]
+        stale = np.zeros((2, 2), dtype=np.float16)
+
+        with patch.object(bert_segmentation, "split_sentences", fake_split), \
+                patch.object(bert_segmentation, "get_model", return_value=encoder), \
+                patch.object(summarizer.model_registry, "lock", wraps=summarizer.model_registry.lock) as lock:
+            summaries = summarizer.summarize_segments(texts, backend="extractive",
+                                                      sentence_vectors=[stale, None, None])
+
+        # MiniLM is shared with the keyword threads
+        lock.assert_called_once_with("minilm")
+
+        # One encode call, only for the text that has something to choose from
+        encoder.encode.assert_called_once()
+        self.assertEqual(len(encoder.encode.call_args[0][0]), 3)
+        self.assertEqual(summaries, ["Dogs bark at night. Dogs bark at the mailman.",
+                                     "Too short", "One sentence only here."])
+
+    def test_int8_backend_uses_its_own_quantized_model(self):
+        pipe = MagicMock()
+        pipe.tokenizer.return_value = {"input_ids": [[1, 2, 3]]}
+        pipe.return_value = [{"summary_text": "A quantized summary"}]
+
+        with patch.object(summarizer.model_registry, "get", return_value=pipe) as get:
+            summaries = summarizer.summarize_segments(["some long enough text"], backend="bart-int8")
+
+        get.assert_called_once_with("bart-int8")
+        self.assertEqual(summaries, ["A quantized summary"])
+        self.assertNotEqual(summarizer.model_id("bart-int8"), summarizer.model_id("bart"))
+
+        torch = types.SimpleNamespace(
+            nn=types.SimpleNamespace(Linear="Linear"), qint8="qint8",
+            quantization=types.SimpleNamespace(quantize_dynamic=MagicMock(return_value="int8 model"))
+        )
+        with patch.dict(sys.modules, {"torch": torch}), \
+                patch.object(summarizer, "_load_summarizer",
+                             return_value=types.SimpleNamespace(model="fp32 model")):
+            loaded = summarizer._load_quantized_summarizer()
+
+        torch.quantization.quantize_dynamic.assert_called_once_with("fp32 model", {"Linear"}, dtype="qint8")
+        self.assertEqual(loaded.model, "int8 model")
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            summarizer.summarize_segments(["some long enough text"], backend="t5")
+
+
+if __name__ == '__main__':
+    unittest.main()
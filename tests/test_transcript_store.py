@@ -0,0 +1,66 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.transcription import transcript_store
+
+
+def word(w, start, end, conf=1.0):
+    return {"word": w, "start": start, "end": end, "conf": conf}
+
+
+WORDS = [
+    word("the", 0.0, 0.2), word("wolves", 0.25, 0.7, 0.5), word("came", 0.8, 1.1),
+    word("back", 2.5, 2.9), word("to", 3.0, 3.1), word("the", 3.1, 3.3), word("park", 3.4, 3.9),
+]
+# Two transcript segments: words 0-2 and 3-6
+OFFSETS = [0, 3, 7]
+
+
+class TestTranscriptStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = transcript_store.write_columnar(os.path.join(self.tmp, "ep.words"), WORDS, OFFSETS)
+        self.store = transcript_store.load_columnar(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_round_trip(self):
+        self.assertEqual(transcript_store.words(self.store), WORDS)
+        # Repeated words share one vocabulary entry
+        self.assertEqual(self.store["vocab"], ["the", "wolves", "came", "back", "to", "park"])
+        self.assertEqual(transcript_store.segments(self.store), [
+            {"start": 0.0, "end": 1.1, "text": "the wolves came"},
+            {"start": 2.5, "end": 3.9, "text": "back to the park"},
+        ])
+
+    def test_time_range(self):
+        # Overlapping words at both edges are included
+        self.assertEqual(transcript_store.text_between(self.store, 0.5, 3.05), "wolves came back to")
+        self.assertEqual(transcript_store.text_between(self.store, 1.5, 2.0), "")
+        self.assertEqual(transcript_store.word_range(self.store, 10.0, 20.0), (7, 7))
+
+    def test_smaller_than_json(self):
+        many = [word(f"w{i % 500}", i * 0.3, i * 0.3 + 0.25, 0.87) for i in range(5000)]
+        path = transcript_store.write_columnar(os.path.join(self.tmp, "big.words"), many, [0, 5000])
+        json_size = len(json.dumps(many, indent=4))
+
+        self.assertLess(os.path.getsize(path), json_size / 5)
+
+    def test_empty_transcript(self):
+        path = transcript_store.write_columnar(os.path.join(self.tmp, "empty.words"), [], [0])
+        store = transcript_store.load_columnar(path)
+
+        self.assertEqual(transcript_store.words(store), [])
+        self.assertEqual(transcript_store.segments(store), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import importlib.util
+import io
+import sys
+import os
+import json
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+# --- MOCK HEAVY DEPENDENCIES BEFORE IMPORT ---
+# Other tests replace src.transcription.vosk_transcriber in sys.modules, so
+# the real module is loaded from its file under a private name.
+with patch.dict(sys.modules, {'vosk': MagicMock()}):
+    _spec = importlib.util.spec_from_file_location(
+        "vosk_transcriber_under_test",
+        os.path.join(ROOT, "src", "transcription", "vosk_transcriber.py")
+    )
+    vosk_transcriber = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(vosk_transcriber)
+
+
+def word(w, start, end):
+    return {"word": w, "start": start, "end": end, "conf": 1.0}
+
+
+class FakeRecognizer:
+    """Accepts every chunk and reports one word per chunk as a final result."""
+
+    def __init__(self, model, sample_rate):
+        self.chunks = []
+
+    def SetWords(self, enabled):
+        pass
+
+    def AcceptWaveform(self, data):
+        self.chunks.append(data)
+        return True
+
+    def Result(self):
+        i = len(self.chunks)
+        return json.dumps({"text": f"w{i}", "result": [word(f"w{i}", i, i + 0.5)]})
+
+    def FinalResult(self):
+        return json.dumps({"text": ""})
+
+
+class FakeStreamingRecognizer(FakeRecognizer):
+    """Finishes an utterance every third chunk, with partials in between."""
+
+    def AcceptWaveform(self, data):
+        self.chunks.append(data)
+        return len(self.chunks) % 3 == 0
+
+    def PartialResult(self):
+        # Unchanged on the second chunk of each utterance
+        return json.dumps({"partial": f"partial {(len(self.chunks) + 2) // 3}"})
+
+    def FinalResult(self):
+        return json.dumps({"text": "tail", "result": [word("tail", 9.0, 9.5)]})
+
+
+class TestVoskTranscriber(unittest.TestCase):
+
+    def test_group_words_breaks_on_pause(self):
+        results = [word("hello", 0.0, 0.5), word("world", 0.6, 1.0), word("again", 2.5, 3.0)]
+
+        segments = vosk_transcriber.group_words_into_segments(results)
+
+        self.assertEqual(len(segments), 2)
+        self.assertEqual(segments[0], {"start": 0.0, "end": 1.0, "text": "hello world"})
+        self.assertEqual(segments[1], {"start": 2.5, "end": 3.0, "text": "again"})
+
+    def test_group_words_breaks_long_segments(self):
+        results = [word(f"w{i}", i * 0.5, i * 0.5 + 0.4) for i in range(30)]
+
+        segments = vosk_transcriber.group_words_into_segments(results)
+
+        self.assertGreater(len(segments), 1)
+        self.assertTrue(all(s["end"] - s["start"] <= 10.0 for s in segments))
+
+    @patch.object(vosk_transcriber, "KaldiRecognizer", FakeRecognizer)
+    def test_recognize_stream_uses_read_size(self):
+        stream = io.BytesIO(b"\x00" * 100)
+
+        results, text = vosk_transcriber.recognize_stream(stream, model=None, read_size=40)
+
+        # 100 bytes in 40-byte reads -> 3 chunks
+        self.assertEqual([r["word"] for r in results], ["w1", "w2", "w3"])
+        self.assertEqual(text, "w1 w2 w3")
+
+    @patch.object(vosk_transcriber, "KaldiRecognizer", FakeStreamingRecognizer)
+    def test_stream_recognize_emits_partials_and_finals(self):
+        chunks = [b"\x00" * 3200] * 4
+
+        events = list(vosk_transcriber.stream_recognize(iter(chunks), model=None))
+
+        self.assertEqual(
+            [(e["type"], e["text"], e["chunk"]) for e in events],
+            [("partial", "partial 1", 1), ("final", "w3", 3), ("partial", "partial 2", 4), ("final", "tail", 4)]
+        )
+        # 4 chunks of 3200 bytes = 6400 samples = 0.4s at 16 kHz
+        self.assertEqual(events[-1]["audio_seconds"], 0.4)
+        self.assertEqual(events[-1]["words"][0]["word"], "tail")
+        self.assertTrue(all(e["latency_ms"] >= 0 for e in events))
+
+    @patch.object(vosk_transcriber, "KaldiRecognizer", FakeRecognizer)
+    @patch.object(vosk_transcriber, "open_pcm_stream")
+    def test_transcribe_pcm_raises_on_ffmpeg_error(self, mock_open_stream):
+        proc = MagicMock()
+        proc.stdout = io.BytesIO(b"")
+        proc.stderr = io.BytesIO(b"Invalid data found")
+        proc.wait.return_value = 1
+        mock_open_stream.return_value = proc
+
+        with self.assertRaises(RuntimeError):
+            vosk_transcriber.transcribe_pcm("broken.mp3", model=None)
+
+    def test_plan_windows_overlap(self):
+        windows = vosk_transcriber.plan_windows(700, window=300, overlap=20)
+
+        self.assertEqual(windows, [(0.0, 300), (280.0, 300), (560.0, 140.0)])
+
+    def test_plan_windows_short_file(self):
+        self.assertEqual(vosk_transcriber.plan_windows(42.0, window=300, overlap=20), [(0.0, 42.0)])
+
+    def test_stitch_window_words_deduplicates_overlap(self):
+        # Windows [0, 10) and [8, 18): overlap 8-10 is cut at 9.0
+        first = [word("a", 1.0, 1.5), word("b", 8.2, 8.6), word("c", 9.3, 9.7), word("cut", 9.8, 10.0)]
+        second = [word("b", 8.2, 8.6), word("c", 9.3, 9.7), word("d", 9.8, 10.4), word("e", 12.0, 12.5)]
+
+        merged = vosk_transcriber.stitch_window_words([(0.0, 10.0, first), (8.0, 10.0, second)])
+
+        self.assertEqual([w["word"] for w in merged], ["a", "b", "c", "d", "e"])
+
+
+if __name__ == '__main__':
+    unittest.main()
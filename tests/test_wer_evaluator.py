@@ -0,0 +1,99 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jiwer import process_words
+from src.transcription import batch_wer_evaluator
+from src.transcription.accuracy_evaluator import normalize_words, align_words
+
+
+class TestWerEvaluator(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.gt_dir = os.path.join(self.tmp, "ground_truth")
+        self.tr_dir = os.path.join(self.tmp, "transcripts")
+        os.makedirs(self.gt_dir)
+        os.makedirs(self.tr_dir)
+        for name, value in (("GROUND_TRUTH_DIR", self.gt_dir), ("TRANSCRIPT_DIR", self.tr_dir)):
+            patcher = patch.object(batch_wer_evaluator, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write_transcript(self, name, segments):
+        with open(os.path.join(self.tr_dir, name), "w", encoding="utf-8") as f:
+            json.dump({"segments": segments}, f)
+
+    def test_name_index_prefers_exact_then_shortest(self):
+        for name in ("Bad Habit_cleaned.json", "Bad Habit_cleaned_v2.json", "trauma.json",
+                     "Trauma_cleaned.json", "Trauma_cleaned.words", "episode-wolves.json"):
+            open(os.path.join(self.tr_dir, name), "w").close()
+
+        index = batch_wer_evaluator.build_name_index()
+
+        self.assertEqual(batch_wer_evaluator.find_matching_json("Bad Habit.txt", index), "Bad Habit_cleaned.json")
+        self.assertEqual(batch_wer_evaluator.find_matching_json("Trauma.txt", index), "trauma.json")
+        # Falls back to a substring match
+        self.assertEqual(batch_wer_evaluator.find_matching_json("wolves.txt", index), "episode-wolves.json")
+        self.assertIsNone(batch_wer_evaluator.find_matching_json("Missing.txt", index))
+
+    def test_normalization(self):
+        self.assertEqual(
+            normalize_words("(Transcribed by X.) I'd buy T-shirts, 'honestly' [music]"),
+            ["i'd", "buy", "t", "shirts", "honestly"]
+        )
+
+    def test_align_words_matches_jiwer(self):
+        reference = "the wolves came back to the park in the spring".split()
+        hypothesis = "the wolf came back the park in in the spring time".split()
+
+        result = align_words(reference, hypothesis)
+        expected = process_words(" ".join(reference), " ".join(hypothesis))
+
+        self.assertAlmostEqual(result["wer"], expected.wer)
+        self.assertEqual(
+            (result["substitutions"], result["insertions"], result["deletions"], result["hits"]),
+            (expected.substitutions, expected.insertions, expected.deletions, expected.hits)
+        )
+
+    def test_report_has_counts_and_time_regions(self):
+        with open(os.path.join(self.gt_dir, "Wolves.txt"), "w", encoding="utf-8") as f:
+            f.write("The wolves came back. Nobody expected them to return to the park so soon.")
+        self.write_transcript("Wolves_cleaned.json", [
+            {"start": 0.0, "end": 2.0, "text": "the wolf came back"},
+            {"start": 2.0, "end": 6.0, "text": "nobody expected them to return"},
+            {"start": 20.0, "end": 24.0, "text": "to the park so"},
+        ])
+        with open(os.path.join(self.gt_dir, "Unmatched.txt"), "w", encoding="utf-8") as f:
+            f.write("no transcript")
+
+        output_path = os.path.join(self.tmp, "reports", "wer.json")
+        report = batch_wer_evaluator.evaluate_all_wer(workers=1, output_path=output_path)
+
+        with open(output_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), report)
+        self.assertEqual(report["missing"], ["Unmatched.txt"])
+
+        result = report["files"][0]
+        self.assertEqual((result["substitutions"], result["insertions"], result["deletions"]), (1, 0, 1))
+        self.assertEqual(result["timing"], "segments")
+        self.assertEqual(result["regions"], [
+            {"start": 0.5, "end": 1.0, "substitutions": 1, "insertions": 0, "deletions": 0,
+             "reference": "wolves", "hypothesis": "wolf"},
+            {"start": 24.0, "end": 24.0, "substitutions": 0, "insertions": 0, "deletions": 1,
+             "reference": "soon", "hypothesis": ""},
+        ])
+        self.assertEqual(report["total"]["wer"], round(2 / 14, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
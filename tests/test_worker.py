@@ -0,0 +1,118 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+import shutil
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pipeline import worker
+from src.pipeline import job_queue
+
+# Stage modules are imported lazily by the worker, so they are only mocked
+# while a test runs instead of for the whole session.
+STAGE_MODULES = {
+    'src.transcription.batch_transcriber': MagicMock(),
+    'src.segmentation.batch_segmenter': MagicMock(),
+    'src.segmentation.batch_keyword_summarizer': MagicMock(),
+}
+
+
+class TestWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        patcher = patch.object(job_queue, "DB_PATH", os.path.join(self.tmp, "queue.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for module in STAGE_MODULES.values():
+            module.reset_mock(return_value=True, side_effect=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    @patch.dict(sys.modules, STAGE_MODULES)
+    @patch('src.pipeline.worker.emit')
+    def test_process_job_reports_each_stage(self, mock_emit):
+        from src.transcription.batch_transcriber import transcribe_single_audio
+        from src.segmentation.batch_segmenter import segment_single_file
+        from src.segmentation.batch_keyword_summarizer import process_single_file
+
+        transcribe_single_audio.return_value = os.path.join("data", "transcripts", "ep.json")
+        segment_single_file.return_value = os.path.join("data", "segments", "ep.json")
+        process_single_file.return_value = os.path.join("database", "ep.json")
+
+        result = worker.process_job("7", "uploads/ep.mp3")
+
+        transcribe_single_audio.assert_called_once_with("uploads/ep.mp3")
+        segment_single_file.assert_called_once_with(os.path.join("data", "transcripts", "ep.json"))
+        process_single_file.assert_called_once_with("ep.json")
+        self.assertEqual(result["file"], "ep.json")
+
+        events = [c[0][0] for c in mock_emit.call_args_list]
+        self.assertEqual(
+            [(e["stage"], e["state"]) for e in events],
+            [
+                ("transcription", "started"), ("transcription", "done"),
+                ("segmentation", "started"), ("segmentation", "done"),
+                ("enrichment", "started"), ("enrichment", "done"),
+            ]
+        )
+        self.assertTrue(all(e["id"] == "7" for e in events))
+
+    @patch.dict(sys.modules, STAGE_MODULES)
+    @patch('src.pipeline.worker.emit')
+    def test_failed_stage_is_retried_from_where_it_stopped(self, mock_emit):
+        from src.transcription.batch_transcriber import transcribe_single_audio
+        from src.segmentation.batch_segmenter import segment_single_file
+        from src.segmentation.batch_keyword_summarizer import process_single_file
+
+        transcript = os.path.join(self.tmp, "ep_transcript.json")
+        open(transcript, "w").close()
+        transcribe_single_audio.return_value = transcript
+        segment_single_file.side_effect = [RuntimeError("out of memory"), os.path.join("data", "segments", "ep.json")]
+        process_single_file.return_value = os.path.join("database", "ep.json")
+
+        job_queue.enqueue("uploads/ep.mp3", job_id="9")
+        with patch.object(job_queue, "RETRY_DELAY_SECONDS", 0):
+            worker.run_job(job_queue.claim())
+            retry = mock_emit.call_args[0][0]
+            worker.run_job(job_queue.claim())
+
+        self.assertEqual((retry["type"], retry["stage"], retry["attempt"]), ("retry", "segmentation", 1))
+        transcribe_single_audio.assert_called_once()
+        self.assertEqual(mock_emit.call_args[0][0]["type"], "result")
+        self.assertTrue(mock_emit.call_args[0][0]["ok"])
+        job = job_queue.get_job("9")
+        self.assertEqual((job["status"], job["attempts"]), ("completed", 2))
+        self.assertEqual([s["state"] for s in job["stages"]], ["done", "done", "done"])
+
+    @patch('src.pipeline.worker.emit')
+    def test_process_request_rejected_when_queue_full(self, mock_emit):
+        job_queue.enqueue("uploads/a.mp3", job_id="a")
+        with patch.object(job_queue, "MAX_QUEUED", 1):
+            worker.handle_request({"id": "b", "cmd": "process", "audio_path": "uploads/b.mp3"})
+
+        self.assertEqual(mock_emit.call_args[0][0]["type"], "rejected")
+        self.assertIsNone(job_queue.get_job("b"))
+
+    @patch('src.pipeline.worker.emit')
+    def test_status_request(self, mock_emit):
+        worker.handle_request({"id": "1", "cmd": "status"})
+
+        event = mock_emit.call_args[0][0]
+        self.assertEqual(event["type"], "status")
+        self.assertEqual(event["id"], "1")
+        self.assertIn("jobs_completed", event)
+
+    @patch('src.pipeline.worker.emit')
+    def test_process_request_without_audio_path(self, mock_emit):
+        worker.handle_request({"id": "2", "cmd": "process"})
+
+        event = mock_emit.call_args[0][0]
+        self.assertFalse(event["ok"])
+
+
+if __name__ == '__main__':
+    unittest.main()